@@ -5,7 +5,7 @@ from flask import Blueprint, request, jsonify, session, render_template
 from database import (
     get_db, PromoCode, User, PromoCodeType, 
     Subscription, SubscriptionPlan, SubscriptionStatus,
-    Bot, Payment, BacktestMasterRun, BacktestMasterSignal
+    Bot, Payment, BacktestMasterRun
 )
 from auth_routes import admin_required, login_required
 from strategy_engine import StrategyEngine
@@ -1023,6 +1023,9 @@ def fill_market_data():
                     timeout=300
                 )
                 print("✅ Script de carga de datos completado")
+                # Las velas cambiaron: liberar resultados en memoria que ya no se van a pedir
+                from backtest_cache import backtest_cache
+                backtest_cache.invalidate()
                 print(result.stdout)
                 if result.stderr:
                     print("Errores:", result.stderr)
@@ -1045,129 +1048,170 @@ def fill_market_data():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-@admin_bp.route('/api/admin/generate-master-backtest', methods=['POST'])
+@admin_bp.route('/api/admin/backtest-cache', methods=['GET', 'DELETE'])
 @admin_required
-def generate_master_backtest():
-    """Genera backtest maestro - Solo WIN/LOSS para recalculo dinámico"""
+def backtest_cache_admin():
+    """Estadísticas de la caché de backtests (GET) o vaciado por símbolo/timeframe (DELETE)"""
     try:
-        from backtesting_engine import BacktestingEngine
-        from strategy_engine import Candle as EngineCandle
-        from strategies import (
-            RSIStrategy, MACDStrategy, BollingerStrategy,
-            ProbabilityGaleStrategy, KolmogorovMarkovStrategy,
-            KolmogorovComplexityStrategy, SmartTradeAcademyStrategy,
-            TableroBinariasStrategy, TendencialTradeStrategy
-        )
+        from backtest_cache import backtest_cache
+        from backtest_store import invalidate_cache_entries
         
-        data = request.json
+        if request.method == 'GET':
+            return jsonify({'success': True, 'stats': backtest_cache.stats()})
         
-        required_fields = ['strategy_name', 'symbol', 'timeframe']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'success': False, 'error': f'Campo {field} requerido'}), 400
+        data = request.json or {}
+        symbol = data.get('symbol')
+        timeframe = data.get('timeframe')
         
-        strategy_name = data['strategy_name']
-        symbol = data['symbol']
-        timeframe = data['timeframe']
-        trade_duration = int(data.get('trade_duration', 5))
+        removed = backtest_cache.invalidate(symbol, timeframe)
+        with get_db() as db:
+            deleted = invalidate_cache_entries(db, symbol, timeframe)
         
-        reference_amount = float(data.get('reference_amount', 100.0))
-        reference_payout = float(data.get('reference_payout', 85.0))
+        return jsonify({'success': True, 'memory_entries_removed': removed, 'db_entries_removed': deleted})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _master_strategy_map():
+    """Estrategias disponibles para backtests maestros (nombre -> instancia con parámetros por defecto)"""
+    from strategies import (
+        RSIStrategy, MACDStrategy, BollingerStrategy,
+        ProbabilityGaleStrategy, KolmogorovMarkovStrategy,
+        KolmogorovComplexityStrategy, SmartTradeAcademyStrategy,
+        TableroBinariasStrategy
+    )
+    
+    return {
+        'RSI': RSIStrategy(),
+        'MACD': MACDStrategy(),
+        'Bollinger Bands': BollingerStrategy(),
+        'Probability + Gale System': ProbabilityGaleStrategy(),
+        'Kolmogorov-Markov': KolmogorovMarkovStrategy(),
+        'Kolmogorov Complexity': KolmogorovComplexityStrategy(),
+        'SmartTradeAcademy1': SmartTradeAcademyStrategy(),
+        'Tablero Binarias': TableroBinariasStrategy()
+    }
+
+
+def _generate_master(data, progress=None):
+    """
+    Genera un backtest maestro (en la request o en un trabajo de la cola)
+    
+    Retorna (payload, status HTTP). `progress` se pasa al motor.
+    """
+    from backtesting_engine import BacktestingEngine, BACKTEST_MODES
+    from strategy_engine import CandleSeries
+    from backtest_store import (
+        save_master_signals, save_master_progress, register_cache_entry, find_cached_master, BULK_METHODS
+    )
+    from backtest_cache import backtest_cache, backtest_cache_key
+    
+    required_fields = ['strategy_name', 'symbol', 'timeframe']
+    for field in required_fields:
+        if field not in data:
+            return {'success': False, 'error': f'Campo {field} requerido'}, 400
+    
+    strategy_name = data['strategy_name']
+    symbol = data['symbol']
+    timeframe = data['timeframe']
+    trade_duration = int(data.get('trade_duration', 5))
+    mode = data.get('mode', 'vectorized')
+    if mode not in BACKTEST_MODES:
+        return {'success': False, 'error': f'Modo inválido: {mode}'}, 400
+    
+    use_cache = data.get('use_cache', True)
+    bulk_method = data.get('bulk_method', 'values')
+    if bulk_method not in BULK_METHODS:
+        return {'success': False, 'error': f'Método de inserción inválido: {bulk_method}'}, 400
+    
+    reference_amount = float(data.get('reference_amount', 100.0))
+    reference_payout = float(data.get('reference_payout', 85.0))
+    
+    date_from = data.get('date_from')
+    date_to = data.get('date_to')
+    
+    strategy_map = _master_strategy_map()
+    
+    if strategy_name not in strategy_map:
+        return {'success': False, 'error': f'Estrategia {strategy_name} no encontrada'}, 404
+    
+    strategy = strategy_map[strategy_name]
+    
+    with get_db() as db:
+        from sqlalchemy import text
+        from datetime import datetime as dt
         
-        date_from = data.get('date_from')
-        date_to = data.get('date_to')
+        if date_from and date_to:
+            date_from_ts = int(dt.strptime(date_from, '%Y-%m-%d').timestamp())
+            date_to_ts = int(dt.strptime(date_to + 'T23:59:59', '%Y-%m-%dT%H:%M:%S').timestamp())
+            
+            query = text("""
+                SELECT timestamp, open, high, low, close, volume
+                FROM candles
+                WHERE symbol = :symbol AND timeframe = :timeframe
+                  AND timestamp >= :from_ts AND timestamp <= :to_ts
+                ORDER BY timestamp ASC
+                LIMIT 10000
+            """)
+            
+            result = db.execute(query, {
+                'symbol': symbol,
+                'timeframe': timeframe,
+                'from_ts': date_from_ts,
+                'to_ts': date_to_ts
+            })
+        else:
+            query = text("""
+                SELECT timestamp, open, high, low, close, volume
+                FROM candles
+                WHERE symbol = :symbol AND timeframe = :timeframe
+                ORDER BY timestamp ASC
+                LIMIT 10000
+            """)
+            
+            result = db.execute(query, {'symbol': symbol, 'timeframe': timeframe})
         
-        strategy_map = {
-            'RSI': RSIStrategy(),
-            'MACD': MACDStrategy(),
-            'Bollinger Bands': BollingerStrategy(),
-            'Probability + Gale System': ProbabilityGaleStrategy(),
-            'Kolmogorov-Markov': KolmogorovMarkovStrategy(),
-            'Kolmogorov Complexity': KolmogorovComplexityStrategy(),
-            'SmartTradeAcademy1': SmartTradeAcademyStrategy(),
-            'Tablero Binarias': TableroBinariasStrategy()
-        }
+        # Filas de BD directo a columnas NumPy (sin un objeto por vela)
+        candles = CandleSeries.from_rows(result)
         
-        if strategy_name not in strategy_map:
-            return jsonify({'success': False, 'error': f'Estrategia {strategy_name} no encontrada'}), 404
+        if len(candles) < strategy.min_candles:
+            return {
+                'success': False,
+                'error': f'Necesita al menos {strategy.min_candles} velas, encontradas: {len(candles)}'
+            }, 400
         
-        strategy = strategy_map[strategy_name]
+        # Mismas velas, estrategia y configuración: reutilizar el backtest maestro activo
+        fingerprint = candles.fingerprint()
+        cache_key = backtest_cache_key(strategy, symbol, timeframe, candles, {
+            'initial_balance': 1000.0,
+            'trade_amount': reference_amount,
+            'payout_percent': reference_payout,
+            'trade_duration': trade_duration
+        }, fingerprint)
         
-        with get_db() as db:
-            from sqlalchemy import text
-            from datetime import datetime as dt
-            
-            if date_from and date_to:
-                date_from_ts = int(dt.strptime(date_from, '%Y-%m-%d').timestamp())
-                date_to_ts = int(dt.strptime(date_to + 'T23:59:59', '%Y-%m-%dT%H:%M:%S').timestamp())
-                
-                query = text("""
-                    SELECT timestamp, open, high, low, close, volume
-                    FROM candles
-                    WHERE symbol = :symbol AND timeframe = :timeframe
-                      AND timestamp >= :from_ts AND timestamp <= :to_ts
-                    ORDER BY timestamp ASC
-                    LIMIT 10000
-                """)
-                
-                result = db.execute(query, {
-                    'symbol': symbol,
-                    'timeframe': timeframe,
-                    'from_ts': date_from_ts,
-                    'to_ts': date_to_ts
-                })
-            else:
-                query = text("""
-                    SELECT timestamp, open, high, low, close, volume
-                    FROM candles
-                    WHERE symbol = :symbol AND timeframe = :timeframe
-                    ORDER BY timestamp ASC
-                    LIMIT 10000
-                """)
-                
-                result = db.execute(query, {'symbol': symbol, 'timeframe': timeframe})
-            
-            candles_data = []
-            for row in result:
-                candles_data.append({
-                    'time': row[0],
-                    'open': float(row[1]),
-                    'high': float(row[2]),
-                    'low': float(row[3]),
-                    'close': float(row[4]),
-                    'volume': float(row[5]) if row[5] else 0.0
-                })
-            
-            if len(candles_data) < strategy.min_candles:
-                return jsonify({
-                    'success': False,
-                    'error': f'Necesita al menos {strategy.min_candles} velas, encontradas: {len(candles_data)}'
-                }), 400
-            
-            candles = [
-                EngineCandle(
-                    time=c['time'],
-                    open=c['open'],
-                    high=c['high'],
-                    low=c['low'],
-                    close=c['close'],
-                    volume=c['volume']
-                ) for c in candles_data
-            ]
-            
+        master_run = find_cached_master(db, cache_key) if use_cache else None
+        cached = master_run is not None
+        
+        if not cached:
             engine = BacktestingEngine(
                 initial_balance=1000.0,
                 trade_amount=reference_amount,
                 payout_percent=reference_payout
             )
             
-            backtest_result = engine.run_backtest(
-                strategy=strategy,
-                symbol=symbol,
-                timeframe=timeframe,
-                candles=candles,
-                trade_duration=trade_duration
-            )
+            backtest_result = backtest_cache.get(cache_key) if use_cache else None
+            if backtest_result is None:
+                backtest_result = engine.run_backtest(
+                    strategy=strategy,
+                    symbol=symbol,
+                    timeframe=timeframe,
+                    candles=candles,
+                    trade_duration=trade_duration,
+                    mode=mode,
+                    progress=progress
+                )
+                backtest_cache.put(cache_key, backtest_result, symbol, timeframe)
             
             master_run = BacktestMasterRun(
                 strategy_name=strategy_name,
@@ -1192,35 +1236,201 @@ def generate_master_backtest():
             db.add(master_run)
             db.flush()
             
-            for idx, trade in enumerate(backtest_result.trades):
-                signal = BacktestMasterSignal(
-                    master_run_id=master_run.id,
-                    signal_index=idx,
-                    signal_time=trade.entry_time,
-                    direction=trade.direction,
-                    entry_price=trade.entry_price,
-                    exit_price=trade.exit_price,
-                    result=trade.result
-                )
-                db.add(signal)
+            # Todas las señales en pocas operaciones (INSERT multi-fila / COPY)
+            save_master_signals(db, master_run.id, backtest_result.trades, method=bulk_method)
+            save_master_progress(db, master_run.id, backtest_result, candles, trade_duration, mode)
+            register_cache_entry(db, cache_key, fingerprint, symbol, timeframe, master_run_id=master_run.id)
+            
+            db.commit()
+        
+        return {
+            'success': True,
+            'master_backtest_id': master_run.id,
+            'cached': cached,
+            'stats': {
+                'strategy_name': strategy_name,
+                'symbol': symbol,
+                'timeframe': timeframe,
+                'total_candles': len(candles),
+                'total_signals': master_run.total_signals,
+                'winning_signals': master_run.winning_signals,
+                'losing_signals': master_run.losing_signals,
+                'win_rate': round(master_run.win_rate, 2),
+                'max_consecutive_wins': master_run.max_consecutive_wins,
+                'max_consecutive_losses': master_run.max_consecutive_losses
+            }
+        }, 200
+
+
+@admin_bp.route('/api/admin/generate-master-backtest', methods=['POST'])
+@admin_required
+def generate_master_backtest():
+    """Genera backtest maestro - Solo WIN/LOSS para recalculo dinámico"""
+    try:
+        payload, status = _generate_master(request.json)
+        return jsonify(payload), status
+    
+    except Exception as e:
+        import traceback
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
+
+
+@admin_bp.route('/api/admin/master-backtest/jobs', methods=['POST'])
+@admin_required
+def submit_master_backtest_job():
+    """Encola la generación de un backtest maestro; el progreso se consulta en /api/backtest/jobs/<id>"""
+    try:
+        from backtest_jobs import backtest_jobs, payload_runner, JobLimitError
+        
+        data = request.json or {}
+        
+        try:
+            job = backtest_jobs.submit(session['user_id'], 'master', {
+                'strategy_name': data.get('strategy_name'),
+                'symbol': data.get('symbol'),
+                'timeframe': data.get('timeframe')
+            }, payload_runner(_generate_master, data))
+        except JobLimitError as e:
+            return jsonify({'success': False, 'error': str(e)}), 429
+        
+        return jsonify({'success': True, 'job': job.to_dict()}), 202
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _extend_master(db, master_run, progress, bulk_method='values'):
+    """
+    Evalúa solo las velas nuevas de un backtest maestro y agrega sus señales
+    
+    Carga la historia de warm-up que necesita la estrategia (hasta la última
+    vela evaluada) más las velas posteriores, y ejecuta el motor solo sobre
+    la cola. Retorna el resumen de la extensión.
+    """
+    from sqlalchemy import text
+    from backtesting_engine import BacktestingEngine, BACKTEST_LOOKBACK
+    from strategy_engine import CandleSeries
+    from backtest_store import extend_master_run
+    
+    strategy = _master_strategy_map().get(master_run.strategy_name)
+    if strategy is None:
+        raise ValueError(f'Estrategia {master_run.strategy_name} no encontrada')
+    
+    params = {
+        'symbol': master_run.symbol,
+        'timeframe': master_run.timeframe,
+        'last_ts': progress.last_evaluated_time,
+        'warmup': max(BACKTEST_LOOKBACK, strategy.min_candles)
+    }
+    
+    # Ventana de análisis previa a la primera vela nueva (en orden descendente)
+    warmup_rows = db.execute(text("""
+        SELECT timestamp, open, high, low, close, volume
+        FROM candles
+        WHERE symbol = :symbol AND timeframe = :timeframe
+          AND timestamp <= :last_ts
+        ORDER BY timestamp DESC
+        LIMIT :warmup
+    """), params).fetchall()
+    
+    tail_rows = db.execute(text("""
+        SELECT timestamp, open, high, low, close, volume
+        FROM candles
+        WHERE symbol = :symbol AND timeframe = :timeframe
+          AND timestamp > :last_ts
+        ORDER BY timestamp ASC
+        LIMIT 10000
+    """), params).fetchall()
+    
+    # Velas que el maestro aún no tenía (las de la cola hasta end_time ya estaban contadas)
+    new_candles = sum(1 for row in tail_rows if row[0] > master_run.end_time)
+    
+    summary = {
+        'master_backtest_id': master_run.id,
+        'new_candles': new_candles,
+        'new_signals': 0
+    }
+    
+    # Sin velas nuevas suficientes para cerrar al menos un trade no hay nada que evaluar
+    if len(tail_rows) <= progress.trade_duration:
+        return summary
+    
+    candles = CandleSeries.from_rows(list(reversed(warmup_rows)) + list(tail_rows))
+    
+    engine = BacktestingEngine(
+        initial_balance=1000.0,
+        trade_amount=master_run.reference_amount,
+        payout_percent=master_run.reference_payout
+    )
+    
+    backtest_result = engine.run_backtest(
+        strategy=strategy,
+        symbol=master_run.symbol,
+        timeframe=master_run.timeframe,
+        candles=candles,
+        trade_duration=progress.trade_duration,
+        mode=progress.mode,
+        start=len(warmup_rows)
+    )
+    
+    summary['new_signals'] = extend_master_run(
+        db, master_run, progress, backtest_result, candles, new_candles, method=bulk_method
+    )
+    return summary
+
+
+def _master_stats(master_run):
+    """Estadísticas agregadas de un backtest maestro"""
+    return {
+        'strategy_name': master_run.strategy_name,
+        'symbol': master_run.symbol,
+        'timeframe': master_run.timeframe,
+        'total_candles': master_run.total_candles,
+        'total_signals': master_run.total_signals,
+        'winning_signals': master_run.winning_signals,
+        'losing_signals': master_run.losing_signals,
+        'win_rate': round(master_run.win_rate, 2),
+        'max_consecutive_wins': master_run.max_consecutive_wins,
+        'max_consecutive_losses': master_run.max_consecutive_losses
+    }
+
+
+@admin_bp.route('/api/admin/master-backtest/<int:master_id>/extend', methods=['POST'])
+@admin_required
+def extend_master_backtest(master_id):
+    """Extiende un backtest maestro con las velas llegadas desde la última evaluación"""
+    try:
+        from database import BacktestMasterProgress
+        from backtest_store import BULK_METHODS
+        
+        data = request.json or {}
+        bulk_method = data.get('bulk_method', 'values')
+        if bulk_method not in BULK_METHODS:
+            return jsonify({'success': False, 'error': f'Método de inserción inválido: {bulk_method}'}), 400
+        
+        with get_db() as db:
+            master_run = db.query(BacktestMasterRun).filter_by(id=master_id).first()
+            if not master_run:
+                return jsonify({'success': False, 'error': 'Backtest maestro no encontrado'}), 404
+            
+            progress = db.query(BacktestMasterProgress).filter_by(master_run_id=master_id).first()
+            if not progress:
+                return jsonify({
+                    'success': False,
+                    'error': 'Backtest maestro sin progreso registrado, debe regenerarse para poder extenderlo'
+                }), 409
             
+            summary = _extend_master(db, master_run, progress, bulk_method)
             db.commit()
             
             return jsonify({
                 'success': True,
-                'master_backtest_id': master_run.id,
-                'stats': {
-                    'strategy_name': strategy_name,
-                    'symbol': symbol,
-                    'timeframe': timeframe,
-                    'total_candles': len(candles),
-                    'total_signals': master_run.total_signals,
-                    'winning_signals': master_run.winning_signals,
-                    'losing_signals': master_run.losing_signals,
-                    'win_rate': round(master_run.win_rate, 2),
-                    'max_consecutive_wins': master_run.max_consecutive_wins,
-                    'max_consecutive_losses': master_run.max_consecutive_losses
-                }
+                **summary,
+                'stats': _master_stats(master_run)
             })
     
     except Exception as e:
@@ -1230,3 +1440,50 @@ def generate_master_backtest():
             'error': str(e),
             'traceback': traceback.format_exc()
         }), 500
+
+
+@admin_bp.route('/api/admin/master-backtest/extend-active', methods=['POST'])
+@admin_required
+def extend_active_master_backtests():
+    """Extiende todos los backtests maestros activos (para llamar después de cargar velas)"""
+    try:
+        from database import BacktestMasterProgress
+        from backtest_store import BULK_METHODS
+        
+        data = request.json or {}
+        bulk_method = data.get('bulk_method', 'values')
+        if bulk_method not in BULK_METHODS:
+            return jsonify({'success': False, 'error': f'Método de inserción inválido: {bulk_method}'}), 400
+        
+        extended = []
+        skipped = []
+        
+        with get_db() as db:
+            rows = db.query(BacktestMasterRun, BacktestMasterProgress).outerjoin(
+                BacktestMasterProgress, BacktestMasterProgress.master_run_id == BacktestMasterRun.id
+            ).filter(BacktestMasterRun.is_active == True).all()
+            
+            for master_run, progress in rows:
+                if progress is None:
+                    skipped.append(master_run.id)
+                    continue
+                
+                extended.append(_extend_master(db, master_run, progress, bulk_method))
+                # Un commit por maestro: un error en uno no descarta los anteriores
+                db.commit()
+        
+        print(f"📈 Backtests maestros extendidos: {len(extended)} (sin progreso: {len(skipped)})")
+        
+        return jsonify({
+            'success': True,
+            'extended': extended,
+            'skipped': skipped
+        })
+    
+    except Exception as e:
+        import traceback
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
@@ -7,6 +7,7 @@ import time
 import threading
 import json
 import os
+import copy
 from dataclasses import dataclass, field, asdict
 from typing import List, Dict, Optional, Callable
 from datetime import datetime
@@ -122,6 +123,13 @@ class TradingBot:
         self.pending_trade = None
         self.last_candle_time = 0
         
+        # Copia propia de la estrategia: las instancias del StrategyEngine son
+        # compartidas y on_candle guarda estado entre velas
+        self.stream_strategy = copy.deepcopy(strategy)
+        self.stream_strategy.reset_stream()
+        self.last_streamed_time = 0
+        self.stream_signal: Optional[Signal] = None
+        
     def start(self):
         """Inicia el bot"""
         if self.running:
@@ -203,13 +211,31 @@ class TradingBot:
             
         return False
     
+    def _analyze(self, candles: List[Candle]) -> Optional[Signal]:
+        """
+        Alimenta la estrategia (modo streaming) solo con las velas cerradas
+        que aún no procesó y retorna la señal de la última vela cerrada
+        
+        candles[-1] es la vela en curso, por eso no se envía a on_candle.
+        """
+        signal = self.stream_signal
+        for candle in candles[:-1]:
+            if candle.time <= self.last_streamed_time:
+                continue
+            signal = self.stream_strategy.on_candle(candle)
+            self.last_streamed_time = candle.time
+        
+        if signal:
+            signal.symbol = self.config.symbol
+            signal.timeframe = self.config.timeframe
+            signal.strategy_name = self.stream_strategy.name
+        
+        self.stream_signal = signal
+        return signal
+    
     def _process_new_candle(self, candles: List[Candle], current_timestamp: int):
         """Procesa nueva vela: analiza señal y espera al inicio exacto de la próxima vela M5"""
-        signal = self.strategy.analyze(
-            self.config.symbol,
-            self.config.timeframe,
-            candles
-        )
+        signal = self._analyze(candles)
         
         # LÓGICA TRADINGVIEW: Si estrategia genera señal CALL/PUT, ejecutar sin filtro de confidence
         if signal and signal.direction in ['CALL', 'PUT']:
@@ -301,11 +327,7 @@ class TradingBot:
                 self.save_callback()
             
             print(f"🔍 Verificando si vela actual tiene señal...")
-            signal = self.strategy.analyze(
-                self.config.symbol,
-                self.config.timeframe,
-                candles
-            )
+            signal = self._analyze(candles)
             
             if signal and signal.direction in ['CALL', 'PUT'] and signal.confidence >= 0.5:
                 print(f"🎯 ¡Señal válida en vela actual! {signal.direction} (confidence: {signal.confidence:.2f})")
@@ -348,11 +370,7 @@ class TradingBot:
                     self.save_callback()
                 
                 print(f"🔍 Verificando si vela actual tiene señal para Gale {self.gale_level}...")
-                signal = self.strategy.analyze(
-                    self.config.symbol,
-                    self.config.timeframe,
-                    candles
-                )
+                signal = self._analyze(candles)
                 
                 if signal and signal.direction in ['CALL', 'PUT'] and signal.confidence >= 0.5:
                     print(f"🎯 ¡Señal válida en vela actual! {signal.direction} (confidence: {signal.confidence:.2f})")
@@ -0,0 +1,146 @@
+"""
+Caché de resultados de backtest direccionada por contenido - STC Trading System
+
+La clave es un hash de (estrategia, parámetros, configuración del motor,
+símbolo/timeframe y huella del contenido de las velas). Si cambia
+cualquier vela del rango la huella cambia y la clave también: un
+resultado guardado nunca se sirve para velas distintas.
+
+BacktestCache guarda en memoria los BacktestResult más recientes con
+desalojo LRU acotado por cantidad de entradas y por bytes. Los backtests
+persistidos se encuentran por la misma clave en BacktestCacheEntry (ver
+backtest_store).
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+import hashlib
+import json
+import threading
+
+from strategy_engine import Strategy, Candle, CandleSeries, as_candle_series
+from backtesting_engine import BacktestResult, BACKTEST_LOOKBACK
+
+
+# Subir al cambiar la semántica del motor: invalida todas las claves anteriores
+CACHE_VERSION = 1
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Costo fijo estimado de un BacktestResult (objeto, métricas, strings)
+_RESULT_OVERHEAD = 2048
+
+
+def backtest_cache_key(
+    strategy: Strategy,
+    symbol: str,
+    timeframe: str,
+    candles: Union[List[Candle], CandleSeries],
+    settings: Dict[str, Any],
+    fingerprint: Optional[str] = None
+) -> str:
+    """
+    Clave sha256 de un backtest
+
+    Args:
+        settings: configuración del motor que afecta el resultado
+                  (initial_balance, trade_amount, payout_percent, trade_duration, ...).
+                  El modo (loop / vectorized) no se incluye: ambos dan el mismo resultado.
+        fingerprint: huella de las velas si ya se calculó (CandleSeries.fingerprint)
+    """
+    payload = {
+        'version': CACHE_VERSION,
+        'lookback': BACKTEST_LOOKBACK,
+        'strategy': type(strategy).__name__,
+        'strategy_name': strategy.name,
+        'params': strategy.params,
+        'symbol': symbol,
+        'timeframe': timeframe,
+        'settings': settings,
+        'candles': fingerprint or as_candle_series(candles).fingerprint()
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=repr).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def estimate_size(result: BacktestResult) -> int:
+    """Bytes aproximados que ocupa un resultado en memoria"""
+    return _RESULT_OVERHEAD + result.trades.data.nbytes + result.equity_curve.nbytes
+
+
+class BacktestCache:
+    """LRU en memoria de BacktestResult, acotada por entradas y bytes (thread-safe)"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[BacktestResult]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, result: BacktestResult, symbol: str = '', timeframe: str = ''):
+        """Guarda el resultado (si no entra solo en el límite de bytes no se guarda)"""
+        size = estimate_size(result)
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+
+            self.entries[key] = (result, size, symbol, timeframe)
+            self.bytes += size
+
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size, _, _) = self.entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, symbol: Optional[str] = None, timeframe: Optional[str] = None) -> int:
+        """
+        Elimina las entradas de un símbolo/timeframe (todas si no se indica)
+
+        Las claves ya cambian con el contenido de las velas; esto libera la
+        memoria de resultados que no volverán a pedirse tras actualizar velas.
+        """
+        with self.lock:
+            keys = [
+                key for key, (_, _, entry_symbol, entry_timeframe) in self.entries.items()
+                if (symbol is None or entry_symbol == symbol) and (timeframe is None or entry_timeframe == timeframe)
+            ]
+            for key in keys:
+                self.bytes -= self.entries.pop(key)[1]
+            return len(keys)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+# Caché compartida por las rutas del proceso
+backtest_cache = BacktestCache()
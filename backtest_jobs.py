@@ -0,0 +1,270 @@
+"""
+Cola de trabajos de backtest - STC Trading System
+
+Los backtests largos se ejecutan fuera del hilo de la request: la ruta
+registra un BacktestJob, responde con su id y un pool acotado de hilos lo
+ejecuta. Cada usuario tiene un límite de trabajos activos (en cola o en
+ejecución).
+
+El trabajo recibe un callback de progreso compatible con
+BacktestingEngine.run_backtest(progress=...): actualiza velas procesadas y
+trades, despierta a quien espera novedades (polling / server-sent events) y
+lanza JobCancelled si se pidió cancelar, lo que interrumpe el backtest en
+el siguiente reporte. En modo vectorizado el motor solo reporta antes y
+después de analyze_series, así que el progreso avanza por etapas y una
+cancelación espera a que la serie termine de calcularse.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import json
+import threading
+import uuid
+
+
+JOB_STATUSES = ('queued', 'running', 'completed', 'failed', 'cancelled')
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_PER_USER = 2
+
+# Procesos que puede pedir un trabajo (optimizador, lotes): los trabajos ya
+# corren DEFAULT_MAX_WORKERS a la vez, cada uno no debe ocupar toda la máquina
+MAX_JOB_PROCESSES = 2
+
+# Los trabajos terminados se conservan este tiempo para consultar el resultado
+JOB_RETENTION = timedelta(hours=1)
+
+
+class JobCancelled(Exception):
+    """Se pidió cancelar el trabajo mientras se ejecutaba"""
+
+
+class JobLimitError(Exception):
+    """El usuario alcanzó su límite de trabajos activos"""
+
+
+class BacktestJob:
+    """Un backtest encolado: estado, progreso y resultado"""
+
+    def __init__(self, user_id: str, kind: str, spec: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.kind = kind
+        self.spec = spec
+        self.status = 'queued'
+        self.bars_processed = 0
+        self.total_bars = 0
+        self.trades = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+        self.cancel_requested = threading.Event()
+        # Se incrementa en cada cambio; los observadores esperan una versión mayor
+        self.version = 0
+        self.changed = threading.Condition(threading.RLock())
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def _touch(self, **changes):
+        with self.changed:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self.version += 1
+            self.changed.notify_all()
+
+    def _start(self) -> bool:
+        """Pasa de 'queued' a 'running' salvo que se haya cancelado antes de empezar"""
+        with self.changed:
+            if self.cancel_requested.is_set():
+                return False
+            self._touch(status='running', started_at=datetime.utcnow())
+            return True
+
+    def report(self, bars_processed: int, total_bars: int, trades: int):
+        """Callback de progreso del motor; lanza JobCancelled si se pidió cancelar"""
+        if self.cancel_requested.is_set():
+            raise JobCancelled()
+        self._touch(bars_processed=bars_processed, total_bars=total_bars, trades=trades)
+
+    def wait_for_change(self, version: int, timeout: float) -> int:
+        """Bloquea hasta que la versión supere `version` o pase el timeout; retorna la versión actual"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version > version, timeout)
+            return self.version
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': {
+                'bars_processed': self.bars_processed,
+                'total_bars': self.total_bars,
+                'percent': round(self.bars_processed / self.total_bars * 100, 1) if self.total_bars else 0.0,
+                'trades': self.trades
+            },
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+        if include_result:
+            data['result'] = self.result
+        return data
+
+
+class BacktestJobQueue:
+    """Pool acotado de hilos para trabajos de backtest con límite por usuario (thread-safe)"""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, max_per_user: int = DEFAULT_MAX_PER_USER):
+        self.max_workers = max_workers
+        self.max_per_user = max_per_user
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='backtest-job')
+        self.jobs: Dict[str, BacktestJob] = {}
+        self.lock = threading.Lock()
+
+    def submit(
+        self,
+        user_id: str,
+        kind: str,
+        spec: Dict[str, Any],
+        runner: Callable[[BacktestJob], Dict[str, Any]]
+    ) -> BacktestJob:
+        """
+        Encola un trabajo
+
+        Args:
+            runner: función que ejecuta el backtest con job.report como
+                    callback de progreso y retorna el resultado (dict JSON).
+                    Si lanza una excepción el trabajo queda 'failed'.
+
+        Raises:
+            JobLimitError: si el usuario ya tiene max_per_user trabajos activos
+        """
+        with self.lock:
+            self._prune()
+            active = sum(1 for job in self.jobs.values() if job.user_id == user_id and not job.finished)
+            if active >= self.max_per_user:
+                raise JobLimitError(f'Límite de {self.max_per_user} backtests simultáneos alcanzado')
+
+            job = BacktestJob(user_id, kind, spec)
+            self.jobs[job.id] = job
+
+        self.executor.submit(self._run, job, runner)
+        return job
+
+    def _run(self, job: BacktestJob, runner: Callable[[BacktestJob], Dict[str, Any]]):
+        if not job._start():
+            return
+
+        print(f"⏳ Backtest {job.kind} {job.id} iniciado (usuario {job.user_id})")
+
+        try:
+            result = runner(job)
+        except JobCancelled:
+            job._touch(status='cancelled', finished_at=datetime.utcnow())
+            print(f"🛑 Backtest {job.id} cancelado")
+        except Exception as e:
+            job._touch(status='failed', error=str(e), finished_at=datetime.utcnow())
+            print(f"❌ Backtest {job.id} falló: {e}")
+        else:
+            job._touch(status='completed', result=result, finished_at=datetime.utcnow())
+            print(f"✅ Backtest {job.id} completado")
+
+    def get(self, job_id: str, user_id: Optional[str] = None) -> Optional[BacktestJob]:
+        """Trabajo por id (si se indica user_id, solo si pertenece a ese usuario)"""
+        job = self.jobs.get(job_id)
+        if job is None or (user_id is not None and job.user_id != user_id):
+            return None
+        return job
+
+    def list(self, user_id: Optional[str] = None) -> List[BacktestJob]:
+        with self.lock:
+            self._prune()
+            jobs = [job for job in self.jobs.values() if user_id is None or job.user_id == user_id]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job: BacktestJob) -> bool:
+        """
+        Pide cancelar un trabajo. Uno en cola no llega a ejecutarse; uno en
+        ejecución se detiene en el siguiente reporte de progreso. Retorna
+        False si ya había terminado.
+        """
+        with job.changed:
+            if job.finished:
+                return False
+            job.cancel_requested.set()
+            if job.status == 'queued':
+                job._touch(status='cancelled', finished_at=datetime.utcnow())
+            else:
+                job._touch()
+        return True
+
+    def _prune(self):
+        """Descarta trabajos terminados hace más de JOB_RETENTION (con self.lock tomado)"""
+        limit = datetime.utcnow() - JOB_RETENTION
+        expired = [job_id for job_id, job in self.jobs.items() if job.finished and job.finished_at < limit]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            counts = {status: 0 for status in JOB_STATUSES}
+            for job in self.jobs.values():
+                counts[job.status] += 1
+        return {'max_workers': self.max_workers, 'max_per_user': self.max_per_user, **counts}
+
+
+# Cola compartida por las rutas del proceso
+backtest_jobs = BacktestJobQueue()
+
+
+def job_processes(requested: Any = None) -> int:
+    """Procesos para un trabajo: lo pedido (por defecto 1, serial) acotado a [1, MAX_JOB_PROCESSES]"""
+    try:
+        requested = 1 if requested is None else int(requested)
+    except (TypeError, ValueError):
+        requested = 1
+    return max(1, min(requested, MAX_JOB_PROCESSES))
+
+
+def payload_runner(execute: Callable[..., tuple], *args, **kwargs) -> Callable[[BacktestJob], Dict[str, Any]]:
+    """
+    Adapta una función de ruta que retorna (payload, status HTTP) a runner
+    de la cola: le pasa job.report como progress y convierte una respuesta
+    de error en excepción (el trabajo queda 'failed' con ese mensaje).
+    """
+    def runner(job: BacktestJob) -> Dict[str, Any]:
+        payload, status = execute(*args, progress=job.report, **kwargs)
+        if status >= 400:
+            raise ValueError(payload.get('error', f'Error {status}'))
+        return payload
+    return runner
+
+
+def sse_events(job: BacktestJob, keepalive: float = 15.0) -> Iterator[str]:
+    """
+    Eventos server-sent del trabajo: 'progress' en cada cambio y 'done'
+    (con el resultado) al terminar. Sin cambios durante `keepalive`
+    segundos envía un comentario para mantener viva la conexión.
+    """
+    version = -1
+    while True:
+        current = job.wait_for_change(version, keepalive)
+        if current == version:
+            yield ': keepalive\n\n'
+            continue
+
+        version = current
+        finished = job.finished
+        event = 'done' if finished else 'progress'
+        yield f"event: {event}\ndata: {json.dumps(job.to_dict(include_result=finished))}\n\n"
+        if finished:
+            return
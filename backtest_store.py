@@ -0,0 +1,447 @@
+"""
+Persistencia masiva de backtests - STC Trading System
+
+Guarda los trades, la curva de equity y las señales de los backtests
+maestros en pocas operaciones contra PostgreSQL en lugar de un db.add()
+por fila:
+- 'values': INSERT multi-fila con psycopg2.extras.execute_values
+  (páginas de BULK_PAGE_SIZE filas)
+- 'copy': COPY ... FROM STDIN, lo más rápido para resultados grandes
+
+Las filas se arman desde las columnas NumPy de BacktestResult.trades,
+sin materializar un Trade por fila. Se escribe con el cursor de la
+conexión de la sesión, dentro de la misma transacción que el BacktestRun.
+
+La curva de equity se puede guardar como un único blob comprimido
+(BacktestEquityCurve) en lugar de una fila por punto.
+
+BacktestCacheEntry asocia la clave de backtest_cache con el backtest ya
+guardado, para devolverlo sin volver a ejecutar ni insertar nada.
+
+Los backtests maestros guardan su progreso (BacktestMasterProgress) y se
+extienden agregando solo las señales de las velas nuevas.
+"""
+
+from datetime import datetime
+from io import StringIO
+from typing import Any, Dict, List, Optional, Sequence
+import zlib
+import numpy as np
+from psycopg2.extras import execute_values
+
+from backtesting_engine import BacktestResult, TradeRecords, DIRECTION_CODES, RESULT_CODES
+from database import (
+    BacktestRun, BacktestTrade, BacktestEquityPoint, BacktestEquityCurve,
+    BacktestMasterRun, BacktestMasterSignal, BacktestMasterProgress, BacktestCacheEntry
+)
+
+
+BULK_METHODS = ('values', 'copy')
+
+EQUITY_STORAGE = ('compressed', 'rows')
+
+EQUITY_ENCODING = 'xor-zlib-f8'
+
+BULK_PAGE_SIZE = 10000
+
+# Segundos entre puntos de la curva de equity (velas M5)
+EQUITY_STEP_SECONDS = 300
+
+
+def encode_equity(equity: Sequence[float]) -> bytes:
+    """
+    Curva de equity -> blob comprimido sin pérdida
+
+    Cada float64 se XOR-ea con el anterior (los bits altos de valores
+    cercanos se cancelan) y el resultado se comprime con zlib.
+    """
+    bits = np.ascontiguousarray(equity, dtype='<f8').view('<i8')
+    previous = np.zeros_like(bits)
+    previous[1:] = bits[:-1]
+    xored = np.bitwise_xor(bits, previous)
+    return zlib.compress(xored.tobytes(), 6)
+
+
+def decode_equity(data: bytes) -> np.ndarray:
+    """Inversa de encode_equity"""
+    xored = np.frombuffer(zlib.decompress(data), dtype='<i8')
+    return np.bitwise_xor.accumulate(xored).view('<f8')
+
+
+def bulk_insert(db, table: str, columns: Sequence[str], rows: List[tuple], method: str = 'values') -> int:
+    """
+    Inserta las filas en pocas operaciones usando el cursor de la sesión
+
+    Args:
+        db: sesión SQLAlchemy (la inserción queda en su transacción)
+        table, columns: tabla y columnas destino (en el orden de cada tupla)
+        method: 'values' (INSERT multi-fila) o 'copy' (COPY FROM STDIN)
+    """
+    if method not in BULK_METHODS:
+        raise ValueError(f"Método de inserción inválido: {method}. Válidos: {BULK_METHODS}")
+    if not rows:
+        return 0
+
+    cursor = db.connection().connection.cursor()
+    try:
+        if method == 'copy':
+            buffer = StringIO()
+            buffer.writelines('\t'.join(_copy_value(value) for value in row) + '\n' for row in rows)
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+        else:
+            execute_values(
+                cursor,
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s",
+                rows,
+                page_size=BULK_PAGE_SIZE
+            )
+    finally:
+        cursor.close()
+
+    return len(rows)
+
+
+def _copy_value(value: Any) -> str:
+    """Valor en formato texto de COPY (\\N = NULL)"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _labels(codes: np.ndarray, mapping: Dict[str, int]) -> List[str]:
+    """Códigos int8 de TradeRecords -> etiquetas ('CALL', 'WIN', ...)"""
+    lookup = {code: label for label, code in mapping.items()}
+    return [lookup[code] for code in codes.tolist()]
+
+
+def save_backtest_trades(db, backtest_run_id: int, trades: TradeRecords, method: str = 'values') -> int:
+    """Guarda todos los trades del resultado en BacktestTrade"""
+    data = trades.data
+    created_at = datetime.utcnow()
+    n = len(data)
+
+    rows = list(zip(
+        [backtest_run_id] * n,
+        [f"bt_{trades.offset + k}" for k in range(n)],
+        [trades.symbol] * n,
+        _labels(data['direction'], DIRECTION_CODES),
+        data['amount'].tolist(),
+        data['duration'].tolist(),
+        data['entry_price'].tolist(),
+        data['entry_time'].tolist(),
+        data['exit_price'].tolist(),
+        data['exit_time'].tolist(),
+        _labels(data['result'], RESULT_CODES),
+        data['profit'].tolist(),
+        [trades.strategy_name] * n,
+        [created_at] * n
+    ))
+
+    return bulk_insert(db, BacktestTrade.__tablename__, (
+        'backtest_run_id', 'trade_id', 'symbol', 'direction', 'amount', 'duration',
+        'entry_price', 'entry_time', 'exit_price', 'exit_time', 'result', 'profit',
+        'strategy_name', 'created_at'
+    ), rows, method)
+
+
+def save_equity_curve(
+    db,
+    backtest_run_id: int,
+    equity: Sequence[float],
+    start_timestamp: Optional[int] = None,
+    storage: str = 'compressed',
+    method: str = 'values'
+) -> int:
+    """
+    Guarda la curva de equity
+
+    storage='compressed' escribe un solo registro BacktestEquityCurve;
+    storage='rows' una fila BacktestEquityPoint por punto (formato anterior).
+    """
+    if storage not in EQUITY_STORAGE:
+        raise ValueError(f"Almacenamiento de equity inválido: {storage}. Válidos: {EQUITY_STORAGE}")
+
+    equity = np.asarray(equity, dtype=float)
+
+    if storage == 'compressed':
+        db.add(BacktestEquityCurve(
+            backtest_run_id=backtest_run_id,
+            encoding=EQUITY_ENCODING,
+            points=len(equity),
+            data=encode_equity(equity),
+            start_timestamp=start_timestamp,
+            step_seconds=EQUITY_STEP_SECONDS
+        ))
+        return 1
+
+    n = len(equity)
+    timestamps = (
+        (start_timestamp + np.arange(n) * EQUITY_STEP_SECONDS).tolist()
+        if start_timestamp is not None else [None] * n
+    )
+    created_at = datetime.utcnow()
+    rows = list(zip([backtest_run_id] * n, range(n), equity.tolist(), timestamps, [created_at] * n))
+
+    return bulk_insert(db, BacktestEquityPoint.__tablename__, (
+        'backtest_run_id', 'point_index', 'balance', 'timestamp', 'created_at'
+    ), rows, method)
+
+
+def save_backtest_details(
+    db,
+    backtest_run_id: int,
+    result: BacktestResult,
+    equity_storage: str = 'compressed',
+    method: str = 'values'
+) -> Dict[str, int]:
+    """Trades + curva de equity de un BacktestRun ya creado (flush hecho)"""
+    return {
+        'trades': save_backtest_trades(db, backtest_run_id, result.trades, method),
+        'equity_records': save_equity_curve(
+            db, backtest_run_id, result.equity_curve, result.start_time, equity_storage, method
+        )
+    }
+
+
+def load_equity_curve(db, backtest_run_id: int) -> List[Dict[str, Any]]:
+    """Puntos {'index', 'balance', 'timestamp'} desde el blob comprimido o desde las filas"""
+    curve = db.query(BacktestEquityCurve).filter_by(backtest_run_id=backtest_run_id).first()
+
+    if curve is not None:
+        balances = decode_equity(curve.data).tolist()
+        start, step = curve.start_timestamp, curve.step_seconds or EQUITY_STEP_SECONDS
+        return [{
+            'index': idx,
+            'balance': balance,
+            'timestamp': start + idx * step if start is not None else None
+        } for idx, balance in enumerate(balances)]
+
+    points = db.query(BacktestEquityPoint).filter_by(
+        backtest_run_id=backtest_run_id
+    ).order_by(BacktestEquityPoint.point_index).all()
+
+    return [{
+        'index': ep.point_index,
+        'balance': ep.balance,
+        'timestamp': ep.timestamp
+    } for ep in points]
+
+
+def save_master_signals(
+    db,
+    master_run_id: int,
+    trades: TradeRecords,
+    method: str = 'values',
+    first_index: int = 0
+) -> int:
+    """Guarda los trades del backtest maestro como BacktestMasterSignal (signal_index desde first_index)"""
+    data = trades.data
+    created_at = datetime.utcnow()
+    n = len(data)
+
+    rows = list(zip(
+        [master_run_id] * n,
+        range(first_index, first_index + n),
+        data['entry_time'].tolist(),
+        _labels(data['direction'], DIRECTION_CODES),
+        data['entry_price'].tolist(),
+        data['exit_price'].tolist(),
+        _labels(data['result'], RESULT_CODES),
+        [created_at] * n
+    ))
+
+    return bulk_insert(db, BacktestMasterSignal.__tablename__, (
+        'master_run_id', 'signal_index', 'signal_time', 'direction',
+        'entry_price', 'exit_price', 'result', 'created_at'
+    ), rows, method)
+
+
+def register_cache_entry(
+    db,
+    cache_key: str,
+    candles_fingerprint: str,
+    symbol: str,
+    timeframe: str,
+    backtest_run_id: Optional[int] = None,
+    master_run_id: Optional[int] = None
+):
+    """Asocia la clave de caché al backtest recién guardado"""
+    db.add(BacktestCacheEntry(
+        cache_key=cache_key,
+        candles_fingerprint=candles_fingerprint,
+        symbol=symbol,
+        timeframe=timeframe,
+        backtest_run_id=backtest_run_id,
+        master_run_id=master_run_id
+    ))
+
+
+def find_cached_backtest(db, cache_key: str, user_id: str) -> Optional[BacktestRun]:
+    """Backtest del usuario guardado con la misma clave (el más reciente)"""
+    return db.query(BacktestRun).join(
+        BacktestCacheEntry, BacktestCacheEntry.backtest_run_id == BacktestRun.id
+    ).filter(
+        BacktestCacheEntry.cache_key == cache_key,
+        BacktestRun.user_id == user_id
+    ).order_by(BacktestRun.id.desc()).first()
+
+
+def find_cached_master(db, cache_key: str) -> Optional[BacktestMasterRun]:
+    """Backtest maestro activo guardado con la misma clave"""
+    return db.query(BacktestMasterRun).join(
+        BacktestCacheEntry, BacktestCacheEntry.master_run_id == BacktestMasterRun.id
+    ).filter(
+        BacktestCacheEntry.cache_key == cache_key,
+        BacktestMasterRun.is_active == True
+    ).order_by(BacktestMasterRun.id.desc()).first()
+
+
+def invalidate_cache_entries(db, symbol: Optional[str] = None, timeframe: Optional[str] = None) -> int:
+    """Borra las entradas de caché de un símbolo/timeframe (los backtests guardados se conservan)"""
+    query = db.query(BacktestCacheEntry)
+    if symbol is not None:
+        query = query.filter(BacktestCacheEntry.symbol == symbol)
+    if timeframe is not None:
+        query = query.filter(BacktestCacheEntry.timeframe == timeframe)
+    return query.delete(synchronize_session=False)
+
+
+def stored_result_dict(run: BacktestRun) -> Dict[str, Any]:
+    """Métricas de un BacktestRun guardado con las mismas claves que BacktestResult.to_dict()"""
+    return {
+        'strategy_name': run.strategy_name,
+        'symbol': run.symbol,
+        'timeframe': run.timeframe,
+        'start_time': run.start_time,
+        'end_time': run.end_time,
+        'initial_balance': run.initial_balance,
+        'final_balance': run.final_balance,
+        'total_trades': run.total_trades,
+        'winning_trades': run.winning_trades,
+        'losing_trades': run.losing_trades,
+        'draw_trades': run.draw_trades,
+        'win_rate': round(run.win_rate, 2),
+        'profit_factor': round(run.profit_factor, 2),
+        'total_profit': round(run.total_profit, 2),
+        'total_loss': round(run.total_loss, 2),
+        'average_win': round(run.average_win, 2),
+        'average_loss': round(run.average_loss, 2),
+        'largest_win': round(run.largest_win, 2),
+        'largest_loss': round(run.largest_loss, 2),
+        'max_drawdown': round(run.max_drawdown, 2),
+        'max_drawdown_percent': round(run.max_drawdown_percent, 2),
+        'sharpe_ratio': round(run.sharpe_ratio, 2),
+        'max_consecutive_wins': run.max_consecutive_wins,
+        'max_consecutive_losses': run.max_consecutive_losses,
+        'net_profit': round(run.net_profit, 2),
+        'return_percent': round(run.return_percent, 2)
+    }
+
+
+def stored_trades(db, backtest_run_id: int, limit: int = 100) -> List[Dict[str, Any]]:
+    """Primeros trades guardados de un backtest con el formato de Trade.to_dict()"""
+    trades = db.query(BacktestTrade).filter_by(
+        backtest_run_id=backtest_run_id
+    ).order_by(BacktestTrade.entry_time).limit(limit).all()
+
+    return [{
+        'id': t.trade_id,
+        'symbol': t.symbol,
+        'direction': t.direction,
+        'amount': t.amount,
+        'duration': t.duration,
+        'entry_price': t.entry_price,
+        'entry_time': t.entry_time,
+        'exit_price': t.exit_price,
+        'exit_time': t.exit_time,
+        'profit': t.profit,
+        'result': t.result,
+        'strategy_name': t.strategy_name
+    } for t in trades]
+
+
+def _leading_run(mask: np.ndarray) -> int:
+    """Cantidad de True consecutivos al inicio"""
+    falses = np.flatnonzero(~mask)
+    return int(falses[0]) if len(falses) else len(mask)
+
+
+def _trailing_run(mask: np.ndarray) -> int:
+    """Cantidad de True consecutivos al final"""
+    return _leading_run(mask[::-1])
+
+
+def _last_evaluated_time(candles, trade_duration: int) -> Optional[int]:
+    """Timestamp de la última vela donde el motor evalúa la estrategia (necesita trade_duration velas después)"""
+    last = len(candles) - 1 - trade_duration
+    return int(candles.time[last]) if last >= 0 else None
+
+
+def save_master_progress(db, master_run_id: int, result: BacktestResult, candles, trade_duration: int, mode: str):
+    """Registra hasta qué vela se evaluó un backtest maestro recién generado"""
+    outcomes = result.trades.data['result']
+    db.add(BacktestMasterProgress(
+        master_run_id=master_run_id,
+        trade_duration=trade_duration,
+        mode=mode,
+        last_evaluated_time=_last_evaluated_time(candles, trade_duration),
+        current_win_streak=_trailing_run(outcomes == RESULT_CODES['WIN']),
+        current_loss_streak=_trailing_run(outcomes == RESULT_CODES['LOSS'])
+    ))
+
+
+def extend_master_run(
+    db,
+    master_run: BacktestMasterRun,
+    progress: BacktestMasterProgress,
+    result: BacktestResult,
+    candles,
+    new_candles: int,
+    method: str = 'values'
+) -> int:
+    """
+    Agrega al backtest maestro las señales de la cola recién evaluada
+
+    `result` es el backtest sobre [historia de warm-up + velas nuevas]
+    restringido a las velas posteriores a progress.last_evaluated_time.
+    Inserta las señales a continuación de las existentes y actualiza en
+    el lugar los totales, el win rate, las rachas y el progreso. Retorna
+    la cantidad de señales agregadas.
+    """
+    added = save_master_signals(db, master_run.id, result.trades, method, first_index=master_run.total_signals or 0)
+
+    outcomes = result.trades.data['result']
+    for name, streak, longest in (
+        ('WIN', 'current_win_streak', 'max_consecutive_wins'),
+        ('LOSS', 'current_loss_streak', 'max_consecutive_losses')
+    ):
+        mask = outcomes == RESULT_CODES[name]
+        if not len(mask):
+            continue
+        current = getattr(progress, streak) or 0
+        joined = current + _leading_run(mask)
+        tail_longest = result.max_consecutive_wins if name == 'WIN' else result.max_consecutive_losses
+        setattr(master_run, longest, max(getattr(master_run, longest) or 0, joined, tail_longest))
+        setattr(progress, streak, joined if mask.all() else _trailing_run(mask))
+
+    master_run.total_signals = (master_run.total_signals or 0) + result.total_trades
+    master_run.winning_signals = (master_run.winning_signals or 0) + result.winning_trades
+    master_run.losing_signals = (master_run.losing_signals or 0) + result.losing_trades
+    master_run.draw_signals = (master_run.draw_signals or 0) + result.draw_trades
+    master_run.win_rate = (
+        master_run.winning_signals / master_run.total_signals * 100 if master_run.total_signals else 0.0
+    )
+    master_run.end_time = int(candles.time[-1])
+    master_run.total_candles = (master_run.total_candles or 0) + new_candles
+
+    last_evaluated = _last_evaluated_time(candles, progress.trade_duration)
+    if last_evaluated is not None and last_evaluated > progress.last_evaluated_time:
+        progress.last_evaluated_time = last_evaluated
+
+    # La clave de caché del maestro correspondía a las velas anteriores
+    db.query(BacktestCacheEntry).filter_by(master_run_id=master_run.id).delete(synchronize_session=False)
+
+    return added
@@ -3,11 +3,112 @@ Motor de Backtesting - STC Trading System
 Simula estrategias con datos históricos y calcula métricas de rendimiento
 """
 
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from multiprocessing import shared_memory
+from typing import Callable, Iterator, List, Dict, Optional, Sequence, Tuple, Union
 from datetime import datetime
+import os
 import numpy as np
-from strategy_engine import Strategy, Candle, Trade, Signal
+from strategy_engine import Strategy, Candle, CandleSeries, Trade, Signal, as_candle_series
+from indicators import current_context
+
+
+# Velas de historia que recibe la estrategia en cada punto del backtest
+BACKTEST_LOOKBACK = 200
+
+BACKTEST_MODES = ('loop', 'vectorized')
+
+# Duración en segundos de cada temporalidad (cierre de vela = time + duración)
+TIMEFRAME_SECONDS = {'M1': 60, 'M5': 300, 'M15': 900, 'M30': 1800, 'H1': 3600, 'H4': 14400, 'D1': 86400}
+
+# Cada cuántas velas el loop reporta progreso: callback(procesadas, totales, trades)
+PROGRESS_INTERVAL = 250
+ProgressCallback = Callable[[int, int, int], None]
+
+# Una fila por trade (54 bytes); symbol y strategy_name se guardan una vez por resultado
+TRADE_DTYPE = np.dtype([
+    ('direction', np.int8),
+    ('amount', np.float64),
+    ('duration', np.int32),
+    ('entry_price', np.float64),
+    ('entry_time', np.int64),
+    ('exit_price', np.float64),
+    ('exit_time', np.int64),
+    ('profit', np.float64),
+    ('result', np.int8)
+])
+
+DIRECTION_CODES = {'CALL': 1, 'PUT': -1}
+RESULT_CODES = {'WIN': 1, 'DRAW': 0, 'LOSS': -1}
+_DIRECTION_LABELS = {code: label for label, code in DIRECTION_CODES.items()}
+_RESULT_LABELS = {code: label for label, code in RESULT_CODES.items()}
+
+
+class TradeRecords:
+    """
+    Trades de un backtest guardados en un structured array (TRADE_DTYPE)
+    
+    Se comporta como una lista de solo lectura de Trade: cada fila se
+    materializa como Trade recién al accederla o iterarla, y un slice es
+    una vista sin copia. Las métricas se calculan sobre `data` directamente.
+    """
+    
+    __slots__ = ('data', 'symbol', 'strategy_name', 'offset')
+    
+    def __init__(self, data: Optional[np.ndarray] = None, symbol: str = '', strategy_name: str = '', offset: int = 0):
+        self.data = np.zeros(0, dtype=TRADE_DTYPE) if data is None else data
+        self.symbol = symbol
+        self.strategy_name = strategy_name
+        # Índice de la primera fila en el resultado original (ids bt_N estables en slices)
+        self.offset = offset
+        
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple], symbol: str = '', strategy_name: str = '') -> 'TradeRecords':
+        """Desde tuplas en el orden de TRADE_DTYPE"""
+        return cls(np.array(rows, dtype=TRADE_DTYPE), symbol, strategy_name)
+        
+    @classmethod
+    def concatenate(cls, records: Sequence['TradeRecords']) -> 'TradeRecords':
+        """Une varios conjuntos de trades (los ids se renumeran)"""
+        if not records:
+            return cls()
+        return cls(np.concatenate([r.data for r in records]), records[0].symbol, records[0].strategy_name)
+        
+    def __len__(self) -> int:
+        return len(self.data)
+        
+    def __getitem__(self, index: Union[int, slice]) -> Union[Trade, 'TradeRecords']:
+        if isinstance(index, slice):
+            start = index.indices(len(self.data))[0] if index.step in (None, 1) else 0
+            return TradeRecords(self.data[index], self.symbol, self.strategy_name, self.offset + start)
+        if index < 0:
+            index += len(self.data)
+        return self._trade(index, self.data[index].item())
+        
+    def __iter__(self) -> Iterator[Trade]:
+        for k, row in enumerate(self.data.tolist()):
+            yield self._trade(k, row)
+            
+    def _trade(self, k: int, row: tuple) -> Trade:
+        direction, amount, duration, entry_price, entry_time, exit_price, exit_time, profit, result = row
+        return Trade(
+            id=f"bt_{self.offset + k}",
+            symbol=self.symbol,
+            direction=_DIRECTION_LABELS[direction],
+            amount=amount,
+            duration=duration,
+            entry_price=entry_price,
+            entry_time=entry_time,
+            exit_price=exit_price,
+            exit_time=exit_time,
+            profit=profit,
+            result=_RESULT_LABELS[result],
+            strategy_name=self.strategy_name
+        )
+        
+    def to_dicts(self) -> List[dict]:
+        return [trade.to_dict() for trade in self]
 
 
 @dataclass
@@ -48,8 +149,9 @@ class BacktestResult:
     max_consecutive_wins: int = 0
     max_consecutive_losses: int = 0
     
-    trades: List[Trade] = field(default_factory=list)
-    equity_curve: List[float] = field(default_factory=list)
+    # Columnar: trades en un structured array y equity como array float64
+    trades: TradeRecords = field(default_factory=TradeRecords)
+    equity_curve: np.ndarray = field(default_factory=lambda: np.zeros(0))
     
     def calculate_metrics(self):
         """Calcula todas las métricas de rendimiento"""
@@ -72,23 +174,14 @@ class BacktestResult:
         if len(self.equity_curve) < 2:
             return
             
-        peak = self.equity_curve[0]
-        max_dd = 0
-        max_dd_pct = 0
+        equity = np.asarray(self.equity_curve, dtype=float)
+        peak = np.maximum.accumulate(equity)
+        drawdown = peak - equity
         
-        for equity in self.equity_curve:
-            if equity > peak:
-                peak = equity
-            
-            dd = peak - equity
-            dd_pct = (dd / peak) * 100 if peak > 0 else 0
-            
-            if dd > max_dd:
-                max_dd = dd
-                max_dd_pct = dd_pct
-                
-        self.max_drawdown = max_dd
-        self.max_drawdown_percent = max_dd_pct
+        # Primer máximo: el mismo punto que elegía el recorrido secuencial
+        worst = int(drawdown.argmax())
+        self.max_drawdown = float(drawdown[worst])
+        self.max_drawdown_percent = float(drawdown[worst] / peak[worst] * 100) if peak[worst] > 0 else 0
         
     def _calculate_sharpe_ratio(self, risk_free_rate: float = 0.0):
         """Calcula el Sharpe Ratio"""
@@ -96,7 +189,8 @@ class BacktestResult:
             self.sharpe_ratio = 0.0
             return
             
-        returns = np.diff(self.equity_curve) / self.equity_curve[:-1]
+        equity = np.asarray(self.equity_curve, dtype=float)
+        returns = np.diff(equity) / equity[:-1]
         
         if len(returns) == 0 or np.std(returns) == 0:
             self.sharpe_ratio = 0.0
@@ -137,6 +231,46 @@ class BacktestResult:
         }
 
 
+class TimestampIndex:
+    """
+    Índice O(1) timestamp -> vela de una serie de intervalo fijo (por ejemplo M1)
+    
+    Las velas se ubican en una tabla de slots (time - origen) / intervalo,
+    así cada consulta es una resta y una división en lugar de una búsqueda.
+    Se permiten huecos (velas faltantes): su slot queda en -1.
+    """
+    
+    def __init__(self, candles: Union[List[Candle], CandleSeries], interval: Optional[int] = None):
+        self.candles = as_candle_series(candles)
+        times = self.candles.time.astype(np.int64)
+        if interval is None:
+            interval = int(np.diff(times).min()) if len(times) > 1 else 60
+        self.interval = interval
+        self.origin = int(times[0]) if len(times) else 0
+        
+        offsets = times - self.origin
+        if np.any(np.diff(times) <= 0) or np.any(offsets % interval):
+            raise ValueError(f"Las velas deben estar ordenadas y alineadas a {interval}s")
+        
+        self.slots = np.full(int(offsets[-1] // interval) + 1 if len(times) else 0, -1, dtype=np.int64)
+        self.slots[offsets // interval] = np.arange(len(times))
+    
+    def positions(self, timestamps: np.ndarray) -> np.ndarray:
+        """Posición de la vela que abre en cada timestamp (-1 si no existe)"""
+        offsets = np.asarray(timestamps, dtype=np.int64) - self.origin
+        slot = offsets // self.interval
+        found = (offsets >= 0) & (offsets % self.interval == 0) & (slot < len(self.slots))
+        positions = np.full(offsets.shape, -1, dtype=np.int64)
+        positions[found] = self.slots[slot[found]]
+        return positions
+    
+    def close_at(self, timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Precio al instante de cada timestamp: cierre de la vela que termina ahí (y máscara de encontrados)"""
+        positions = self.positions(np.asarray(timestamps, dtype=np.int64) - self.interval)
+        found = positions >= 0
+        return np.where(found, self.candles.close[np.maximum(positions, 0)], np.nan), found
+
+
 class BacktestingEngine:
     """Motor de backtesting para probar estrategias con datos históricos"""
     
@@ -144,14 +278,20 @@ class BacktestingEngine:
         self.initial_balance = initial_balance
         self.trade_amount = trade_amount
         self.payout_percent = payout_percent
+        self.lookback = BACKTEST_LOOKBACK
         
     def run_backtest(
         self, 
         strategy: Strategy, 
         symbol: str, 
         timeframe: str, 
-        candles: List[Candle],
-        trade_duration: int = 5
+        candles: Union[List[Candle], CandleSeries],
+        trade_duration: int = 5,
+        mode: str = 'loop',
+        start: int = 0,
+        end: Optional[int] = None,
+        progress: Optional[ProgressCallback] = None,
+        expiry_candles: Optional[Union[List[Candle], CandleSeries, TimestampIndex]] = None
     ) -> BacktestResult:
         """
         Ejecuta un backtest completo de una estrategia
@@ -160,41 +300,108 @@ class BacktestingEngine:
             strategy: La estrategia a probar
             symbol: Par de trading
             timeframe: Temporalidad (M1, M5, etc.)
-            candles: Datos históricos de velas
+            candles: Datos históricos de velas (List[Candle] o CandleSeries; las
+                     listas se convierten una vez a CandleSeries y cada ventana
+                     es un slice sin copias)
             trade_duration: Duración de cada trade en minutos
+            mode: 'loop' (analiza vela por vela) o 'vectorized' (usa
+                  strategy.analyze_series y resuelve los trades con arrays;
+                  si la estrategia no lo soporta se usa el loop)
+            start, end: rango de velas [start, end) donde se abren y cierran
+                  trades (por defecto todo el historial). Las ventanas de la
+                  estrategia siguen viendo la historia previa a start.
+            progress: callback(velas procesadas, velas totales, trades) que se
+                  llama cada PROGRESS_INTERVAL velas y al terminar. Si lanza
+                  una excepción el backtest se interrumpe (cancelación).
+                  En modo vectorizado analyze_series es una sola llamada sin
+                  reportes: el callback se llama al empezar, con la serie
+                  calculada y al terminar, así que una cancelación pedida
+                  mientras se calcula la serie se aplica cuando termina.
+            expiry_candles: serie de menor temporalidad (M1) alineada con
+                  `candles`, o su TimestampIndex para reutilizarlo entre
+                  corridas. Con ella la entrada es el precio al cierre de la
+                  vela de la señal y la salida el precio exacto al vencimiento
+                  (trade_duration en minutos desde la entrada), resueltos por
+                  timestamp en la serie M1. Los trades cuyo vencimiento no
+                  está en la serie o cae después del rango se descartan.
             
         Returns:
             BacktestResult con todas las métricas calculadas
         """
+        if mode not in BACKTEST_MODES:
+            raise ValueError(f"Modo de backtest inválido: {mode}. Válidos: {BACKTEST_MODES}")
+        
+        candles = as_candle_series(candles)
+        end = len(candles) if end is None else min(end, len(candles))
+        
+        first = max(strategy.min_candles, start)
+        if expiry_candles is None:
+            quotes = None
+            last = end - trade_duration
+        else:
+            # Con vencimientos en M1 cualquier vela del rango puede abrir un trade
+            last = end
+            quotes = self._expiry_quotes(candles, timeframe, trade_duration, expiry_candles, first, last)
+        total_bars = max(0, last - first)
+        if progress is not None:
+            progress(0, total_bars, 0)
+        
+        if mode == 'vectorized':
+            # Con un IndicatorContext activo la serie se calcula una vez por
+            # estrategia/parámetros sobre todo el historial y se reutiliza
+            # en cada rango (folds de walk-forward, rondas del optimizador)
+            series = current_context().cached(
+                candles, 'analyze_series',
+                (type(strategy).__name__, repr(sorted(strategy.params.items())), self.lookback),
+                lambda: strategy.analyze_series(candles, self.lookback)
+            )
+            if series is not None:
+                if progress is not None:
+                    progress(0, total_bars, 0)
+                result = self._run_vectorized(strategy, symbol, timeframe, candles, trade_duration, series, start, end, quotes)
+                if progress is not None:
+                    progress(total_bars, total_bars, result.total_trades)
+                return result
+        
         result = BacktestResult(
             strategy_name=strategy.name,
             symbol=symbol,
             timeframe=timeframe,
-            start_time=candles[0].time,
-            end_time=candles[-1].time,
+            start_time=candles[start].time,
+            end_time=candles[end - 1].time,
             initial_balance=self.initial_balance,
             final_balance=self.initial_balance
         )
         
         current_balance = self.initial_balance
-        result.equity_curve.append(current_balance)
+        equity_curve = [current_balance]
+        trades = []
         
         consecutive_wins = 0
         consecutive_losses = 0
         
-        min_candles = strategy.min_candles
-        
-        for i in range(min_candles, len(candles) - trade_duration):
-            window = candles[max(0, i - 200):i + 1]
+        for i in range(first, last):
+            if progress is not None and i > first and (i - first) % PROGRESS_INTERVAL == 0:
+                progress(i - first, total_bars, result.total_trades)
+            
+            if quotes is not None and not quotes['valid'][i - first]:
+                continue
+            
+            window = candles[max(0, i - self.lookback):i + 1]
             
             signal = strategy.analyze(symbol, timeframe, window)
             
             if signal and signal.confidence >= 0.7:
-                entry_candle = candles[i]
-                exit_candle = candles[i + trade_duration]
-                
-                entry_price = entry_candle.close
-                exit_price = exit_candle.close
+                if quotes is None:
+                    entry_candle = candles[i]
+                    exit_candle = candles[i + trade_duration]
+                    
+                    entry_price, entry_time = entry_candle.close, entry_candle.time
+                    exit_price, exit_time = exit_candle.close, exit_candle.time
+                else:
+                    k = i - first
+                    entry_price, entry_time = float(quotes['entry_price'][k]), int(quotes['entry_time'][k])
+                    exit_price, exit_time = float(quotes['exit_price'][k]), int(quotes['exit_time'][k])
                 
                 price_change = exit_price - entry_price
                 
@@ -241,49 +448,283 @@ class BacktestingEngine:
                         result.largest_loss = profit
                 
                 current_balance += profit
-                result.equity_curve.append(current_balance)
+                equity_curve.append(current_balance)
                 
-                trade = Trade(
-                    id=f"bt_{result.total_trades}",
-                    symbol=symbol,
-                    direction=signal.direction,
-                    amount=self.trade_amount,
-                    duration=trade_duration,
-                    entry_price=entry_price,
-                    entry_time=entry_candle.time,
-                    exit_price=exit_price,
-                    exit_time=exit_candle.time,
-                    profit=profit,
-                    result=trade_result,
-                    strategy_name=strategy.name
-                )
-                
-                result.trades.append(trade)
+                trades.append((
+                    DIRECTION_CODES[signal.direction],
+                    self.trade_amount,
+                    trade_duration,
+                    entry_price,
+                    entry_time,
+                    exit_price,
+                    exit_time,
+                    profit,
+                    RESULT_CODES[trade_result]
+                ))
                 result.total_trades += 1
                 result.total_profit += profit
         
+        if progress is not None:
+            progress(total_bars, total_bars, result.total_trades)
+        
         result.final_balance = current_balance
+        result.equity_curve = np.array(equity_curve)
+        result.trades = TradeRecords.from_rows(trades, symbol, strategy.name)
         result.calculate_metrics()
         
         return result
     
+    def _run_vectorized(
+        self,
+        strategy: Strategy,
+        symbol: str,
+        timeframe: str,
+        candles: CandleSeries,
+        trade_duration: int,
+        series: Dict[str, np.ndarray],
+        start: int = 0,
+        end: Optional[int] = None,
+        quotes: Optional[Dict[str, np.ndarray]] = None
+    ) -> BacktestResult:
+        """
+        Resuelve entradas y salidas con operaciones de arrays a partir de las
+        señales por vela de strategy.analyze_series.
+        
+        Las sumas se acumulan en el mismo orden que el loop para que las
+        métricas sean idénticas a las de mode='loop'.
+        """
+        end = len(candles) if end is None else end
+        result = BacktestResult(
+            strategy_name=strategy.name,
+            symbol=symbol,
+            timeframe=timeframe,
+            start_time=candles[start].time,
+            end_time=candles[end - 1].time,
+            initial_balance=self.initial_balance,
+            final_balance=self.initial_balance
+        )
+        
+        closes = candles.close
+        direction = np.asarray(series['direction'])
+        confidence = np.asarray(series['confidence'])
+        
+        first = max(strategy.min_candles, start)
+        if quotes is None:
+            bars = np.arange(first, max(first, end - trade_duration))
+            bars = bars[(direction[bars] != 0) & (confidence[bars] >= 0.7)]
+            
+            entry_prices = closes[bars]
+            exit_prices = closes[bars + trade_duration]
+            entry_times = candles.time[bars]
+            exit_times = candles.time[bars + trade_duration]
+        else:
+            bars = np.arange(first, max(first, end))
+            keep = quotes['valid'] & (direction[bars] != 0) & (confidence[bars] >= 0.7)
+            bars = bars[keep]
+            
+            entry_prices = quotes['entry_price'][keep]
+            exit_prices = quotes['exit_price'][keep]
+            entry_times = quotes['entry_time'][keep]
+            exit_times = quotes['exit_time'][keep]
+        
+        price_change = exit_prices - entry_prices
+        is_call = direction[bars] > 0
+        
+        wins = np.where(is_call, price_change > 0, price_change < 0)
+        draws = ~wins & (np.abs(price_change) < 0.00001)
+        losses = ~wins & ~draws
+        
+        win_profit = self.trade_amount * (self.payout_percent / 100)
+        profits = np.where(wins, win_profit, np.where(draws, 0.0, -self.trade_amount))
+        
+        result.equity_curve = np.add.accumulate(np.concatenate(([self.initial_balance], profits)))
+        result.final_balance = float(result.equity_curve[-1])
+        
+        result.total_trades = len(bars)
+        result.winning_trades = int(wins.sum())
+        result.losing_trades = int(losses.sum())
+        result.draw_trades = int(draws.sum())
+        result.total_profit = _sequential_sum(profits)
+        result.gross_profit = _sequential_sum(profits[wins])
+        result.gross_loss = _sequential_sum(profits[losses])
+        
+        if result.winning_trades:
+            result.largest_win = max(0.0, win_profit)
+        if result.losing_trades and self.trade_amount != 0:
+            result.largest_loss = -self.trade_amount
+        
+        result.max_consecutive_wins = _max_run(wins)
+        result.max_consecutive_losses = _max_run(losses)
+        
+        trades = np.zeros(len(bars), dtype=TRADE_DTYPE)
+        trades['direction'] = np.where(is_call, DIRECTION_CODES['CALL'], DIRECTION_CODES['PUT'])
+        trades['amount'] = self.trade_amount
+        trades['duration'] = trade_duration
+        trades['entry_price'] = entry_prices
+        trades['entry_time'] = entry_times
+        trades['exit_price'] = exit_prices
+        trades['exit_time'] = exit_times
+        trades['profit'] = profits
+        trades['result'] = np.where(wins, RESULT_CODES['WIN'], np.where(draws, RESULT_CODES['DRAW'], RESULT_CODES['LOSS']))
+        result.trades = TradeRecords(trades, symbol, strategy.name)
+        
+        result.calculate_metrics()
+        
+        return result
+    
+    def _expiry_quotes(
+        self,
+        candles: CandleSeries,
+        timeframe: str,
+        trade_duration: int,
+        expiry_candles: Union[List[Candle], CandleSeries, TimestampIndex],
+        first: int,
+        last: int
+    ) -> Dict[str, np.ndarray]:
+        """
+        Precios de entrada y vencimiento de las velas [first, last) resueltos en la serie M1
+        
+        La entrada es al cierre de la vela de la señal (si falta en M1 se usa
+        el cierre de la propia vela); la salida, trade_duration minutos
+        después. 'valid' marca las velas cuyo vencimiento existe en M1 y no
+        pasa del cierre de la última vela del rango.
+        """
+        index = expiry_candles if isinstance(expiry_candles, TimestampIndex) else TimestampIndex(expiry_candles, 60)
+        
+        times = candles.time.astype(np.int64)
+        if timeframe in TIMEFRAME_SECONDS:
+            bar_seconds = TIMEFRAME_SECONDS[timeframe]
+        else:
+            bar_seconds = int(np.diff(times).min()) if len(times) > 1 else 60
+        
+        bars = np.arange(first, max(first, last))
+        entry_times = times[bars] + bar_seconds
+        exit_times = entry_times + trade_duration * 60
+        
+        entry_prices, entry_found = index.close_at(entry_times)
+        entry_prices = np.where(entry_found, entry_prices, candles.close[bars])
+        exit_prices, exit_found = index.close_at(exit_times)
+        
+        range_close = times[last - 1] + bar_seconds if last > 0 else 0
+        
+        return {
+            'entry_time': entry_times,
+            'entry_price': entry_prices,
+            'exit_time': exit_times,
+            'exit_price': exit_prices,
+            'valid': exit_found & (exit_times <= range_close)
+        }
+    
     def compare_strategies(
         self, 
         strategies: List[Strategy], 
         symbol: str, 
         timeframe: str, 
-        candles: List[Candle]
+        candles: Union[List[Candle], CandleSeries],
+        mode: str = 'loop',
+        workers: int = 1
     ) -> List[BacktestResult]:
-        """Compara múltiples estrategias con los mismos datos"""
-        results = []
+        """
+        Compara múltiples estrategias con los mismos datos
         
-        for strategy in strategies:
-            result = self.run_backtest(strategy, symbol, timeframe, candles)
-            results.append(result)
+        Args:
+            workers: procesos a usar (1 = serial, 0 = uno por CPU). Con más de
+                     un proceso las estrategias se reparten en un pool y las
+                     velas se pasan por memoria compartida, sin serializarlas
+                     por tarea. Los resultados y su orden son idénticos a la
+                     ejecución serial.
+        """
+        candles = as_candle_series(candles)
+        
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(strategies))
+        
+        if workers > 1:
+            results = self._compare_parallel(strategies, symbol, timeframe, candles, mode, workers)
+        else:
+            results = [
+                self.run_backtest(strategy, symbol, timeframe, candles, mode=mode)
+                for strategy in strategies
+            ]
             
         results.sort(key=lambda x: x.final_balance, reverse=True)
         
         return results
+    
+    def _compare_parallel(
+        self,
+        strategies: List[Strategy],
+        symbol: str,
+        timeframe: str,
+        candles: CandleSeries,
+        mode: str,
+        workers: int
+    ) -> List[BacktestResult]:
+        """Corre un backtest por estrategia en un pool de procesos (resultados en el orden de entrada)"""
+        shm = _share_candles(candles)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_attach_candles,
+                initargs=(shm.name, len(candles))
+            ) as pool:
+                futures = [
+                    pool.submit(_backtest_worker, self, strategy, symbol, timeframe, mode)
+                    for strategy in strategies
+                ]
+                return [future.result() for future in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+# Velas adjuntadas desde memoria compartida en cada proceso del pool
+_worker_candles: Dict[str, object] = {}
+
+
+def _share_candles(candles: CandleSeries) -> shared_memory.SharedMemory:
+    """Copia las columnas de la serie a un bloque de memoria compartida (8 bytes por valor)"""
+    n = len(candles)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(CandleSeries.FIELDS) * n * 8))
+    for column, name in zip(_shared_columns(shm, n), CandleSeries.FIELDS):
+        column[:] = getattr(candles, name)
+    return shm
+
+
+def _shared_columns(shm: shared_memory.SharedMemory, n: int) -> List[np.ndarray]:
+    """Vistas NumPy sobre el bloque compartido, una por columna de CandleSeries"""
+    return [
+        np.ndarray((n,), dtype=np.int64 if name == 'time' else np.float64, buffer=shm.buf, offset=k * n * 8)
+        for k, name in enumerate(CandleSeries.FIELDS)
+    ]
+
+
+def _attach_candles(shm_name: str, n: int):
+    """Inicializador del pool: arma la CandleSeries sobre la memoria compartida (sin copiar)"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_candles['shm'] = shm
+    _worker_candles['candles'] = CandleSeries(*_shared_columns(shm, n))
+
+
+def _backtest_worker(engine: 'BacktestingEngine', strategy: Strategy, symbol: str, timeframe: str, mode: str) -> BacktestResult:
+    return engine.run_backtest(strategy, symbol, timeframe, _worker_candles['candles'], mode=mode)
+
+
+def _sequential_sum(values: np.ndarray) -> float:
+    """Suma de izquierda a derecha partiendo de 0.0 (mismo redondeo que acumular con +=)"""
+    if len(values) == 0:
+        return 0.0
+    return float(np.add.accumulate(np.concatenate(([0.0], values)))[-1])
+
+
+def _max_run(mask: np.ndarray) -> int:
+    """Longitud de la racha más larga de valores True consecutivos"""
+    if not mask.any():
+        return 0
+    padded = np.concatenate(([0], mask.astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+    return int((edges[1::2] - edges[::2]).max())
 
 
 if __name__ == '__main__':
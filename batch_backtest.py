@@ -0,0 +1,366 @@
+"""
+Backtest por lotes - STC Trading System
+Evalúa un set de estrategias sobre muchos pares (símbolo, timeframe) y arma
+una matriz resumen (win rate, profit factor, drawdown, ... por celda)
+
+Las velas de todos los pares se leen con una sola consulta ordenada por
+par y timestamp (cursor del lado del servidor, por bloques): cada par se
+entrega apenas se completan sus filas, así la carga y el cálculo se
+solapan. Con workers > 1 cada celda (estrategia x par) es una tarea de un
+pool de procesos y las velas de cada par viajan por memoria compartida,
+una vez por par y no por celda.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import os
+import time
+
+from strategy_engine import Strategy, CandleSeries
+from backtesting_engine import (
+    BacktestingEngine, BACKTEST_MODES, ProgressCallback, _share_candles, _shared_columns
+)
+
+
+# Métricas de BacktestResult.to_dict() que se guardan por celda
+SUMMARY_METRICS = (
+    'total_trades', 'win_rate', 'profit_factor', 'net_profit',
+    'max_drawdown', 'max_drawdown_percent', 'sharpe_ratio'
+)
+
+DEFAULT_CANDLE_LIMIT = 10000
+FETCH_CHUNK_SIZE = 20000
+
+Pair = Tuple[str, str]
+
+
+def pair_label(pair: Pair) -> str:
+    return f'{pair[0]} {pair[1]}'
+
+
+@dataclass
+class BatchCell:
+    """Resultado de una estrategia sobre un par"""
+    strategy_name: str
+    symbol: str
+    timeframe: str
+    candles: int = 0
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            'strategy_name': self.strategy_name,
+            'symbol': self.symbol,
+            'timeframe': self.timeframe,
+            'candles': self.candles,
+            **self.metrics,
+            'error': self.error
+        }
+
+
+@dataclass
+class BatchResult:
+    """Celdas estrategia x par y tiempos de la corrida"""
+    strategies: List[str]
+    pairs: List[Pair]
+    cells: List[BatchCell] = field(default_factory=list)
+    load_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+    def matrix(self, metric: str) -> Dict[str, Dict[str, Any]]:
+        """{estrategia: {'SIMBOLO TF': valor}} (None si la celda no tiene resultado)"""
+        table = {name: {pair_label(pair): None for pair in self.pairs} for name in self.strategies}
+        for cell in self.cells:
+            table[cell.strategy_name][pair_label((cell.symbol, cell.timeframe))] = cell.metrics.get(metric)
+        return table
+
+    def to_dict(self) -> dict:
+        return {
+            'strategies': self.strategies,
+            'pairs': [pair_label(pair) for pair in self.pairs],
+            'cells': [cell.to_dict() for cell in self.cells],
+            'matrix': {metric: self.matrix(metric) for metric in SUMMARY_METRICS},
+            'load_seconds': round(self.load_seconds, 3),
+            'elapsed_seconds': round(self.elapsed_seconds, 3)
+        }
+
+
+def catalogue_pairs(db, timeframes: Sequence[str]) -> List[Pair]:
+    """Pares activos de TradingPair (en su orden de visualización) por cada timeframe"""
+    from database import TradingPair
+
+    symbols = [
+        pair.symbol for pair in db.query(TradingPair).filter_by(is_active=True)
+        .order_by(TradingPair.display_order, TradingPair.symbol)
+    ]
+    return [(symbol, timeframe) for symbol in symbols for timeframe in timeframes]
+
+
+def stream_candle_sets(
+    db,
+    pairs: Sequence[Pair],
+    limit: int = DEFAULT_CANDLE_LIMIT,
+    chunk_size: int = FETCH_CHUNK_SIZE
+) -> Iterator[Tuple[str, str, CandleSeries]]:
+    """
+    Velas de todos los pares en una sola consulta
+
+    Toma las primeras `limit` velas de cada par (mismo criterio que el
+    backtest de un símbolo) y lee el resultado por bloques de chunk_size
+    filas: cada (symbol, timeframe, CandleSeries) se entrega apenas llega
+    la primera fila del par siguiente. Los pares sin velas no se entregan.
+    """
+    from sqlalchemy import text
+
+    if not pairs:
+        return
+
+    params: Dict[str, Any] = {'limit': limit}
+    values = []
+    for k, (symbol, timeframe) in enumerate(pairs):
+        params[f'symbol_{k}'] = symbol
+        params[f'timeframe_{k}'] = timeframe
+        values.append(f'(:symbol_{k}, :timeframe_{k})')
+
+    query = text(f"""
+        SELECT symbol, timeframe, timestamp, open, high, low, close, volume
+        FROM (
+            SELECT symbol, timeframe, timestamp, open, high, low, close, volume,
+                   ROW_NUMBER() OVER (PARTITION BY symbol, timeframe ORDER BY timestamp ASC) AS rn
+            FROM candles
+            WHERE (symbol, timeframe) IN ({', '.join(values)})
+        ) ranked
+        WHERE rn <= :limit
+        ORDER BY symbol, timeframe, timestamp ASC
+    """).execution_options(stream_results=True)
+
+    result = db.execute(query, params)
+
+    key = None
+    rows: List[tuple] = []
+    while True:
+        chunk = result.fetchmany(chunk_size)
+        if not chunk:
+            break
+        for row in chunk:
+            row = tuple(row)
+            if row[:2] != key:
+                if rows:
+                    yield key[0], key[1], CandleSeries.from_rows(rows)
+                key, rows = row[:2], []
+            rows.append(row[2:])
+
+    if rows:
+        yield key[0], key[1], CandleSeries.from_rows(rows)
+
+
+class BatchBacktester:
+    """Corre cada estrategia sobre cada par y resume las métricas por celda"""
+
+    def __init__(
+        self,
+        initial_balance: float = 1000.0,
+        trade_amount: float = 1.0,
+        payout_percent: float = 85.0,
+        trade_duration: int = 5,
+        mode: str = 'vectorized',
+        workers: int = 1
+    ):
+        """
+        Args:
+            mode: modo del backtest ('vectorized' usa analyze_series si la estrategia lo soporta)
+            workers: procesos a usar (1 = serial, 0 = uno por CPU)
+        """
+        if mode not in BACKTEST_MODES:
+            raise ValueError(f"Modo de backtest inválido: {mode}. Válidos: {BACKTEST_MODES}")
+
+        self.engine = BacktestingEngine(
+            initial_balance=initial_balance,
+            trade_amount=trade_amount,
+            payout_percent=payout_percent
+        )
+        self.trade_duration = trade_duration
+        self.mode = mode
+        self.workers = (os.cpu_count() or 1) if workers == 0 else workers
+
+    def run(
+        self,
+        strategies: Sequence[Strategy],
+        pairs: Sequence[Pair],
+        candle_sets: Iterable[Tuple[str, str, CandleSeries]],
+        progress: Optional[ProgressCallback] = None
+    ) -> BatchResult:
+        """
+        Ejecuta el producto cartesiano estrategias x pares
+
+        Args:
+            pairs: pares pedidos (definen el orden de la matriz; los que no
+                   lleguen en candle_sets quedan como celdas con error)
+            candle_sets: (symbol, timeframe, velas) a medida que se cargan,
+                   por ejemplo stream_candle_sets(db, pairs)
+            progress: callback(celdas terminadas, celdas totales, trades);
+                   si lanza una excepción la corrida se interrumpe
+        """
+        started = time.perf_counter()
+        strategies = list(strategies)
+        pairs = [tuple(pair) for pair in pairs]
+        result = BatchResult(strategies=[s.name for s in strategies], pairs=pairs)
+
+        cells: Dict[Tuple[int, Pair], BatchCell] = {}
+        counters = {'done': 0, 'trades': 0, 'total': len(strategies) * len(pairs)}
+
+        def record(k: int, cell: BatchCell):
+            cells[(k, (cell.symbol, cell.timeframe))] = cell
+            counters['done'] += 1
+            counters['trades'] += cell.metrics.get('total_trades', 0)
+            if progress is not None:
+                progress(counters['done'], counters['total'], counters['trades'])
+
+        if progress is not None:
+            progress(0, counters['total'], 0)
+
+        loaded = _timed(candle_sets)
+        workers = min(self.workers, counters['total'])
+
+        if workers <= 1:
+            for symbol, timeframe, candles in loaded:
+                for k, strategy in enumerate(strategies):
+                    record(k, _run_cell(self.engine, strategy, symbol, timeframe, candles, self.trade_duration, self.mode))
+        else:
+            self._run_parallel(strategies, loaded, workers, record)
+
+        # Pares pedidos sin velas en la base de datos
+        for k, strategy in enumerate(strategies):
+            for pair in pairs:
+                if (k, pair) not in cells:
+                    record(k, BatchCell(strategy.name, pair[0], pair[1], error='Sin velas'))
+
+        result.cells = [cells[(k, pair)] for k in range(len(strategies)) for pair in pairs if (k, pair) in cells]
+        result.load_seconds = loaded.seconds
+        result.elapsed_seconds = time.perf_counter() - started
+
+        print(
+            f"🧮 Backtest por lotes: {len(strategies)} estrategias x {len(pairs)} pares "
+            f"en {result.elapsed_seconds:.2f}s (carga {result.load_seconds:.2f}s, workers={workers})"
+        )
+        return result
+
+    def _run_parallel(self, strategies: List[Strategy], loaded: '_timed', workers: int, record):
+        """Reparte las celdas en un pool mientras se siguen cargando pares"""
+        pool = ProcessPoolExecutor(max_workers=workers)
+        pending: Dict[Future, Tuple[int, Pair]] = {}
+        blocks: Dict[Pair, List] = {}
+
+        def collect(futures):
+            for future in futures:
+                k, pair = pending.pop(future)
+                record(k, future.result())
+                block = blocks[pair]
+                block[1] -= 1
+                if block[1] == 0:
+                    # Todas las estrategias del par terminaron: liberar sus velas
+                    _release(blocks.pop(pair)[0])
+
+        try:
+            for symbol, timeframe, candles in loaded:
+                pair = (symbol, timeframe)
+                if len(candles) <= self.trade_duration:
+                    for k, strategy in enumerate(strategies):
+                        record(k, _run_cell(self.engine, strategy, symbol, timeframe, candles, self.trade_duration, self.mode))
+                    continue
+
+                shm = _share_candles(candles)
+                blocks[pair] = [shm, len(strategies)]
+                for k, strategy in enumerate(strategies):
+                    future = pool.submit(
+                        _cell_worker, self.engine, strategy, symbol, timeframe,
+                        shm.name, len(candles), self.trade_duration, self.mode
+                    )
+                    pending[future] = (k, pair)
+
+                # Lo que ya terminó se registra antes de esperar el próximo par
+                collect([future for future in list(pending) if future.done()])
+
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                collect(done)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            for shm, _ in blocks.values():
+                _release(shm)
+
+
+class _timed:
+    """Iterador que acumula el tiempo esperando al iterable de origen (carga de velas)"""
+
+    def __init__(self, iterable: Iterable):
+        self.iterator = iter(iterable)
+        self.seconds = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            return next(self.iterator)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+def _run_cell(
+    engine: BacktestingEngine,
+    strategy: Strategy,
+    symbol: str,
+    timeframe: str,
+    candles: CandleSeries,
+    trade_duration: int,
+    mode: str
+) -> BatchCell:
+    """Backtest de una celda; los errores quedan en la celda sin cortar el lote"""
+    cell = BatchCell(strategy.name, symbol, timeframe, candles=len(candles))
+
+    if len(candles) <= max(strategy.min_candles, trade_duration):
+        cell.error = f'Velas insuficientes: {len(candles)}'
+        return cell
+
+    try:
+        summary = engine.run_backtest(strategy, symbol, timeframe, candles, trade_duration, mode).to_dict()
+        cell.metrics = {metric: summary[metric] for metric in SUMMARY_METRICS}
+    except Exception as e:
+        cell.error = str(e)
+    return cell
+
+
+def _cell_worker(
+    engine: BacktestingEngine,
+    strategy: Strategy,
+    symbol: str,
+    timeframe: str,
+    shm_name: str,
+    n: int,
+    trade_duration: int,
+    mode: str
+) -> BatchCell:
+    """Tarea del pool: una celda sobre las velas del par en memoria compartida"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        candles = CandleSeries(*_shared_columns(shm, n))
+        cell = _run_cell(engine, strategy, symbol, timeframe, candles, trade_duration, mode)
+        del candles
+        return cell
+    finally:
+        shm.close()
+
+
+def _release(shm: shared_memory.SharedMemory):
+    shm.close()
+    shm.unlink()
+
+
+if __name__ == '__main__':
+    print("🧮 Batch Backtester - STC Trading System")
+    print("Matriz de métricas estrategia x par con carga y cálculo solapados")
@@ -0,0 +1,25 @@
+"""
+Benchmarks de estrategias e indicadores - STC Trading System
+Velas sintéticas deterministas, micro-benchmarks con salida JSON y
+comparación contra un baseline guardado.
+
+Uso:
+    python -m benchmarks --sizes 1000 10000 --output bench.json
+    python -m benchmarks --baseline bench.json
+"""
+
+from .synthetic import random_walk, regime_switching, synthetic_candles, GENERATORS
+from .suite import run_suite, compare, measure, SIZES, STRATEGY_OPERATIONS, REGRESSION_THRESHOLD
+
+__all__ = [
+    'random_walk',
+    'regime_switching',
+    'synthetic_candles',
+    'GENERATORS',
+    'run_suite',
+    'compare',
+    'measure',
+    'SIZES',
+    'STRATEGY_OPERATIONS',
+    'REGRESSION_THRESHOLD'
+]
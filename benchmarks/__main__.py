@@ -0,0 +1,74 @@
+"""
+Línea de comandos de la suite de benchmarks
+
+El JSON de resultados va a stdout (o a --output) y los mensajes a stderr.
+Sale con código 1 si hay regresiones respecto al baseline.
+"""
+
+import argparse
+import json
+import sys
+
+from .suite import run_suite, compare, SIZES, STRATEGY_OPERATIONS, REGRESSION_THRESHOLD
+from .synthetic import GENERATORS
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmarks de estrategias e indicadores')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='cantidades de velas')
+    parser.add_argument('--generators', nargs='+', default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument('--strategies', nargs='+', help='clases de estrategia a medir (por defecto todas)')
+    parser.add_argument('--operations', nargs='+', default=list(STRATEGY_OPERATIONS), choices=list(STRATEGY_OPERATIONS))
+    parser.add_argument('--no-indicators', action='store_true', help='omitir los kernels de indicators')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-time', type=float, default=0.2, help='segundos acumulados por caso')
+    parser.add_argument('--max-calls', type=int, default=50, help='llamadas máximas por caso')
+    parser.add_argument('--output', help='archivo JSON donde guardar los resultados')
+    parser.add_argument('--baseline', help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help='ratio actual/baseline que cuenta como regresión')
+    args = parser.parse_args(argv)
+
+    results = run_suite(
+        sizes=args.sizes,
+        generators=args.generators,
+        strategies=args.strategies,
+        operations=args.operations,
+        indicators=not args.no_indicators,
+        seed=args.seed,
+        min_time=args.min_time,
+        max_calls=args.max_calls
+    )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Resultados guardados en {args.output}", file=sys.stderr)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    rows = compare(results, baseline, args.threshold)
+    regressions = [row for row in rows if row['regression']]
+    for row in regressions:
+        print(
+            f"❌ {row['target']}.{row['operation']} {row['generator']} n={row['size']}: "
+            f"{row['baseline'] * 1000:.3f}ms -> {row['current'] * 1000:.3f}ms (x{row['ratio']})",
+            file=sys.stderr
+        )
+
+    if regressions:
+        print(f"❌ {len(regressions)} regresiones de {len(rows)} casos comparados (umbral x{args.threshold})", file=sys.stderr)
+        return 1
+
+    print(f"✅ Sin regresiones en {len(rows)} casos comparados (umbral x{args.threshold})", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
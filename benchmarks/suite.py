@@ -0,0 +1,204 @@
+"""
+Micro-benchmarks de estrategias e indicadores
+
+Por estrategia, generador y tamaño mide:
+- calculate_indicators sobre toda la serie
+- generate_signal con los indicadores ya calculados
+- analyze completo (indicadores + señal)
+- run_backtest (modo vectorizado; las estrategias sin analyze_series
+  caen al loop y se omiten por encima de LOOP_BACKTEST_MAX_SIZE velas)
+
+y los kernels del paquete indicators sobre los cierres. Cada operación se
+repite hasta acumular min_time segundos (o max_calls llamadas) y se
+reporta el mejor tiempo, la mediana y la media por llamada.
+
+Los resultados son JSON; compare() los contrasta con una corrida guardada
+(baseline) y marca como regresión lo que supere el umbral.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from contextlib import redirect_stdout
+from datetime import datetime
+import io
+import platform
+import statistics
+import sys
+import time
+import numpy as np
+
+from strategy_engine import Strategy, CandleSeries
+from backtesting_engine import BacktestingEngine
+from indicators import (
+    sma, ema, rsi, rsi_windows, macd, bollinger_bands, lz76_complexity, candle_features
+)
+from strategies import (
+    RSIStrategy, MACDStrategy, BollingerStrategy, ProbabilityGaleStrategy,
+    KolmogorovMarkovStrategy, KolmogorovComplexityStrategy, SmartTradeAcademyStrategy,
+    TableroBinariasStrategy, TendencialTradeStrategy
+)
+from .synthetic import GENERATORS, synthetic_candles
+
+
+SIZES = (1_000, 10_000, 100_000)
+
+STRATEGY_OPERATIONS = ('calculate_indicators', 'generate_signal', 'analyze', 'run_backtest')
+
+# El loop del backtest es O(velas x ventana): por encima de este tamaño solo se mide el modo vectorizado
+LOOP_BACKTEST_MAX_SIZE = 10_000
+
+# Umbral por defecto de compare(): más de 25% más lento que el baseline es regresión
+REGRESSION_THRESHOLD = 1.25
+
+STRATEGY_CLASSES = (
+    RSIStrategy, MACDStrategy, BollingerStrategy, ProbabilityGaleStrategy,
+    KolmogorovMarkovStrategy, KolmogorovComplexityStrategy, SmartTradeAcademyStrategy,
+    TableroBinariasStrategy, TendencialTradeStrategy
+)
+
+# Cada entrada arma (fuera de la medición) la llamada a cronometrar sobre la serie
+INDICATOR_KERNELS: Dict[str, Callable[[CandleSeries], Callable[[], Any]]] = {
+    'sma_20': lambda c: lambda: sma(c.close, 20),
+    'ema_50': lambda c: lambda: ema(c.close, 50),
+    'rsi_14': lambda c: lambda: rsi(c.close, 14),
+    'rsi_windows_14_200': lambda c: lambda: rsi_windows(c.close, 14, 200),
+    'macd_12_26_9': lambda c: lambda: macd(c.close, 12, 26, 9),
+    'bollinger_20_2': lambda c: lambda: bollinger_bands(c.close, 20, 2.0),
+    'lz76': lambda c: (lambda symbols: lambda: lz76_complexity(symbols))(_direction_symbols(c)),
+    'candle_features': lambda c: lambda: candle_features(c.open, c.high, c.low, c.close)
+}
+
+
+def _direction_symbols(candles: CandleSeries) -> str:
+    """'1' si la vela sube respecto a la anterior, '0' si no (entrada de LZ76)"""
+    return ''.join(np.where(np.diff(candles.close) > 0, '1', '0'))
+
+
+def measure(func: Callable[[], Any], min_time: float = 0.2, max_calls: int = 50) -> Dict[str, float]:
+    """Tiempos por llamada (segundos): mejor, mediana y media de al menos una llamada"""
+    timings: List[float] = []
+    total = 0.0
+    while total < min_time and len(timings) < max_calls:
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        timings.append(elapsed)
+        total += elapsed
+
+    return {
+        'calls': len(timings),
+        'best': min(timings),
+        'median': statistics.median(timings),
+        'mean': total / len(timings)
+    }
+
+
+def _strategy_cases(strategy: Strategy, candles: CandleSeries) -> Dict[str, Optional[Callable[[], Any]]]:
+    """Operaciones de una estrategia sobre la serie (None = omitida)"""
+    indicators = strategy.calculate_indicators(candles)
+    engine = BacktestingEngine()
+
+    backtest = lambda: engine.run_backtest(strategy, 'BENCH', 'M5', candles, mode='vectorized')
+    if strategy.analyze_series(candles[:strategy.min_candles + 1]) is None and len(candles) > LOOP_BACKTEST_MAX_SIZE:
+        backtest = None
+
+    return {
+        'calculate_indicators': lambda: strategy.calculate_indicators(candles),
+        'generate_signal': lambda: strategy.generate_signal(candles, indicators),
+        'analyze': lambda: strategy.analyze('BENCH', 'M5', candles),
+        'run_backtest': backtest
+    }
+
+
+def run_suite(
+    sizes: Sequence[int] = SIZES,
+    generators: Sequence[str] = tuple(GENERATORS),
+    strategies: Optional[Sequence[str]] = None,
+    operations: Sequence[str] = STRATEGY_OPERATIONS,
+    indicators: bool = True,
+    seed: int = 0,
+    min_time: float = 0.2,
+    max_calls: int = 50
+) -> Dict[str, Any]:
+    """
+    Ejecuta la suite y retorna {'meta': {...}, 'results': [...]}
+
+    Args:
+        strategies: nombres de clase a medir (por defecto todas)
+        indicators: medir también los kernels de indicators
+    """
+    results: List[Dict[str, Any]] = []
+    classes = [cls for cls in STRATEGY_CLASSES if strategies is None or cls.__name__ in strategies]
+
+    for generator in generators:
+        for size in sizes:
+            candles = synthetic_candles(generator, size, seed)
+
+            if indicators:
+                for name, kernel in INDICATOR_KERNELS.items():
+                    timing = measure(kernel(candles), min_time, max_calls)
+                    results.append({'target': f'indicators.{name}', 'operation': 'compute',
+                                    'generator': generator, 'size': size, **timing})
+
+            for cls in classes:
+                strategy = cls()
+                # Los logs de las estrategias no deben mezclarse con la salida JSON
+                with redirect_stdout(io.StringIO()):
+                    for operation, func in _strategy_cases(strategy, candles).items():
+                        if operation not in operations:
+                            continue
+                        row = {'target': cls.__name__, 'operation': operation, 'generator': generator, 'size': size}
+                        if func is None:
+                            results.append({**row, 'skipped': True})
+                            continue
+                        results.append({**row, **measure(func, min_time, max_calls)})
+
+                print(f"⏱️ {cls.__name__} {generator} n={size}", file=sys.stderr)
+
+    return {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'seed': seed,
+            'min_time': min_time,
+            'max_calls': max_calls
+        },
+        'results': results
+    }
+
+
+def _key(row: Dict[str, Any]) -> tuple:
+    return row['target'], row['operation'], row['generator'], row['size']
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = REGRESSION_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """
+    Contrasta el mejor tiempo de cada caso con el baseline
+
+    Retorna una fila por caso presente en ambas corridas con 'ratio'
+    (actual / baseline) y 'regression' (ratio > threshold).
+    """
+    previous = {_key(row): row for row in baseline.get('results', []) if not row.get('skipped')}
+    rows = []
+    for row in current.get('results', []):
+        base = previous.get(_key(row))
+        if row.get('skipped') or base is None or base['best'] <= 0:
+            continue
+        ratio = row['best'] / base['best']
+        rows.append({
+            'target': row['target'],
+            'operation': row['operation'],
+            'generator': row['generator'],
+            'size': row['size'],
+            'baseline': base['best'],
+            'current': row['best'],
+            'ratio': round(ratio, 3),
+            'regression': ratio > threshold
+        })
+    return rows
@@ -0,0 +1,83 @@
+"""
+Generador determinista de velas OHLC sintéticas
+
+Misma semilla, mismo tamaño y mismo generador producen exactamente las
+mismas velas (numpy.random.default_rng), así los tiempos de distintas
+corridas se comparan sobre datos idénticos.
+
+- random_walk: caminata aleatoria gaussiana de volatilidad constante
+- regime_switching: cadena de Markov entre regímenes (tendencia alcista,
+  bajista, lateral y alta volatilidad) con deriva y volatilidad propias
+"""
+
+from typing import Callable, Dict
+import numpy as np
+
+from strategy_engine import CandleSeries
+
+
+START_TIME = 1_700_000_000
+START_PRICE = 1.10000
+
+# (deriva, volatilidad) por vela de cada régimen
+REGIMES = (
+    (2e-5, 3e-4),    # tendencia alcista
+    (-2e-5, 3e-4),   # tendencia bajista
+    (0.0, 1.5e-4),   # lateral
+    (0.0, 9e-4)      # alta volatilidad
+)
+
+
+def _ohlc(rng: np.random.Generator, steps: np.ndarray, volatility: np.ndarray, interval: int) -> CandleSeries:
+    """Arma la serie a partir de los retornos por vela (open = close anterior)"""
+    n = len(steps)
+    close = np.round(START_PRICE + np.cumsum(steps), 5)
+    open_ = np.concatenate(([START_PRICE], close[:-1]))
+    wick_high = np.abs(rng.normal(0.0, 1.0, n)) * volatility * 0.5
+    wick_low = np.abs(rng.normal(0.0, 1.0, n)) * volatility * 0.5
+    return CandleSeries(
+        time=START_TIME + interval * np.arange(n, dtype=np.int64),
+        open=open_,
+        high=np.round(np.maximum(open_, close) + wick_high, 5),
+        low=np.round(np.minimum(open_, close) - wick_low, 5),
+        close=close,
+        volume=np.round(rng.gamma(2.0, 500.0, n))
+    )
+
+
+def random_walk(n: int, seed: int = 0, volatility: float = 4e-4, interval: int = 300) -> CandleSeries:
+    """Caminata aleatoria: retornos normales de volatilidad constante"""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0.0, volatility, n)
+    return _ohlc(rng, steps, np.full(n, volatility), interval)
+
+
+def regime_switching(n: int, seed: int = 0, switch_probability: float = 0.01, interval: int = 300) -> CandleSeries:
+    """
+    Cambios de régimen: en cada vela se cambia a un régimen al azar con
+    probabilidad switch_probability; cada régimen aporta deriva y volatilidad
+    """
+    rng = np.random.default_rng(seed)
+    switches = rng.random(n) < switch_probability
+    choices = rng.integers(0, len(REGIMES), n)
+    # Régimen vigente: el elegido en el último cambio (el primero arranca en choices[0])
+    last_switch = np.maximum.accumulate(np.where(switches, np.arange(n), 0))
+    regime = choices[last_switch]
+
+    drift = np.array([r[0] for r in REGIMES])[regime]
+    volatility = np.array([r[1] for r in REGIMES])[regime]
+    steps = drift + rng.normal(0.0, 1.0, n) * volatility
+    return _ohlc(rng, steps, volatility, interval)
+
+
+GENERATORS: Dict[str, Callable[..., CandleSeries]] = {
+    'random_walk': random_walk,
+    'regime_switching': regime_switching
+}
+
+
+def synthetic_candles(generator: str, n: int, seed: int = 0) -> CandleSeries:
+    """Velas de un generador por nombre ('random_walk' o 'regime_switching')"""
+    if generator not in GENERATORS:
+        raise ValueError(f"Generador inválido: {generator}. Válidos: {tuple(GENERATORS)}")
+    return GENERATORS[generator](n, seed)
@@ -3,13 +3,13 @@ Rutas API para gestión de bots y estrategias - STC Trading System
 Multi-tenant: Cada usuario ve solo sus propios bots
 """
 
-from flask import Blueprint, request, jsonify, current_app, session
+from flask import Blueprint, Response, request, jsonify, current_app, session
 from typing import List
 from functools import wraps
-from strategy_engine import StrategyEngine, Candle
+from strategy_engine import StrategyEngine, Candle, CandleSeries
 from database import (
     get_db, Bot as BotModel, BotStat as BotStatsModel, Trade as TradeModel,
-    BacktestRun, BacktestTrade, BacktestEquityPoint,
+    BacktestRun, BacktestTrade,
     BacktestMasterRun, BacktestMasterSignal
 )
 from auth_routes import requires_active_access
@@ -24,7 +24,16 @@ from strategies import (
     TableroBinariasStrategy,
     TendencialTradeStrategy
 )
-from backtesting_engine import BacktestingEngine
+from backtesting_engine import BacktestingEngine, BACKTEST_MODES
+from strategy_optimizer import StrategyOptimizer, SEARCH_METHODS
+from gale_simulator import GaleSimulator, MONTE_CARLO_METHODS
+from batch_backtest import BatchBacktester, catalogue_pairs, stream_candle_sets, DEFAULT_CANDLE_LIMIT
+from backtest_store import (
+    save_backtest_details, load_equity_curve, EQUITY_STORAGE, BULK_METHODS,
+    register_cache_entry, find_cached_backtest, stored_result_dict, stored_trades
+)
+from backtest_cache import backtest_cache, backtest_cache_key
+from backtest_jobs import backtest_jobs, payload_runner, sse_events, job_processes, JobLimitError
 from auto_trading_bot import BotManager, BotConfig
 import traceback
 import requests
@@ -260,7 +269,7 @@ def analyze_with_strategy():
         if not strategy:
             return jsonify({'success': False, 'error': 'Estrategia no encontrada'}), 404
             
-        candles = [Candle(**c) for c in candles_data]
+        candles = CandleSeries.from_dicts(candles_data)
         
         signal = strategy.analyze(symbol, timeframe, candles)
         
@@ -282,31 +291,75 @@ def analyze_with_strategy():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-@bot_bp.route('/api/backtest/run', methods=['POST'])
-@login_required
-def run_backtest():
-    """Ejecuta un backtest de una estrategia y guarda los resultados en BD"""
-    try:
-        user_id = session['user_id']
-        data = request.get_json()
-        strategy_name = data.get('strategy_name')
-        symbol = data.get('symbol')
-        timeframe = data.get('timeframe', 'M5')
-        candles_data = data.get('candles', [])
-        initial_balance = data.get('initial_balance', 1000.0)
-        trade_amount = data.get('trade_amount', 1.0)
-        payout_percent = data.get('payout_percent', 85.0)
-        trade_duration = data.get('trade_duration', 5)
+def _execute_backtest(user_id: str, data: dict, progress=None):
+    """
+    Ejecuta un backtest y lo guarda en BD (en la request o en un trabajo de la cola)
+    
+    Retorna (payload, status HTTP). `progress` se pasa al motor
+    (BacktestJob.report en los trabajos en segundo plano).
+    """
+    strategy_name = data.get('strategy_name')
+    symbol = data.get('symbol')
+    timeframe = data.get('timeframe', 'M5')
+    candles_data = data.get('candles', [])
+    initial_balance = data.get('initial_balance', 1000.0)
+    trade_amount = data.get('trade_amount', 1.0)
+    payout_percent = data.get('payout_percent', 85.0)
+    trade_duration = data.get('trade_duration', 5)
+    mode = data.get('mode', 'vectorized')
+    equity_storage = data.get('equity_storage', 'compressed')
+    bulk_method = data.get('bulk_method', 'values')
+    use_cache = data.get('use_cache', True)
+    
+    if not all([strategy_name, symbol, candles_data]):
+        return {'success': False, 'error': 'Datos incompletos'}, 400
+    
+    if mode not in BACKTEST_MODES:
+        return {'success': False, 'error': f'Modo inválido: {mode}'}, 400
+    
+    if equity_storage not in EQUITY_STORAGE:
+        return {'success': False, 'error': f'Almacenamiento de equity inválido: {equity_storage}'}, 400
+    
+    if bulk_method not in BULK_METHODS:
+        return {'success': False, 'error': f'Método de inserción inválido: {bulk_method}'}, 400
         
-        if not all([strategy_name, symbol, candles_data]):
-            return jsonify({'success': False, 'error': 'Datos incompletos'}), 400
-            
-        strategy = strategy_engine.strategies.get(strategy_name)
-        if not strategy:
-            return jsonify({'success': False, 'error': 'Estrategia no encontrada'}), 404
-            
-        candles = [Candle(**c) for c in candles_data]
+    strategy = strategy_engine.strategies.get(strategy_name)
+    if not strategy:
+        return {'success': False, 'error': 'Estrategia no encontrada'}, 404
         
+    candles = CandleSeries.from_dicts(candles_data)
+    fingerprint = candles.fingerprint()
+    settings = {
+        'initial_balance': initial_balance,
+        'trade_amount': trade_amount,
+        'payout_percent': payout_percent,
+        'trade_duration': trade_duration
+    }
+    
+    # Velas M1 opcionales: vencimientos exactos (trade_duration en minutos)
+    expiry_candles = None
+    if data.get('expiry_candles'):
+        expiry_candles = CandleSeries.from_dicts(data['expiry_candles'])
+        settings['expiry_candles'] = expiry_candles.fingerprint()
+    
+    cache_key = backtest_cache_key(strategy, symbol, timeframe, candles, settings, fingerprint)
+    
+    # Backtest idéntico (mismas velas, parámetros y configuración) ya guardado por el usuario
+    if use_cache:
+        with get_db() as db:
+            cached_run = find_cached_backtest(db, cache_key, user_id)
+            if cached_run:
+                return {
+                    'success': True,
+                    'backtest_id': cached_run.id,
+                    'cached': True,
+                    'result': stored_result_dict(cached_run),
+                    'trades': stored_trades(db, cached_run.id),
+                    'message': f'Backtest idéntico ya guardado con ID {cached_run.id}'
+                }, 200
+    
+    result = backtest_cache.get(cache_key) if use_cache else None
+    if result is None:
         backtester = BacktestingEngine(
             initial_balance=initial_balance,
             trade_amount=trade_amount,
@@ -318,88 +371,472 @@ def run_backtest():
             symbol=symbol,
             timeframe=timeframe,
             candles=candles,
-            trade_duration=trade_duration
+            trade_duration=trade_duration,
+            mode=mode,
+            progress=progress,
+            expiry_candles=expiry_candles
         )
+        backtest_cache.put(cache_key, result, symbol, timeframe)
+    
+    # Guardar resultado del backtest en la base de datos
+    with get_db() as db:
+        # Crear BacktestRun
+        backtest_run = BacktestRun(
+            user_id=user_id,
+            strategy_name=result.strategy_name,
+            symbol=result.symbol,
+            timeframe=result.timeframe,
+            initial_balance=result.initial_balance,
+            trade_amount=trade_amount,
+            payout_percent=payout_percent,
+            trade_duration=trade_duration,
+            start_time=result.start_time,
+            end_time=result.end_time,
+            final_balance=result.final_balance,
+            total_trades=result.total_trades,
+            winning_trades=result.winning_trades,
+            losing_trades=result.losing_trades,
+            draw_trades=result.draw_trades,
+            win_rate=result.win_rate,
+            profit_factor=result.profit_factor,
+            net_profit=result.final_balance - result.initial_balance,
+            return_percent=((result.final_balance - result.initial_balance) / result.initial_balance) * 100,
+            total_profit=result.total_profit,
+            total_loss=result.total_loss,
+            gross_profit=result.gross_profit,
+            gross_loss=result.gross_loss,
+            average_win=result.average_win,
+            average_loss=result.average_loss,
+            largest_win=result.largest_win,
+            largest_loss=result.largest_loss,
+            max_drawdown=result.max_drawdown,
+            max_drawdown_percent=result.max_drawdown_percent,
+            sharpe_ratio=result.sharpe_ratio,
+            max_consecutive_wins=result.max_consecutive_wins,
+            max_consecutive_losses=result.max_consecutive_losses
+        )
+        db.add(backtest_run)
+        db.flush()  # Obtener el ID generado
         
-        # Guardar resultado del backtest en la base de datos
-        with get_db() as db:
-            # Crear BacktestRun
-            backtest_run = BacktestRun(
-                user_id=user_id,
-                strategy_name=result.strategy_name,
-                symbol=result.symbol,
-                timeframe=result.timeframe,
-                initial_balance=result.initial_balance,
-                trade_amount=trade_amount,
-                payout_percent=payout_percent,
-                trade_duration=trade_duration,
-                start_time=result.start_time,
-                end_time=result.end_time,
-                final_balance=result.final_balance,
-                total_trades=result.total_trades,
-                winning_trades=result.winning_trades,
-                losing_trades=result.losing_trades,
-                draw_trades=result.draw_trades,
-                win_rate=result.win_rate,
-                profit_factor=result.profit_factor,
-                net_profit=result.final_balance - result.initial_balance,
-                return_percent=((result.final_balance - result.initial_balance) / result.initial_balance) * 100,
-                total_profit=result.total_profit,
-                total_loss=result.total_loss,
-                gross_profit=result.gross_profit,
-                gross_loss=result.gross_loss,
-                average_win=result.average_win,
-                average_loss=result.average_loss,
-                largest_win=result.largest_win,
-                largest_loss=result.largest_loss,
-                max_drawdown=result.max_drawdown,
-                max_drawdown_percent=result.max_drawdown_percent,
-                sharpe_ratio=result.sharpe_ratio,
-                max_consecutive_wins=result.max_consecutive_wins,
-                max_consecutive_losses=result.max_consecutive_losses
+        # Trades y curva de equity en pocas operaciones (INSERT multi-fila / COPY)
+        save_backtest_details(
+            db,
+            backtest_run.id,
+            result,
+            equity_storage=equity_storage,
+            method=bulk_method
+        )
+        register_cache_entry(db, cache_key, fingerprint, symbol, timeframe, backtest_run_id=backtest_run.id)
+        
+        db.commit()
+        
+        return {
+            'success': True,
+            'backtest_id': backtest_run.id,
+            'cached': False,
+            'result': result.to_dict(),
+            'trades': [t.to_dict() for t in result.trades[:100]],
+            'message': f'Backtest ejecutado y guardado con ID {backtest_run.id}'
+        }, 200
+
+
+@bot_bp.route('/api/backtest/run', methods=['POST'])
+@login_required
+def run_backtest():
+    """Ejecuta un backtest de una estrategia y guarda los resultados en BD"""
+    try:
+        payload, status = _execute_backtest(session['user_id'], request.get_json())
+        return jsonify(payload), status
+        
+    except Exception as e:
+        logger.exception("Error capturado:")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@bot_bp.route('/api/backtest/jobs', methods=['POST'])
+@login_required
+def submit_backtest_job():
+    """Encola un backtest (mismo cuerpo que /api/backtest/run) y retorna el id del trabajo"""
+    try:
+        user_id = session['user_id']
+        data = request.get_json() or {}
+        
+        job = backtest_jobs.submit(user_id, 'backtest', {
+            'strategy_name': data.get('strategy_name'),
+            'symbol': data.get('symbol'),
+            'timeframe': data.get('timeframe', 'M5'),
+            'candles': len(data.get('candles', []))
+        }, payload_runner(_execute_backtest, user_id, data))
+        
+        return jsonify({'success': True, 'job': job.to_dict()}), 202
+        
+    except JobLimitError as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+    except Exception as e:
+        logger.exception("Error capturado:")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@bot_bp.route('/api/backtest/jobs', methods=['GET'])
+@login_required
+def list_backtest_jobs():
+    """Trabajos de backtest del usuario (sin resultados)"""
+    jobs = backtest_jobs.list(session['user_id'])
+    return jsonify({'success': True, 'jobs': [job.to_dict(include_result=False) for job in jobs]})
+
+
+@bot_bp.route('/api/backtest/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_backtest_job(job_id):
+    """Estado, progreso y (al terminar) resultado de un trabajo - para polling"""
+    job = backtest_jobs.get(job_id, session['user_id'])
+    if not job:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+
+@bot_bp.route('/api/backtest/jobs/<job_id>/events', methods=['GET'])
+@login_required
+def stream_backtest_job(job_id):
+    """Progreso del trabajo como server-sent events hasta que termina"""
+    job = backtest_jobs.get(job_id, session['user_id'])
+    if not job:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    
+    return Response(sse_events(job), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@bot_bp.route('/api/backtest/jobs/<job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_backtest_job(job_id):
+    """Cancela un trabajo en cola o en ejecución"""
+    job = backtest_jobs.get(job_id, session['user_id'])
+    if not job:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+    
+    if not backtest_jobs.cancel(job):
+        return jsonify({'success': False, 'error': f'El trabajo ya terminó ({job.status})'}), 409
+    
+    return jsonify({'success': True, 'job': job.to_dict(include_result=False)})
+
+
+def _execute_batch(data: dict, progress=None):
+    """
+    Backtest por lotes: estrategias x pares con velas de la BD
+    
+    Retorna (payload, status HTTP). Sin 'pairs' usa el catálogo de
+    TradingPair activos en cada timeframe de 'timeframes'.
+    """
+    strategy_names = data.get('strategies') or list(strategy_engine.strategies.keys())
+    mode = data.get('mode', 'vectorized')
+    
+    if mode not in BACKTEST_MODES:
+        return {'success': False, 'error': f'Modo inválido: {mode}'}, 400
+    
+    missing = [name for name in strategy_names if name not in strategy_engine.strategies]
+    if missing:
+        return {'success': False, 'error': f'Estrategias no encontradas: {", ".join(missing)}'}, 404
+    
+    batch = BatchBacktester(
+        initial_balance=data.get('initial_balance', 1000.0),
+        trade_amount=data.get('trade_amount', 1.0),
+        payout_percent=data.get('payout_percent', 85.0),
+        trade_duration=int(data.get('trade_duration', 5)),
+        mode=mode,
+        workers=job_processes(data.get('workers'))
+    )
+    
+    with get_db() as db:
+        if data.get('pairs'):
+            pairs = [(symbol, timeframe) for symbol, timeframe in data['pairs']]
+        else:
+            pairs = catalogue_pairs(db, data.get('timeframes', ['M5']))
+        
+        if not pairs:
+            return {'success': False, 'error': 'Sin pares para evaluar'}, 400
+        
+        result = batch.run(
+            [strategy_engine.strategies[name] for name in strategy_names],
+            pairs,
+            stream_candle_sets(db, pairs, int(data.get('limit', DEFAULT_CANDLE_LIMIT))),
+            progress=progress
+        )
+    
+    return {'success': True, 'batch': result.to_dict()}, 200
+
+
+@bot_bp.route('/api/backtest/batch', methods=['POST'])
+@login_required
+def submit_batch_backtest():
+    """
+    Encola un backtest por lotes (estrategias x pares) y retorna el id del trabajo
+    
+    Body: strategies (nombres, por defecto todas), pairs ([[symbol, timeframe], ...])
+    o timeframes (catálogo de TradingPair), limit, mode, workers (por defecto
+    1, acotado a MAX_JOB_PROCESSES) y la configuración del motor. El progreso
+    se reporta por celdas terminadas.
+    """
+    try:
+        data = request.get_json() or {}
+        
+        job = backtest_jobs.submit(session['user_id'], 'batch', {
+            'strategies': data.get('strategies'),
+            'pairs': data.get('pairs'),
+            'timeframes': data.get('timeframes')
+        }, payload_runner(_execute_batch, data))
+        
+        return jsonify({'success': True, 'job': job.to_dict()}), 202
+        
+    except JobLimitError as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+    except Exception as e:
+        logger.exception("Error capturado:")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _build_optimizer(strategy_class, data: dict, progress=None) -> StrategyOptimizer:
+    """Crea el optimizador con la configuración de backtest del request (workers acotado en el servidor)"""
+    return StrategyOptimizer(
+        strategy_class,
+        metric=data.get('metric', 'net_profit'),
+        initial_balance=data.get('initial_balance', 1000.0),
+        trade_amount=data.get('trade_amount', 1.0),
+        payout_percent=data.get('payout_percent', 85.0),
+        trade_duration=data.get('trade_duration', 5),
+        mode=data.get('mode', 'vectorized'),
+        workers=job_processes(data.get('workers')),
+        progress=progress
+    )
+
+
+def _search_options(method: str, data: dict) -> dict:
+    """Opciones específicas del método de búsqueda"""
+    if method == 'random':
+        return {'n_iter': data.get('n_iter', 100), 'seed': data.get('seed', 0)}
+    if method == 'halving':
+        return {'n_configs': data.get('n_configs'), 'eta': data.get('eta', 3), 'seed': data.get('seed', 0)}
+    return {}
+
+
+def _execute_optimize(data: dict, progress=None):
+    """
+    Búsqueda de parámetros (grid, random o halving) en un trabajo de la cola
+    
+    Retorna (payload, status HTTP). El progreso se reporta por
+    combinaciones evaluadas (por ronda en halving).
+    """
+    strategy_name = data.get('strategy_name')
+    candles_data = data.get('candles', [])
+    space = data.get('space', {})
+    method = data.get('method', 'grid')
+    
+    if not all([strategy_name, candles_data, space]):
+        return {'success': False, 'error': 'Datos incompletos'}, 400
+    
+    if method not in SEARCH_METHODS:
+        return {'success': False, 'error': f'Método inválido: {method}'}, 400
+        
+    strategy = strategy_engine.strategies.get(strategy_name)
+    if not strategy:
+        return {'success': False, 'error': 'Estrategia no encontrada'}, 404
+    
+    try:
+        table = _build_optimizer(type(strategy), data, progress).optimize(
+            space,
+            CandleSeries.from_dicts(candles_data),
+            method=method,
+            symbol=data.get('symbol', ''),
+            timeframe=data.get('timeframe', 'M5'),
+            **_search_options(method, data)
+        )
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    
+    return {
+        'success': True,
+        'method': method,
+        'evaluated': len(table),
+        'results': table[:data.get('top', 50)]
+    }, 200
+
+
+@bot_bp.route('/api/backtest/optimize', methods=['POST'])
+@login_required
+def optimize_strategy():
+    """Encola una búsqueda de los mejores parámetros de una estrategia y retorna el id del trabajo"""
+    try:
+        data = request.get_json() or {}
+        
+        job = backtest_jobs.submit(session['user_id'], 'optimize', {
+            'strategy_name': data.get('strategy_name'),
+            'method': data.get('method', 'grid'),
+            'candles': len(data.get('candles', []))
+        }, payload_runner(_execute_optimize, data))
+        
+        return jsonify({'success': True, 'job': job.to_dict()}), 202
+        
+    except JobLimitError as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+    except Exception as e:
+        logger.exception("Error capturado:")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _execute_walk_forward(data: dict, progress=None):
+    """
+    Walk-forward en un trabajo de la cola: re-optimiza en cada fold de train
+    y evalúa fuera de muestra en el fold de test
+    
+    Retorna (payload, status HTTP). El progreso se reporta por folds terminados.
+    """
+    strategy_name = data.get('strategy_name')
+    candles_data = data.get('candles', [])
+    space = data.get('space', {})
+    method = data.get('method', 'grid')
+    train_size = data.get('train_size')
+    test_size = data.get('test_size')
+    
+    if not all([strategy_name, candles_data, space, train_size, test_size]):
+        return {'success': False, 'error': 'Datos incompletos'}, 400
+    
+    if method not in SEARCH_METHODS:
+        return {'success': False, 'error': f'Método inválido: {method}'}, 400
+        
+    strategy = strategy_engine.strategies.get(strategy_name)
+    if not strategy:
+        return {'success': False, 'error': 'Estrategia no encontrada'}, 404
+    
+    try:
+        result = _build_optimizer(type(strategy), data, progress).walk_forward(
+            space,
+            CandleSeries.from_dicts(candles_data),
+            train_size=int(train_size),
+            test_size=int(test_size),
+            step=data.get('step'),
+            method=method,
+            symbol=data.get('symbol', ''),
+            timeframe=data.get('timeframe', 'M5'),
+            **_search_options(method, data)
+        )
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    
+    return {
+        'success': True,
+        'method': method,
+        **result.to_dict()
+    }, 200
+
+
+@bot_bp.route('/api/backtest/walk-forward', methods=['POST'])
+@login_required
+def walk_forward_backtest():
+    """Encola un backtest walk-forward y retorna el id del trabajo"""
+    try:
+        data = request.get_json() or {}
+        
+        job = backtest_jobs.submit(session['user_id'], 'walk_forward', {
+            'strategy_name': data.get('strategy_name'),
+            'method': data.get('method', 'grid'),
+            'train_size': data.get('train_size'),
+            'test_size': data.get('test_size'),
+            'candles': len(data.get('candles', []))
+        }, payload_runner(_execute_walk_forward, data))
+        
+        return jsonify({'success': True, 'job': job.to_dict()}), 202
+        
+    except JobLimitError as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+    except Exception as e:
+        logger.exception("Error capturado:")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _execute_gale(data: dict, progress=None):
+    """
+    Simulación de gales (barrida y Monte Carlo opcional) en un trabajo de la cola
+    
+    Retorna (payload, status HTTP). El progreso se reporta por etapa
+    (barrida, Monte Carlo); paths y horizon los acota GaleSimulator.monte_carlo.
+    """
+    strategy_name = data.get('strategy_name')
+    candles_data = data.get('candles', [])
+    monte_carlo = data.get('monte_carlo')
+    
+    if not all([strategy_name, candles_data]):
+        return {'success': False, 'error': 'Datos incompletos'}, 400
+        
+    strategy = strategy_engine.strategies.get(strategy_name)
+    if not strategy:
+        return {'success': False, 'error': 'Estrategia no encontrada'}, 404
+    
+    if monte_carlo and monte_carlo.get('method', 'bootstrap') not in MONTE_CARLO_METHODS:
+        return {'success': False, 'error': f"Método inválido: {monte_carlo.get('method')}"}, 400
+    
+    stages = 2 if monte_carlo else 1
+    if progress is not None:
+        progress(0, stages, 0)
+    
+    try:
+        simulator = GaleSimulator.from_strategy(
+            strategy,
+            CandleSeries.from_dicts(candles_data),
+            min_confidence=data.get('min_confidence', 0.5),
+            expiry_bars=data.get('expiry_bars', 1),
+            payout=data.get('payout', 0.87),
+            initial_balance=data.get('initial_balance', 1000.0),
+            allow_override=data.get('allow_override', True)
+        )
+        
+        results = simulator.sweep(
+            data.get('base_amounts', [data.get('base_amount', 5.0)]),
+            data.get('max_gales', [data.get('max_gale', 7)])
+        )
+        
+        response = {'success': True, 'results': results}
+        if progress is not None:
+            progress(1, stages, 0)
+        
+        if monte_carlo:
+            response['monte_carlo'] = simulator.monte_carlo(
+                base_amount=monte_carlo.get('base_amount', 5.0),
+                max_gale=monte_carlo.get('max_gale', 7),
+                n_paths=int(monte_carlo.get('paths', 10000)),
+                horizon=monte_carlo.get('horizon'),
+                method=monte_carlo.get('method', 'bootstrap'),
+                win_rate=monte_carlo.get('win_rate'),
+                seed=monte_carlo.get('seed', 0)
             )
-            db.add(backtest_run)
-            db.flush()  # Obtener el ID generado
-            
-            # Guardar trades individuales
-            for trade in result.trades:
-                backtest_trade = BacktestTrade(
-                    backtest_run_id=backtest_run.id,
-                    trade_id=trade.id,
-                    symbol=trade.symbol,
-                    direction=trade.direction,
-                    amount=trade.amount,
-                    duration=trade.duration,
-                    entry_price=trade.entry_price,
-                    entry_time=trade.entry_time,
-                    exit_price=trade.exit_price,
-                    exit_time=trade.exit_time,
-                    result=trade.result,
-                    profit=trade.profit,
-                    strategy_name=trade.strategy_name
-                )
-                db.add(backtest_trade)
-            
-            # Guardar puntos de equity curve
-            for idx, balance in enumerate(result.equity_curve):
-                equity_point = BacktestEquityPoint(
-                    backtest_run_id=backtest_run.id,
-                    point_index=idx,
-                    balance=balance,
-                    timestamp=result.start_time + (idx * 60 * 5) if idx < len(result.equity_curve) else None
-                )
-                db.add(equity_point)
-            
-            db.commit()
-            
-            return jsonify({
-                'success': True,
-                'backtest_id': backtest_run.id,
-                'result': result.to_dict(),
-                'trades': [t.to_dict() for t in result.trades[:100]],
-                'message': f'Backtest ejecutado y guardado con ID {backtest_run.id}'
-            })
+            if progress is not None:
+                progress(2, stages, 0)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    
+    return response, 200
+
+
+@bot_bp.route('/api/backtest/gale', methods=['POST'])
+@login_required
+def simulate_gale():
+    """Encola la simulación de la escalera de gales duales sobre las señales históricas de una estrategia"""
+    try:
+        data = request.get_json() or {}
+        monte_carlo = data.get('monte_carlo') or {}
+        
+        job = backtest_jobs.submit(session['user_id'], 'gale', {
+            'strategy_name': data.get('strategy_name'),
+            'candles': len(data.get('candles', [])),
+            'monte_carlo_paths': monte_carlo.get('paths')
+        }, payload_runner(_execute_gale, data))
+        
+        return jsonify({'success': True, 'job': job.to_dict()}), 202
         
+    except JobLimitError as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
     except Exception as e:
         logger.exception("Error capturado:")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -736,10 +1173,8 @@ def get_backtest_details(backtest_id):
                 backtest_run_id=backtest_id
             ).order_by(BacktestTrade.entry_time).all()
             
-            # Obtener equity curve
-            equity_points = db.query(BacktestEquityPoint).filter_by(
-                backtest_run_id=backtest_id
-            ).order_by(BacktestEquityPoint.point_index).all()
+            # Obtener equity curve (blob comprimido o una fila por punto)
+            equity_data = load_equity_curve(db, backtest_id)
             
             trades_data = [{
                 'id': t.trade_id,
@@ -756,12 +1191,6 @@ def get_backtest_details(backtest_id):
                 'strategy_name': t.strategy_name
             } for t in trades]
             
-            equity_data = [{
-                'index': ep.point_index,
-                'balance': ep.balance,
-                'timestamp': ep.timestamp
-            } for ep in equity_points]
-            
             backtest_data = {
                 'id': backtest.id,
                 'strategy_name': backtest.strategy_name,
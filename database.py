@@ -1,7 +1,7 @@
 import os
 import enum
 import logging
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime, JSON, Text, ForeignKey, Enum, Index
+from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime, JSON, Text, ForeignKey, Enum, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session, relationship
 from datetime import datetime, timedelta
@@ -539,6 +539,28 @@ class BacktestEquityPoint(Base):
     backtest_run = relationship("BacktestRun", backref="equity_points")
 
 
+
+class BacktestEquityCurve(Base):
+    """Curva de equity comprimida - Un solo registro por backtest en lugar de una fila por punto"""
+    __tablename__ = "backtest_equity_curves"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    backtest_run_id = Column(Integer, ForeignKey('backtest_runs.id', ondelete='CASCADE'), nullable=False, unique=True, index=True)
+    
+    # Formato del blob (ver backtest_store.encode_equity)
+    encoding = Column(String, nullable=False, default='xor-zlib-f8')
+    points = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    
+    # Timestamp del punto i = start_timestamp + i * step_seconds
+    start_timestamp = Column(Integer, nullable=True)
+    step_seconds = Column(Integer, default=300)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relaciones
+    backtest_run = relationship("BacktestRun", backref="equity_curve_data")
+
 # ===================== BACKTESTS MAESTROS =====================
 
 class BacktestMasterRun(Base):
@@ -620,6 +642,52 @@ class BacktestMasterSignal(Base):
     master_run = relationship("BacktestMasterRun", back_populates="signals")
 
 
+
+class BacktestCacheEntry(Base):
+    """Entrada de caché de backtests - Clave por contenido -> backtest ya persistido"""
+    __tablename__ = "backtest_cache_entries"
+    __table_args__ = (
+        Index('idx_cache_symbol_timeframe', 'symbol', 'timeframe'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # sha256 de (estrategia, parámetros, configuración, huella de velas) - ver backtest_cache
+    cache_key = Column(String(64), nullable=False, index=True)
+    candles_fingerprint = Column(String(32), nullable=False)
+    symbol = Column(String, nullable=False)
+    timeframe = Column(String, nullable=False)
+    
+    # Uno de los dos según el tipo de backtest
+    backtest_run_id = Column(Integer, ForeignKey('backtest_runs.id', ondelete='CASCADE'), nullable=True, index=True)
+    master_run_id = Column(Integer, ForeignKey('backtest_master_runs.id', ondelete='CASCADE'), nullable=True, index=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class BacktestMasterProgress(Base):
+    """Progreso de un backtest maestro - Última vela evaluada para extenderlo incrementalmente"""
+    __tablename__ = "backtest_master_progress"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    master_run_id = Column(Integer, ForeignKey('backtest_master_runs.id', ondelete='CASCADE'), nullable=False, unique=True, index=True)
+    
+    # Configuración con la que se generó (se reutiliza al extender)
+    trade_duration = Column(Integer, nullable=False, default=5)
+    mode = Column(String, nullable=False, default='vectorized')
+    
+    # Timestamp de la última vela donde se evaluó la estrategia
+    last_evaluated_time = Column(Integer, nullable=False)
+    
+    # Rachas abiertas al final (para continuar max_consecutive_* al extender)
+    current_win_streak = Column(Integer, default=0)
+    current_loss_streak = Column(Integer, default=0)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relaciones
+    master_run = relationship("BacktestMasterRun", backref="progress")
+
 # ===================== BOT DE SEÑALES =====================
 
 class TradingPair(Base):
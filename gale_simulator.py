@@ -0,0 +1,548 @@
+"""
+Simulador de Gales (martingala) - STC Trading System
+Reproduce sobre señales históricas la escalera de gales de DualGaleManager
+
+Semántica (DualGaleManager.start_sequence / process_result con los
+tiempos de DualGaleBot, en barras):
+- Secuencias CALL y PUT independientes y en paralelo, cada una con su
+  propio contador de gales 0..max_gale
+- Una señal en la vela i inicia una secuencia en su dirección; el trade de
+  Gale 0 entra en la vela i + 1. Cada trade dura expiry_bars velas y se
+  resuelve por el COLOR de la última vela: CALL gana si cierra verde, PUT
+  si cierra roja (doji pierde)
+- El bot procesa los resultados 30s después del cierre, así que la señal
+  de una vela se atiende antes que el resultado que vence en ella
+- Con allow_override (el default de start_sequence) una señal en la misma
+  dirección mientras la secuencia sigue en Gale 0 (desde la vela de
+  entrada hasta la de resolución inclusive) la reemplaza: entra otro
+  stake de Gale 0 y la escalera sigue desde él. El trade reemplazado
+  queda abierto y se liquida solo (fila con replaced=True). En Gale > 0
+  las señales se ignoran; sin allow_override se ignoran siempre
+- Si pierde y quedan gales, el siguiente entra en la vela siguiente a la
+  resolución con el monto de la escalera. Si gana, el bot re-analiza la
+  vela ganadora y una señal en ella inicia otra secuencia; si agota
+  max_gale no (la señal de esa vela ya fue bloqueada)
+- Montos: GaleSequence.GALE_LADDER_87 escalada a base_amount / 5 (y
+  base * 2**g pasado el final de la tabla); una secuencia ganada en el
+  gale g cobra monto_g * (1 + payout), así que su profit neto es
+  monto_g * payout - lo invertido en los gales anteriores. El total
+  coincide con el último punto de la curva de equity (a diferencia de
+  DualGaleManager.stats, que descuenta dos veces el stake ganador)
+
+Diferencia con el bot en vivo: DualGaleBot pasa a process_result todos
+los trades pendientes, incluido el Gale 0 reemplazado, cuyo resultado
+termina aplicado a la secuencia que lo reemplazó. El simulador liquida
+ese trade por su cuenta y la escalera sigue solo con los resultados de
+la secuencia vigente.
+
+La simulación no itera vela por vela: para cada dirección calcula con
+arrays el próximo trade ganador y la próxima señal de cada vela, arma la
+función "secuencia que empieza en s -> próxima secuencia" y recorre la
+cadena con saltos de potencias de 2 (O(n log n) en numpy). Una barrida de
+base_amount x max_gale sobre años de velas M5 reutiliza esos arrays.
+
+El modo Monte Carlo estima la probabilidad de ruina re-muestreando las
+secuencias históricas (bootstrap) o con trades independientes de
+probabilidad fija (paramétrico).
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Union
+import numpy as np
+
+from strategy_engine import Strategy, Candle, CandleSeries, as_candle_series
+from dual_gale_manager import GaleSequence
+from indicators import current_context
+
+
+DIRECTIONS = {'CALL': 1, 'PUT': -1}
+
+MONTE_CARLO_METHODS = ('bootstrap', 'parametric')
+
+# Cantidad máxima de valores por bloque de caminos Monte Carlo (memoria acotada)
+_MONTE_CARLO_BLOCK = 4_000_000
+
+# Límites de una corrida Monte Carlo: caminos, secuencias por camino y
+# caminos x secuencias (el tiempo de cómputo, ~0.35s por 10M)
+MAX_MONTE_CARLO_PATHS = 100_000
+MAX_MONTE_CARLO_HORIZON = 100_000
+MAX_MONTE_CARLO_STEPS = 50_000_000
+
+
+def gale_ladder(base_amount: float = 5.0, max_gale: int = 7, ladder: Optional[Sequence[float]] = None) -> np.ndarray:
+    """
+    Montos de los gales 0..max_gale
+
+    Sin `ladder` replica GaleSequence.get_current_amount: la tabla
+    GALE_LADDER_87 escalada a base_amount / 5 y base * 2**g más allá de la
+    tabla. Con `ladder` (por ejemplo TradingBot.GALE_AMOUNTS) se escala
+    esa tabla de la misma forma.
+    """
+    table = GaleSequence.GALE_LADDER_87 if ladder is None else ladder
+    amounts = [
+        table[g] * (base_amount / table[0]) if g < len(table) else base_amount * (2 ** g)
+        for g in range(max_gale + 1)
+    ]
+    return np.array(amounts, dtype=float)
+
+
+def signals_from_strategy(
+    strategy: Strategy,
+    candles: Union[List[Candle], CandleSeries],
+    lookback: int = 200,
+    min_confidence: float = 0.5
+) -> np.ndarray:
+    """
+    Dirección de la señal por vela (1 CALL, -1 PUT, 0 nada) con el filtro
+    de confianza del bot (>= 0.5)
+
+    Usa analyze_series si la estrategia lo soporta (cacheado en el
+    contexto de indicadores activo); si no, analyze sobre cada ventana.
+    """
+    candles = as_candle_series(candles)
+    series = current_context().cached(
+        candles, 'analyze_series',
+        (type(strategy).__name__, repr(sorted(strategy.params.items())), lookback),
+        lambda: strategy.analyze_series(candles, lookback)
+    )
+
+    if series is not None:
+        direction = np.asarray(series['direction'], dtype=np.int8)
+        confidence = np.asarray(series['confidence'], dtype=float)
+        return np.where(confidence >= min_confidence, direction, 0).astype(np.int8)
+
+    signals = np.zeros(len(candles), dtype=np.int8)
+    for i in range(strategy.min_candles, len(candles)):
+        signal = strategy.analyze('', '', candles[max(0, i - lookback):i + 1])
+        if signal and signal.direction in DIRECTIONS and signal.confidence >= min_confidence:
+            signals[i] = DIRECTIONS[signal.direction]
+    return signals
+
+
+@dataclass
+class GaleSimulationResult:
+    """Resultado de una simulación de gales duales"""
+    base_amount: float
+    max_gale: int
+    payout: float
+    initial_balance: float
+    final_balance: float
+
+    total_sequences: int = 0
+    won_sequences: int = 0
+    lost_sequences: int = 0
+    total_trades: int = 0
+    total_profit: float = 0.0
+    total_invested: float = 0.0
+    wins_by_gale: Dict[str, List[int]] = field(default_factory=dict)
+    losses_at_max_gale: Dict[str, int] = field(default_factory=dict)
+
+    max_drawdown: float = 0.0
+    max_drawdown_percent: float = 0.0
+    max_exposure: float = 0.0
+    min_balance: float = 0.0
+    ruined: bool = False
+    ruin_bar: int = -1
+
+    replaced_sequences: int = 0
+    # Una fila por secuencia, ordenadas por vela de resolución
+    sequences: Optional[np.ndarray] = None
+    # Balance al cierre de cada vela (stakes abiertos ya descontados)
+    equity_curve: Optional[np.ndarray] = None
+
+    @property
+    def win_rate(self) -> float:
+        return (self.won_sequences / self.total_sequences) * 100 if self.total_sequences > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'base_amount': self.base_amount,
+            'max_gale': self.max_gale,
+            'payout': self.payout,
+            'initial_balance': self.initial_balance,
+            'final_balance': round(self.final_balance, 2),
+            'net_profit': round(self.final_balance - self.initial_balance, 2),
+            'total_sequences': self.total_sequences,
+            'won_sequences': self.won_sequences,
+            'lost_sequences': self.lost_sequences,
+            'replaced_sequences': self.replaced_sequences,
+            'win_rate': round(self.win_rate, 2),
+            'total_trades': self.total_trades,
+            'total_profit': round(self.total_profit, 2),
+            'total_invested': round(self.total_invested, 2),
+            'wins_by_gale': self.wins_by_gale,
+            'losses_at_max_gale': self.losses_at_max_gale,
+            'max_drawdown': round(self.max_drawdown, 2),
+            'max_drawdown_percent': round(self.max_drawdown_percent, 2),
+            'max_exposure': round(self.max_exposure, 2),
+            'min_balance': round(self.min_balance, 2),
+            'ruined': self.ruined,
+            'ruin_bar': self.ruin_bar
+        }
+
+
+SEQUENCE_DTYPE = np.dtype([
+    ('direction', np.int8),
+    ('start', np.int64),
+    ('end', np.int64),
+    ('resolved', np.int64),
+    ('gale', np.int16),
+    ('won', np.bool_),
+    # Gale 0 reemplazado por otra señal: un trade que se liquida solo
+    ('replaced', np.bool_)
+])
+
+
+class GaleSimulator:
+    """
+    Simulador vectorizado de la escalera de gales de DualGaleManager
+
+    Se construye una vez por serie de señales/velas; simulate() y sweep()
+    reutilizan los arrays de próxima señal y próximo trade ganador.
+    """
+
+    def __init__(
+        self,
+        signals: np.ndarray,
+        candles: Union[List[Candle], CandleSeries],
+        expiry_bars: int = 1,
+        payout: float = 0.87,
+        initial_balance: float = 1000.0,
+        allow_override: bool = True
+    ):
+        """
+        Args:
+            signals: dirección por vela (1 CALL, -1 PUT, 0 nada), ver signals_from_strategy
+            candles: velas de las señales (el resultado se decide por color)
+            expiry_bars: duración de cada trade en velas
+            payout: pago del broker como fracción (0.87 = 87%)
+            allow_override: como en DualGaleManager.start_sequence, una señal
+                reemplaza la secuencia de su dirección mientras está en Gale 0
+        """
+        candles = as_candle_series(candles)
+        signals = np.asarray(signals)
+        if len(signals) != len(candles):
+            raise ValueError(f"signals ({len(signals)}) y candles ({len(candles)}) deben tener el mismo largo")
+        if expiry_bars < 1:
+            raise ValueError("expiry_bars debe ser >= 1")
+
+        self.n = len(candles)
+        self.expiry_bars = expiry_bars
+        self.payout = payout
+        self.initial_balance = initial_balance
+        self.allow_override = allow_override
+        # Velas donde puede entrar un trade que se resuelve dentro de la serie
+        self.trade_bars = max(0, self.n - expiry_bars + 1)
+
+        opens, closes = candles.open, candles.close
+        colors = np.sign(closes - opens).astype(np.int8)
+        self._chains = {}
+        for name, sign in DIRECTIONS.items():
+            won_at = colors[expiry_bars - 1:expiry_bars - 1 + self.trade_bars] == sign
+            self._chains[name] = (
+                self._next_win(won_at),
+                self._next_true(signals == sign, self.n)
+            )
+        self._paths: Dict[int, np.ndarray] = {}
+
+    @classmethod
+    def from_strategy(
+        cls,
+        strategy: Strategy,
+        candles: Union[List[Candle], CandleSeries],
+        lookback: int = 200,
+        min_confidence: float = 0.5,
+        **kwargs
+    ) -> 'GaleSimulator':
+        """Simulador sobre las señales de una estrategia (ver signals_from_strategy)"""
+        candles = as_candle_series(candles)
+        return cls(signals_from_strategy(strategy, candles, lookback, min_confidence), candles, **kwargs)
+
+    def _next_true(self, flags: np.ndarray, sentinel: int) -> np.ndarray:
+        """Para cada posición, el índice del próximo True (inclusive) o sentinel; largo len+1"""
+        index = np.where(flags, np.arange(len(flags)), sentinel)
+        out = np.full(len(flags) + 1, sentinel, dtype=np.int64)
+        out[:-1] = np.minimum.accumulate(index[::-1])[::-1] if len(flags) else index
+        return out
+
+    def _next_win(self, won_at: np.ndarray) -> np.ndarray:
+        """Próximo trade ganador en la misma fase (t, t + k, t + 2k, ...) o trade_bars"""
+        k, m = self.expiry_bars, self.trade_bars
+        out = np.full(m + 1, m, dtype=np.int64)
+        for phase in range(min(k, m)):
+            bars = np.arange(phase, m, k)
+            index = np.where(won_at[bars], bars, m)
+            out[bars] = np.minimum.accumulate(index[::-1])[::-1]
+        return out
+
+    def sequences(self, max_gale: int = 7) -> np.ndarray:
+        """
+        Secuencias completas de ambas direcciones para max_gale (structured
+        array SEQUENCE_DTYPE ordenado por vela de resolución)
+        """
+        if max_gale not in self._paths:
+            self._paths[max_gale] = self._build_sequences(max_gale)
+        return self._paths[max_gale]
+
+    def _build_sequences(self, max_gale: int) -> np.ndarray:
+        k, m = self.expiry_bars, self.trade_bars
+        parts = []
+
+        for name, sign in DIRECTIONS.items():
+            next_win, next_signal = self._chains[name]
+            starts = np.arange(m + 1)
+
+            # Último trade de la secuencia que empieza en s (ganador o el del gale máximo)
+            end = np.minimum(next_win, starts + max_gale * k)
+            won = next_win == end
+            # Próxima secuencia: primera señal desde la vela de resolución si
+            # ganó (el bot re-analiza la vela ganadora) o desde la siguiente
+            # si perdió; entra en la vela posterior a la señal
+            search = np.where(won, end + k - 1, end + k)
+
+            # Una señal antes de procesar el Gale 0 (velas s .. s + k - 1) lo reemplaza
+            replaced = np.zeros(m + 1, dtype=bool)
+            if self.allow_override:
+                replaced[:m] = next_signal[:m] <= starts[:m] + k - 1
+                end = np.where(replaced, starts, end)
+                won = np.where(replaced, next_win == starts, won)
+                search = np.where(replaced, starts, search)
+
+            complete = end < m
+            resolved = end + k - 1
+            following = np.full(m + 1, m, dtype=np.int64)
+            following[complete] = np.minimum(next_signal[np.minimum(search[complete], self.n)] + 1, m)
+
+            first = min(int(next_signal[0]) + 1, m)
+            chain = self._walk(following, first, m)
+
+            chain = chain[complete[chain]]
+            rows = np.zeros(len(chain), dtype=SEQUENCE_DTYPE)
+            rows['direction'] = sign
+            rows['start'] = chain
+            rows['end'] = end[chain]
+            rows['resolved'] = resolved[chain]
+            rows['gale'] = (end[chain] - chain) // k
+            rows['won'] = won[chain]
+            rows['replaced'] = replaced[chain]
+            parts.append(rows)
+
+        rows = np.concatenate(parts)
+        return rows[np.argsort(rows['resolved'], kind='stable')]
+
+    def _walk(self, following: np.ndarray, first: int, sentinel: int) -> np.ndarray:
+        """
+        Nodos de la cadena first, following[first], ... (sin el centinela)
+
+        following es estrictamente creciente fuera del centinela, así que
+        la cadena tiene a lo sumo len(following) nodos: con tablas de saltos
+        de 2^j pasos se obtiene completa con O(log n) operaciones de arrays.
+        """
+        if first >= sentinel:
+            return np.empty(0, dtype=np.int64)
+
+        jumps = [following]
+        while (1 << len(jumps)) <= sentinel:
+            jumps.append(jumps[-1][jumps[-1]])
+
+        nodes = np.array([first], dtype=np.int64)
+        for table in reversed(jumps):
+            nodes = np.concatenate((nodes, table[nodes]))
+        nodes = np.unique(nodes)
+        return nodes[nodes < sentinel]
+
+    def simulate(
+        self,
+        base_amount: float = 5.0,
+        max_gale: int = 7,
+        ladder: Optional[Sequence[float]] = None,
+        initial_balance: Optional[float] = None
+    ) -> GaleSimulationResult:
+        """Simula la escalera de gales con los montos indicados"""
+        initial_balance = self.initial_balance if initial_balance is None else initial_balance
+        rows = self.sequences(max_gale)
+        amounts = gale_ladder(base_amount, max_gale, ladder)
+        invested = np.cumsum(amounts)
+
+        gale = rows['gale'].astype(np.int64)
+        won = rows['won']
+        replaced = rows['replaced']
+        profit = np.where(won, amounts[gale] * (1 + self.payout) - invested[gale], -invested[gale])
+
+        result = GaleSimulationResult(
+            base_amount=base_amount,
+            max_gale=max_gale,
+            payout=self.payout,
+            initial_balance=initial_balance,
+            final_balance=initial_balance + float(profit.sum()),
+            total_sequences=len(rows),
+            won_sequences=int((won & ~replaced).sum()),
+            lost_sequences=int((~won & ~replaced).sum()),
+            replaced_sequences=int(replaced.sum()),
+            total_trades=int((gale + 1).sum()),
+            total_profit=float(profit.sum()),
+            total_invested=float(invested[gale].sum()),
+            sequences=rows
+        )
+
+        for name, sign in DIRECTIONS.items():
+            mine = (rows['direction'] == sign) & ~replaced
+            result.wins_by_gale[name] = np.bincount(gale[mine & won], minlength=max_gale + 1).tolist()
+            result.losses_at_max_gale[name] = int((mine & ~won).sum())
+
+        self._cash_flow(result, rows, amounts)
+        return result
+
+    def _cash_flow(self, result: GaleSimulationResult, rows: np.ndarray, amounts: np.ndarray):
+        """
+        Balance por vela: cada stake se descuenta al entrar y el pago se
+        acredita en la vela de resolución. Hay ruina cuando el balance no
+        alcanza para los stakes que entran en una vela.
+        """
+        k = self.expiry_bars
+        gale = rows['gale'].astype(np.int64)
+        trades = gale + 1
+
+        # Un registro por trade: vela de entrada, gale y si gana
+        sequence = np.repeat(np.arange(len(rows)), trades)
+        level = np.arange(len(sequence)) - np.repeat(np.cumsum(trades) - trades, trades)
+        entry = rows['start'][sequence] + level * k
+        stake = amounts[level]
+        won = rows['won'][sequence] & (level == gale[sequence])
+
+        debits = np.bincount(entry, weights=stake, minlength=self.n)
+        credits = np.bincount(entry[won] + k - 1, weights=stake[won] * (1 + self.payout), minlength=self.n)
+
+        # Balance tras las entradas de cada vela (antes de resolver) y al cierre
+        settled = np.concatenate(([0.0], np.cumsum(credits - debits)))
+        after_entries = result.initial_balance + settled[:-1] - debits
+        equity = result.initial_balance + settled[1:]
+
+        exposure = np.cumsum(debits) - np.concatenate(([0.0], np.cumsum(np.bincount(
+            entry + k - 1, weights=stake, minlength=self.n
+        ))[:-1]))
+        result.max_exposure = float(exposure.max()) if len(exposure) else 0.0
+        result.min_balance = float(after_entries.min()) if len(after_entries) else result.initial_balance
+
+        broke = np.flatnonzero(after_entries < 0)
+        result.ruined = len(broke) > 0
+        result.ruin_bar = int(broke[0]) if result.ruined else -1
+
+        if len(equity):
+            peak = np.maximum.accumulate(np.maximum(equity, result.initial_balance))
+            drawdown = peak - equity
+            worst = int(drawdown.argmax())
+            result.max_drawdown = float(drawdown[worst])
+            result.max_drawdown_percent = float(drawdown[worst] / peak[worst] * 100) if peak[worst] > 0 else 0.0
+        result.equity_curve = equity
+
+    def sweep(
+        self,
+        base_amounts: Sequence[float],
+        max_gales: Sequence[int],
+        ladder: Optional[Sequence[float]] = None,
+        initial_balance: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Simula todas las combinaciones base_amount x max_gale (las secuencias se calculan una vez por max_gale)"""
+        table = []
+        for max_gale in max_gales:
+            for base_amount in base_amounts:
+                table.append(self.simulate(base_amount, max_gale, ladder, initial_balance).to_dict())
+        return table
+
+    def monte_carlo(
+        self,
+        base_amount: float = 5.0,
+        max_gale: int = 7,
+        n_paths: int = 10000,
+        horizon: Optional[int] = None,
+        method: str = 'bootstrap',
+        win_rate: Optional[float] = None,
+        ladder: Optional[Sequence[float]] = None,
+        initial_balance: Optional[float] = None,
+        seed: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Probabilidad de ruina por Monte Carlo
+
+        Cada camino es una sucesión de `horizon` secuencias (por defecto las
+        mismas que el histórico) jugadas una tras otra; el camino se arruina
+        si en algún momento el balance no alcanza para el gale que toca
+        (balance antes de la secuencia < lo que invierte hasta terminarla).
+
+        Args:
+            method: 'bootstrap' re-muestrea las secuencias históricas;
+                    'parametric' usa trades independientes con prob. win_rate
+            win_rate: prob. de ganar un trade (por defecto la histórica)
+
+        Raises:
+            ValueError: si n_paths, horizon o n_paths x horizon superan
+                MAX_MONTE_CARLO_PATHS / _HORIZON / _STEPS
+        """
+        if method not in MONTE_CARLO_METHODS:
+            raise ValueError(f"Método Monte Carlo inválido: {method}. Válidos: {MONTE_CARLO_METHODS}")
+        if not 0 < n_paths <= MAX_MONTE_CARLO_PATHS:
+            raise ValueError(f"paths debe estar entre 1 y {MAX_MONTE_CARLO_PATHS}")
+
+        initial_balance = self.initial_balance if initial_balance is None else initial_balance
+        rows = self.sequences(max_gale)
+        amounts = gale_ladder(base_amount, max_gale, ladder)
+        invested = np.cumsum(amounts)
+        gain = amounts * (1 + self.payout) - invested
+
+        if win_rate is None:
+            trades = int((rows['gale'].astype(np.int64) + 1).sum())
+            win_rate = rows['won'].sum() / trades if trades else 0.0
+        horizon = horizon or len(rows)
+        if horizon == 0 or (method == 'bootstrap' and len(rows) == 0):
+            raise ValueError("No hay secuencias para simular")
+        if horizon > MAX_MONTE_CARLO_HORIZON:
+            raise ValueError(f"horizon debe ser <= {MAX_MONTE_CARLO_HORIZON}")
+        if n_paths * horizon > MAX_MONTE_CARLO_STEPS:
+            raise ValueError(f"paths x horizon debe ser <= {MAX_MONTE_CARLO_STEPS} ({n_paths} x {horizon})")
+
+        rng = np.random.default_rng(seed)
+        block = max(1, _MONTE_CARLO_BLOCK // horizon)
+        ruined = np.zeros(n_paths, dtype=bool)
+        final = np.empty(n_paths)
+        worst = np.empty(n_paths)
+
+        for first in range(0, n_paths, block):
+            size = min(block, n_paths - first)
+            if method == 'bootstrap':
+                picks = rng.integers(0, len(rows), size=(size, horizon))
+                gale = rows['gale'].astype(np.int64)[picks]
+                won = rows['won'][picks]
+            else:
+                # Pérdidas antes del primer trade ganador (geométrica)
+                losses = rng.geometric(win_rate, size=(size, horizon)) - 1 if win_rate > 0 else np.full((size, horizon), max_gale + 1)
+                won = losses <= max_gale
+                gale = np.minimum(losses, max_gale)
+
+            profit = np.where(won, gain[gale], -invested[gale])
+            balance = initial_balance + np.cumsum(profit, axis=1)
+            before = np.concatenate((np.full((size, 1), initial_balance), balance[:, :-1]), axis=1)
+
+            ruined[first:first + size] = (before < invested[gale]).any(axis=1)
+            final[first:first + size] = balance[:, -1]
+            worst[first:first + size] = np.minimum(before.min(axis=1), balance.min(axis=1))
+
+        return {
+            'method': method,
+            'base_amount': base_amount,
+            'max_gale': max_gale,
+            'paths': n_paths,
+            'horizon': horizon,
+            'win_rate': round(float(win_rate) * 100, 2),
+            'ruin_probability': float(ruined.mean()),
+            'final_balance_mean': round(float(final.mean()), 2),
+            'final_balance_p5': round(float(np.percentile(final, 5)), 2),
+            'final_balance_p50': round(float(np.percentile(final, 50)), 2),
+            'final_balance_p95': round(float(np.percentile(final, 95)), 2),
+            'min_balance_p5': round(float(np.percentile(worst, 5)), 2)
+        }
+
+
+if __name__ == '__main__':
+    print("🎰 Gale Simulator - STC Trading System")
+    print("Escalera de gales duales (CALL/PUT) vectorizada + Monte Carlo de ruina")
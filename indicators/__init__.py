@@ -0,0 +1,35 @@
+"""
+Librería de Indicadores Técnicos - STC Trading System
+Cada indicador tiene un kernel batch (NumPy) y un actualizador incremental
+O(1) que producen exactamente los mismos valores (ver test_indicators_parity.py).
+No depende de pandas.
+"""
+
+from .moving_averages import sma, ema, SMA, EMA
+from .oscillators import rsi, rsi_windows, macd, RSI, MACD
+from .bands import bollinger_bands, BollingerBands
+from .complexity import lz76_complexity, SlidingLZ76
+from .patterns import candle_features, PatternCounts
+from .context import IndicatorContext, NullIndicatorContext, current_context, indicator_context
+
+__all__ = [
+    'sma',
+    'ema',
+    'rsi',
+    'rsi_windows',
+    'macd',
+    'bollinger_bands',
+    'SMA',
+    'EMA',
+    'RSI',
+    'MACD',
+    'BollingerBands',
+    'lz76_complexity',
+    'SlidingLZ76',
+    'candle_features',
+    'PatternCounts',
+    'IndicatorContext',
+    'NullIndicatorContext',
+    'current_context',
+    'indicator_context'
+]
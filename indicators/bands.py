@@ -0,0 +1,87 @@
+"""
+Bandas de Bollinger
+Kernel batch (NumPy) + actualizador incremental O(1) con resultados idénticos
+"""
+
+from collections import deque
+from typing import Dict, Optional
+import numpy as np
+
+
+def _band_values(mean_shifted, sum_sq, period: int, shift, std_dev: float):
+    """Media, desviación muestral (ddof=1) y bandas a partir de las sumas de ventana"""
+    middle = shift + mean_shifted
+    variance = (sum_sq - mean_shifted * mean_shifted * period) / (period - 1)
+    std = np.sqrt(np.maximum(variance, 0.0))
+    return middle + std * std_dev, middle, middle - std * std_dev
+
+
+def bollinger_bands(prices: np.ndarray, period: int = 20, std_dev: float = 2.0) -> Dict[str, np.ndarray]:
+    """
+    Bandas de Bollinger con desviación estándar muestral (ddof=1)
+
+    Returns:
+        Dict con 'upper', 'middle' y 'lower' (NaN en las primeras period - 1 posiciones)
+    """
+    values = np.asarray(prices, dtype=float)
+    n = len(values)
+    upper = np.full(n, np.nan)
+    middle = np.full(n, np.nan)
+    lower = np.full(n, np.nan)
+
+    if n >= period and period > 1:
+        shift = values[0]
+        shifted = values - shift
+        cumsum = np.add.accumulate(np.concatenate(([0.0], shifted)))
+        cumsum_sq = np.add.accumulate(np.concatenate(([0.0], shifted * shifted)))
+
+        mean_shifted = (cumsum[period:] - cumsum[:-period]) / period
+        sum_sq = cumsum_sq[period:] - cumsum_sq[:-period]
+        upper[period - 1:], middle[period - 1:], lower[period - 1:] = _band_values(
+            mean_shifted, sum_sq, period, shift, std_dev
+        )
+
+    return {
+        'upper': upper,
+        'middle': middle,
+        'lower': lower
+    }
+
+
+class BollingerBands:
+    """Bandas de Bollinger incrementales - mismos valores que bollinger_bands()"""
+
+    def __init__(self, period: int = 20, std_dev: float = 2.0):
+        self.period = period
+        self.std_dev = std_dev
+        self.shift: Optional[float] = None
+        self.cumsum = 0.0
+        self.cumsum_sq = 0.0
+        self.window = deque([(0.0, 0.0)], maxlen=period + 1)
+        self.value: Optional[Dict[str, float]] = None
+
+    def update(self, price: float) -> Optional[Dict[str, float]]:
+        """Agrega un precio y retorna {'upper', 'middle', 'lower'} o None durante el calentamiento"""
+        price = float(price)
+        if self.shift is None:
+            self.shift = price
+
+        shifted = price - self.shift
+        self.cumsum += shifted
+        self.cumsum_sq += shifted * shifted
+        self.window.append((self.cumsum, self.cumsum_sq))
+
+        if len(self.window) <= self.period or self.period < 2:
+            return None
+
+        first_sum, first_sq = self.window[0]
+        mean_shifted = np.float64((self.cumsum - first_sum) / self.period)
+        sum_sq = np.float64(self.cumsum_sq - first_sq)
+        upper, middle, lower = _band_values(mean_shifted, sum_sq, self.period, self.shift, self.std_dev)
+
+        self.value = {
+            'upper': float(upper),
+            'middle': float(middle),
+            'lower': float(lower)
+        }
+        return self.value
@@ -0,0 +1,149 @@
+"""
+Complejidad Lempel-Ziv (LZ76) en tiempo lineal
+
+Reproduce exactamente el conteo de frases de la implementación original de
+KolmogorovComplexityStrategy: cada frase que empieza en i se extiende
+mientras sequence[i:j] aparezca completa dentro de sequence[:i] (j < n),
+el conteo arranca en 1 y el parseo corre mientras i < n - 1.
+
+- Secuencias cortas: búsqueda con str.find acotada al prefijo (C puro,
+  lo más rápido para las ventanas típicas de 50 velas)
+- Secuencias largas: autómata de sufijos construido incrementalmente
+  sobre el prefijo, O(n) total
+"""
+
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+
+
+# A partir de este largo el autómata de sufijos es más rápido que find()
+AUTOMATON_THRESHOLD = 1024
+
+
+def _lz76_find(sequence: str) -> int:
+    """Parseo LZ76 con búsquedas en el prefijo (rápido para secuencias cortas)"""
+    n = len(sequence)
+    find = sequence.find
+    i = 0
+    complexity = 1
+
+    while i < n - 1:
+        j = i + 1
+        while j < n and find(sequence[i:j], 0, i) != -1:
+            j += 1
+        complexity += 1
+        i = j
+
+    return complexity
+
+
+class _SuffixAutomaton:
+    """Autómata de sufijos de un prefijo que crece de a un símbolo"""
+
+    def __init__(self):
+        self.transitions: List[Dict] = [{}]
+        self.link: List[int] = [-1]
+        self.length: List[int] = [0]
+        self.last = 0
+
+    def extend(self, symbol):
+        transitions, link, length = self.transitions, self.link, self.length
+        current = len(length)
+        length.append(length[self.last] + 1)
+        link.append(0)
+        transitions.append({})
+
+        state = self.last
+        while state != -1 and symbol not in transitions[state]:
+            transitions[state][symbol] = current
+            state = link[state]
+
+        if state != -1:
+            target = transitions[state][symbol]
+            if length[state] + 1 == length[target]:
+                link[current] = target
+            else:
+                clone = len(length)
+                length.append(length[state] + 1)
+                link.append(link[target])
+                transitions.append(dict(transitions[target]))
+                while state != -1 and transitions[state].get(symbol) == target:
+                    transitions[state][symbol] = clone
+                    state = link[state]
+                link[target] = clone
+                link[current] = clone
+
+        self.last = current
+
+    def longest_match(self, sequence: Sequence, start: int, limit: int) -> int:
+        """Largo del prefijo más largo de sequence[start:limit] que es substring del prefijo indexado"""
+        transitions = self.transitions
+        state = 0
+        position = start
+        while position < limit:
+            state = transitions[state].get(sequence[position])
+            if state is None:
+                break
+            position += 1
+        return position - start
+
+
+def _lz76_automaton(sequence: Sequence) -> int:
+    """Parseo LZ76 con autómata de sufijos: O(n) en total"""
+    n = len(sequence)
+    automaton = _SuffixAutomaton()
+    indexed = 0
+    i = 0
+    complexity = 1
+
+    while i < n - 1:
+        while indexed < i:
+            automaton.extend(sequence[indexed])
+            indexed += 1
+        # La frase se extiende hasta j = i + L + 1, con j <= n
+        match = automaton.longest_match(sequence, i, n - 1)
+        complexity += 1
+        i += match + 1
+
+    return complexity
+
+
+def lz76_complexity(sequence: Sequence) -> int:
+    """
+    Cantidad de frases LZ76 de la secuencia (0 si está vacía)
+
+    Acepta un str o cualquier secuencia indexable de símbolos hashables.
+    """
+    if len(sequence) == 0:
+        return 0
+    if isinstance(sequence, str) and len(sequence) < AUTOMATON_THRESHOLD:
+        return _lz76_find(sequence)
+    return _lz76_automaton(sequence)
+
+
+class SlidingLZ76:
+    """
+    Complejidad LZ76 sobre una ventana deslizante de símbolos
+
+    push() es O(1); la complejidad se recalcula (en tiempo lineal) solo
+    cuando se pide y la ventana cambió desde la última consulta.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.symbols: deque = deque(maxlen=window)
+        self._cached: Optional[int] = None
+
+    def push(self, symbol: str):
+        """Agrega un símbolo (el más antiguo sale si la ventana está llena)"""
+        self.symbols.append(symbol)
+        self._cached = None
+
+    def complexity(self) -> int:
+        """Cantidad de frases LZ76 de la ventana actual"""
+        if self._cached is None:
+            self._cached = lz76_complexity(''.join(self.symbols))
+        return self._cached
+
+    def __len__(self) -> int:
+        return len(self.symbols)
@@ -0,0 +1,135 @@
+"""
+Contexto de indicadores con memoización por pasada de análisis
+
+Cuando varias estrategias analizan la misma lista de velas (analyze_market,
+MarketScanner), el contexto activo guarda cada columna e indicador calculado
+con la clave (identidad de la lista de velas, indicador, parámetros), así
+cada uno se calcula una sola vez. Fuera de un contexto activo las
+estrategias calculan directo, sin caché.
+
+Los arrays retornados se comparten entre estrategias: no deben modificarse.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+import numpy as np
+
+from .moving_averages import sma, ema
+from .oscillators import rsi, rsi_windows, macd
+from .bands import bollinger_bands
+from .patterns import candle_features, PatternCounts
+
+
+class NullIndicatorContext:
+    """Contexto sin caché: calcula cada indicador cada vez que se pide"""
+
+    def cached(self, candles: Sequence, name: str, params: tuple, compute: Callable[[], Any]) -> Any:
+        return compute()
+
+    def column(self, candles: Sequence, field: str) -> np.ndarray:
+        """Columna de las velas como array float ('open', 'high', 'low', 'close', 'volume')"""
+        values = getattr(candles, field, None)
+        if isinstance(values, np.ndarray):
+            # Series columnares (strategy_engine.CandleSeries): la columna ya existe, sin copiar
+            return values
+        return self.cached(
+            candles, 'column', (field,),
+            lambda: np.array([getattr(c, field) for c in candles], dtype=float)
+        )
+
+    def sma(self, candles: Sequence, period: int) -> np.ndarray:
+        return self.cached(candles, 'sma', (period,), lambda: sma(self.column(candles, 'close'), period))
+
+    def ema(self, candles: Sequence, period: int) -> np.ndarray:
+        return self.cached(candles, 'ema', (period,), lambda: ema(self.column(candles, 'close'), period))
+
+    def rsi(self, candles: Sequence, period: int = 14) -> np.ndarray:
+        return self.cached(candles, 'rsi', (period,), lambda: rsi(self.column(candles, 'close'), period))
+
+    def rsi_windows(self, candles: Sequence, period: int = 14, lookback: int = 200) -> Dict[str, np.ndarray]:
+        return self.cached(
+            candles, 'rsi_windows', (period, lookback),
+            lambda: rsi_windows(self.column(candles, 'close'), period, lookback)
+        )
+
+    def macd(self, candles: Sequence, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+        return self.cached(
+            candles, 'macd', (fast, slow, signal),
+            lambda: macd(self.column(candles, 'close'), fast, slow, signal)
+        )
+
+    def bollinger_bands(self, candles: Sequence, period: int = 20, std_dev: float = 2.0) -> Dict[str, np.ndarray]:
+        return self.cached(
+            candles, 'bollinger_bands', (period, std_dev),
+            lambda: bollinger_bands(self.column(candles, 'close'), period, std_dev)
+        )
+
+    def pattern_counts(self, candles: Sequence) -> PatternCounts:
+        """Flags de patrones de vela y sus sumas prefijas para toda la lista"""
+        return self.cached(candles, 'pattern_counts', (), lambda: PatternCounts(candle_features(
+            self.column(candles, 'open'), self.column(candles, 'high'),
+            self.column(candles, 'low'), self.column(candles, 'close')
+        )))
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': 0, 'misses': 0, 'entries': 0}
+
+
+class IndicatorContext(NullIndicatorContext):
+    """Contexto con memoización y contadores de aciertos/fallos"""
+
+    def __init__(self):
+        self.cache: Dict[tuple, Any] = {}
+        # Referencias a las listas de velas usadas como clave: mientras viva
+        # el contexto su id() no puede reutilizarse para otra lista
+        self.sources: Dict[int, Sequence] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def cached(self, candles: Sequence, name: str, params: tuple, compute: Callable[[], Any]) -> Any:
+        key = (id(candles), len(candles), name, params)
+        if key in self.cache:
+            self.hits += 1
+            return self.cache[key]
+
+        self.misses += 1
+        self.sources[id(candles)] = candles
+        value = compute()
+        self.cache[key] = value
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.cache)}
+
+
+_NULL_CONTEXT = NullIndicatorContext()
+_active_context: ContextVar[Optional[IndicatorContext]] = ContextVar('indicator_context', default=None)
+
+
+def current_context() -> NullIndicatorContext:
+    """Retorna el contexto activo o uno sin caché si no hay pasada de análisis en curso"""
+    return _active_context.get() or _NULL_CONTEXT
+
+
+@contextmanager
+def indicator_context(context: Optional[IndicatorContext] = None) -> Iterator[IndicatorContext]:
+    """
+    Activa un contexto de indicadores para una pasada de análisis
+
+    Si se pasa un contexto existente se reactiva con su caché (por ejemplo,
+    para compartir indicadores entre varias combinaciones de parámetros).
+
+    Uso:
+        with indicator_context() as ctx:
+            for strategy in strategies:
+                strategy.analyze(symbol, timeframe, candles)
+        print(ctx.stats())
+    """
+    if context is None:
+        context = IndicatorContext()
+    token = _active_context.set(context)
+    try:
+        yield context
+    finally:
+        _active_context.reset(token)
@@ -0,0 +1,91 @@
+"""
+Medias móviles: SMA y EMA
+Kernel batch (NumPy) + actualizador incremental O(1) con resultados idénticos
+"""
+
+from collections import deque
+from typing import Optional
+import numpy as np
+
+
+def sma(prices: np.ndarray, period: int) -> np.ndarray:
+    """
+    Simple Moving Average (NaN en las primeras period - 1 posiciones)
+
+    Usa sumas acumuladas de los precios desplazados por el primer valor,
+    así la resta de acumulados no pierde precisión con series largas.
+    """
+    values = np.asarray(prices, dtype=float)
+    result = np.full(len(values), np.nan)
+    if len(values) < period:
+        return result
+
+    shift = values[0]
+    cumsum = np.add.accumulate(np.concatenate(([0.0], values - shift)))
+    result[period - 1:] = shift + (cumsum[period:] - cumsum[:-period]) / period
+    return result
+
+
+def ema(prices: np.ndarray, period: int) -> np.ndarray:
+    """
+    Exponential Moving Average (alpha = 2 / (period + 1), semilla = primer precio)
+
+    La recursión es secuencial por definición; se recorre con floats de
+    Python para que cada paso sea exactamente el de EMA.update.
+    """
+    values = np.asarray(prices, dtype=float)
+    result = np.empty(len(values))
+    alpha = 2.0 / (period + 1)
+    keep = 1.0 - alpha
+
+    value = None
+    for i, price in enumerate(values.tolist()):
+        value = price if value is None else price * alpha + value * keep
+        result[i] = value
+
+    return result
+
+
+class SMA:
+    """Simple Moving Average incremental - mismos valores que sma()"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.shift: Optional[float] = None
+        self.cumsum = 0.0
+        self.window = deque([0.0], maxlen=period + 1)
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        """Agrega un precio y retorna la SMA o None durante el calentamiento"""
+        price = float(price)
+        if self.shift is None:
+            self.shift = price
+
+        self.cumsum += price - self.shift
+        self.window.append(self.cumsum)
+
+        if len(self.window) <= self.period:
+            return None
+
+        self.value = self.shift + (self.window[-1] - self.window[0]) / self.period
+        return self.value
+
+
+class EMA:
+    """Exponential Moving Average incremental - mismos valores que ema()"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.keep = 1.0 - self.alpha
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> float:
+        """Agrega un precio y retorna la EMA actual"""
+        price = float(price)
+        if self.value is None:
+            self.value = price
+        else:
+            self.value = price * self.alpha + self.value * self.keep
+        return self.value
@@ -0,0 +1,187 @@
+"""
+Osciladores: RSI (Wilder) y MACD
+Kernel batch (NumPy) + actualizador incremental O(1) con resultados idénticos
+"""
+
+from typing import Dict, Optional
+import numpy as np
+
+from .moving_averages import EMA, ema
+
+
+def rsi(prices: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Relative Strength Index con suavizado de Wilder
+
+    - Semilla: promedio simple de las primeras `period` ganancias/pérdidas
+    - Las primeras `period` posiciones quedan en NaN (no hay datos suficientes)
+    - RSI = 100 cuando la pérdida promedio es 0
+    """
+    values = np.asarray(prices, dtype=float)
+    result = np.full(len(values), np.nan)
+    if len(values) <= period:
+        return result
+
+    deltas = np.diff(values)
+    gains = np.where(deltas > 0, deltas, 0.0).tolist()
+    losses = np.where(deltas < 0, -deltas, 0.0).tolist()
+
+    gain_sum = 0.0
+    loss_sum = 0.0
+    for i in range(period):
+        gain_sum += gains[i]
+        loss_sum += losses[i]
+    avg_gain = gain_sum / period
+    avg_loss = loss_sum / period
+    result[period] = 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    for i in range(period, len(deltas)):
+        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+        result[i + 1] = 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    return result
+
+
+def rsi_windows(prices: np.ndarray, period: int = 14, lookback: int = 200) -> Dict[str, np.ndarray]:
+    """
+    Los dos últimos valores de rsi() para cada ventana prices[max(0, i - lookback):i + 1]
+
+    Todas las ventanas avanzan a la vez: la semilla y cada paso de Wilder
+    se calculan vectorizados entre ventanas, con las mismas operaciones que
+    rsi(), por lo que el resultado es idéntico a llamarlo ventana por ventana.
+
+    Returns:
+        Dict con 'last' (rsi[-1]) y 'prev' (rsi[-2]) por índice; NaN si la
+        ventana no tiene al menos period + 2 precios
+    """
+    values = np.asarray(prices, dtype=float)
+    n = len(values)
+    last = np.full(n, np.nan)
+    prev = np.full(n, np.nan)
+
+    bars = np.arange(n)
+    starts = np.maximum(0, bars - lookback)
+    lengths = bars - starts + 1
+    valid = lengths >= period + 2
+    if not valid.any():
+        return {'last': last, 'prev': prev}
+
+    bars = bars[valid]
+    starts = starts[valid]
+    lengths = lengths[valid]
+
+    deltas = np.diff(values)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+
+    # Semilla: suma secuencial de las primeras `period` variaciones de cada ventana
+    gain_sum = np.zeros(len(bars))
+    loss_sum = np.zeros(len(bars))
+    for j in range(period):
+        gain_sum = gain_sum + gains[starts + j]
+        loss_sum = loss_sum + losses[starts + j]
+    avg_gain = gain_sum / period
+    avg_loss = loss_sum / period
+
+    # La semilla es rsi[period]; cada paso j de Wilder produce rsi[j + 1]
+    for position in range(period, int(lengths.max())):
+        if position > period:
+            j = position - 1
+            active = position < lengths
+            index = np.minimum(starts + j, len(deltas) - 1)
+            avg_gain = np.where(active, (avg_gain * (period - 1) + gains[index]) / period, avg_gain)
+            avg_loss = np.where(active, (avg_loss * (period - 1) + losses[index]) / period, avg_loss)
+
+        is_prev = position == lengths - 2
+        is_last = position == lengths - 1
+        if not (is_prev.any() or is_last.any()):
+            continue
+
+        ratio = np.divide(avg_gain, avg_loss, out=np.zeros_like(avg_gain), where=avg_loss != 0)
+        value = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + ratio))
+        prev[bars[is_prev]] = value[is_prev]
+        last[bars[is_last]] = value[is_last]
+
+    return {'last': last, 'prev': prev}
+
+
+def macd(prices: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+    """MACD: línea (EMA rápida - EMA lenta), señal (EMA de la línea) e histograma"""
+    macd_line = ema(prices, fast) - ema(prices, slow)
+    signal_line = ema(macd_line, signal)
+
+    return {
+        'macd': macd_line,
+        'signal': signal_line,
+        'histogram': macd_line - signal_line
+    }
+
+
+class RSI:
+    """RSI de Wilder incremental - mismos valores que rsi()"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_price: Optional[float] = None
+        self.count = 0
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.avg_gain: Optional[float] = None
+        self.avg_loss: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        """Agrega un precio y retorna el RSI o None durante el calentamiento"""
+        price = float(price)
+        prev_price = self.prev_price
+        self.prev_price = price
+        if prev_price is None:
+            return None
+
+        change = price - prev_price
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        period = self.period
+
+        if self.avg_gain is None:
+            self.gain_sum += gain
+            self.loss_sum += loss
+            self.count += 1
+            if self.count < period:
+                return None
+            self.avg_gain = self.gain_sum / period
+            self.avg_loss = self.loss_sum / period
+        else:
+            self.avg_gain = (self.avg_gain * (period - 1) + gain) / period
+            self.avg_loss = (self.avg_loss * (period - 1) + loss) / period
+
+        if self.avg_loss == 0:
+            self.value = 100.0
+        else:
+            self.value = 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+        return self.value
+
+
+class MACD:
+    """MACD incremental - mismos valores que macd()"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast_ema = EMA(fast)
+        self.slow_ema = EMA(slow)
+        self.signal_ema = EMA(signal)
+        self.macd_line: Optional[float] = None
+        self.signal_line: Optional[float] = None
+        self.histogram: Optional[float] = None
+
+    def update(self, price: float) -> Dict[str, float]:
+        """Agrega un precio y retorna {'macd', 'signal', 'histogram'}"""
+        self.macd_line = self.fast_ema.update(price) - self.slow_ema.update(price)
+        self.signal_line = self.signal_ema.update(self.macd_line)
+        self.histogram = self.macd_line - self.signal_line
+
+        return {
+            'macd': self.macd_line,
+            'signal': self.signal_line,
+            'histogram': self.histogram
+        }
@@ -0,0 +1,85 @@
+"""
+Patrones de velas: flags por vela y conteos por ventana con sumas prefijas
+
+candle_features marca en una sola pasada vectorizada cada vela como
+alcista / bajista / neutra, martillo y fin de racha alcista x3.
+PatternCounts acumula esos flags: el conteo de cualquier ventana
+[start, end) (o de todas las ventanas a la vez, con arrays de índices)
+es una resta O(1).
+"""
+
+from typing import Dict, Sequence, Union
+import numpy as np
+
+
+FEATURES = ('alcista', 'bajista', 'neutra', 'martillo', 'racha_alcista')
+
+Index = Union[int, np.ndarray]
+
+
+def candle_features(opens: np.ndarray, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Flags booleanos por vela
+
+    - alcista / bajista / neutra: close > open, close < open, close == open
+    - martillo: rango > 0, cuerpo < 30% del rango, mecha inferior > 2x cuerpo
+      y mecha superior < cuerpo
+    - racha_alcista: la vela y las dos anteriores son alcistas (la racha
+      TERMINA en esa vela; False en las dos primeras)
+    """
+    opens = np.asarray(opens, dtype=float)
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    closes = np.asarray(closes, dtype=float)
+
+    alcista = closes > opens
+    bajista = closes < opens
+
+    cuerpo = np.abs(closes - opens)
+    mecha_inf = np.minimum(opens, closes) - lows
+    mecha_sup = highs - np.maximum(opens, closes)
+    rango_total = highs - lows
+    martillo = (rango_total > 0) & (cuerpo < rango_total * 0.3) & (mecha_inf > cuerpo * 2) & (mecha_sup < cuerpo)
+
+    racha_alcista = np.zeros(len(closes), dtype=bool)
+    racha_alcista[2:] = alcista[2:] & alcista[1:-1] & alcista[:-2]
+
+    return {
+        'alcista': alcista,
+        'bajista': bajista,
+        'neutra': ~alcista & ~bajista,
+        'martillo': martillo,
+        'racha_alcista': racha_alcista
+    }
+
+
+class PatternCounts:
+    """Sumas prefijas de los flags de candle_features"""
+
+    def __init__(self, features: Dict[str, np.ndarray]):
+        self.flags = features
+        self.prefix = {
+            name: np.concatenate(([0], np.cumsum(features[name], dtype=np.int64)))
+            for name in FEATURES
+        }
+
+    @classmethod
+    def from_candles(cls, candles: Sequence) -> 'PatternCounts':
+        return cls(candle_features(
+            np.array([c.open for c in candles], dtype=float),
+            np.array([c.high for c in candles], dtype=float),
+            np.array([c.low for c in candles], dtype=float),
+            np.array([c.close for c in candles], dtype=float)
+        ))
+
+    def __len__(self) -> int:
+        return len(self.prefix['alcista']) - 1
+
+    def count(self, name: str, start: Index, end: Index) -> Index:
+        """Cantidad de velas con el flag `name` en [start, end) (escalares o arrays)"""
+        prefix = self.prefix[name]
+        return prefix[end] - prefix[start]
+
+    def counts(self, start: Index, end: Index) -> Dict[str, Index]:
+        """Conteo de todos los flags en [start, end)"""
+        return {name: self.count(name, start, end) for name in FEATURES}
@@ -0,0 +1,147 @@
+"""
+Protocolo binario compacto de /ws/live (MessagePack, opt-in con ?protocol=msgpack)
+
+Cada frame es un array MessagePack cuyo primer elemento es el código:
+
+- HELLO     [0, {"version", "price_scale", "fields"}]
+- SNAPSHOT  [1, stream_id, symbol, timeframe, times, opens, highs, lows, closes, volumes]
+            histórico columnar; cada columna va delta-codificada (primer
+            valor absoluto y luego diferencias con el anterior)
+- KEYFRAME  [2, stream_id, symbol, timeframe, time, open, high, low, close, volume]
+            estado completo de la vela en construcción
+- DELTA     [3, stream_id, mask, valores...]
+            solo los campos que cambiaron desde el frame anterior del
+            stream (bits de FIELDS en mask), en valor absoluto
+- CLOSED    [4, stream_id, symbol, timeframe, time, open, high, low, close, volume]
+- MESSAGE   [5, {...}]  cualquier otro mensaje (señales, indicadores, estado)
+
+Los precios viajan como enteros: round(precio * price_scale).
+
+Los DELTA se calculan una sola vez por publicación contra el último
+estado publicado del stream y se comparten entre clientes. Un cliente
+que no recibió algún frame del stream (descartado por su cola, recién
+conectado o recién suscrito) recibe el KEYFRAME en su lugar (ver
+broadcaster.ClientConnection).
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+
+PROTOCOL_VERSION = 1
+
+HELLO = 0
+SNAPSHOT = 1
+KEYFRAME = 2
+DELTA = 3
+CLOSED = 4
+MESSAGE = 5
+
+# Orden de los campos de una vela; el bit i de mask corresponde a FIELDS[i]
+FIELDS = ("time", "open", "high", "low", "close", "volume")
+
+# 5 decimales: pares mayores (4-5) y cruces JPY (2-3)
+PRICE_SCALE = 100_000
+
+StreamKey = Tuple[str, str]
+
+
+def pack(frame: List[Any]) -> bytes:
+    return msgpack.packb(frame, use_bin_type=True)
+
+
+def _delta_column(values: List[int]) -> List[int]:
+    return [value - previous for previous, value in zip([0] + values[:-1], values)]
+
+
+class BinaryEncoder:
+    """Codificador MessagePack compartido por las conexiones binarias"""
+
+    def __init__(self, price_scale: int = PRICE_SCALE):
+        if not MSGPACK_AVAILABLE:
+            raise RuntimeError("msgpack no está instalado")
+        self.price_scale = price_scale
+        self.stream_ids: Dict[StreamKey, int] = {}
+        # Último estado publicado por stream (base de los DELTA)
+        self.last_state: Dict[StreamKey, Tuple[int, ...]] = {}
+
+    def stream_id(self, symbol: str, timeframe: str) -> int:
+        key = (symbol, timeframe)
+        if key not in self.stream_ids:
+            self.stream_ids[key] = len(self.stream_ids)
+        return self.stream_ids[key]
+
+    def _price(self, value) -> int:
+        return int(round(float(value) * self.price_scale))
+
+    def _candle_state(self, data: Dict[str, Any]) -> Tuple[int, ...]:
+        return (
+            int(data["time"]),
+            self._price(data["open"]),
+            self._price(data["high"]),
+            self._price(data["low"]),
+            self._price(data["close"]),
+            int(round(float(data.get("volume") or 0)))
+        )
+
+    def hello(self) -> bytes:
+        return pack([HELLO, {
+            "version": PROTOCOL_VERSION,
+            "price_scale": self.price_scale,
+            "fields": list(FIELDS)
+        }])
+
+    def snapshot(self, symbol: str, timeframe: str, history: List[Dict[str, Any]]) -> bytes:
+        """Histórico (lista de dicts time/open/high/low/close[/volume]) en columnas"""
+        rows = [self._candle_state(candle) for candle in history]
+        columns = [_delta_column(list(column)) for column in zip(*rows)] if rows else [[] for _ in FIELDS]
+        return pack([SNAPSHOT, self.stream_id(symbol, timeframe), symbol, timeframe, *columns])
+
+    def message(self, msg: Dict[str, Any], server_time_ms: Optional[int] = None) -> bytes:
+        if server_time_ms is not None:
+            msg = {**msg, "server_time": server_time_ms}
+        return pack([MESSAGE, msg])
+
+    def encode(self, msg: Dict[str, Any], server_time_ms: Optional[int] = None) -> Tuple[bytes, Optional[bytes]]:
+        """
+        Frame de un mensaje publicado: (frame, keyframe)
+
+        Para 'candle' el frame es el DELTA contra la publicación anterior del
+        stream y keyframe el estado completo; para el resto keyframe es None.
+        Las velas no llevan server_time (su time ya las ubica).
+        """
+        msg_type = msg.get("type")
+        if msg_type not in ("candle", "candle_closed") or not isinstance(msg.get("data"), dict):
+            return self.message(msg, server_time_ms), None
+
+        symbol, timeframe = msg.get("symbol"), msg.get("timeframe")
+        sid = self.stream_id(symbol, timeframe)
+        state = self._candle_state(msg["data"])
+
+        if msg_type == "candle_closed":
+            return pack([CLOSED, sid, symbol, timeframe, *state]), None
+
+        key = (symbol, timeframe)
+        previous = self.last_state.get(key)
+        self.last_state[key] = state
+        keyframe = pack([KEYFRAME, sid, symbol, timeframe, *state])
+
+        if previous is None:
+            return keyframe, keyframe
+
+        mask = 0
+        values = []
+        for i, (old, new) in enumerate(zip(previous, state)):
+            if old != new:
+                mask |= 1 << i
+                values.append(new)
+        return pack([DELTA, sid, mask, *values]), keyframe
+
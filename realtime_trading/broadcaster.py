@@ -0,0 +1,371 @@
+"""
+Difusión de mensajes a los clientes WebSocket con contrapresión por cliente
+
+Cada lote de mensajes se serializa a JSON una sola vez y el texto se
+encola en la cola acotada de cada cliente; una tarea escritora por
+cliente la vacía. Un cliente lento solo se atrasa a sí mismo: cuando su
+cola se llena se aplica la política de consumidor lento:
+
+- drop_oldest: descarta el mensaje más antiguo pendiente
+- coalesce: los mensajes de estado ('candle', 'indicators') reemplazan al
+  pendiente del mismo tipo/símbolo/timeframe; si la cola sigue llena se
+  descarta el más antiguo
+- disconnect: cierra la conexión del cliente
+
+Suscripciones: un cliente puede limitar lo que recibe a tópicos
+"SÍMBOLO[:TIMEFRAME[:TIPO]]" ('*' o la parte omitida = cualquiera). Las
+tablas de ruteo se indexan por (símbolo, timeframe, tipo):
+- los datos de gráfico ('candle', 'candle_closed', 'indicators') van a
+  quien esté suscrito a ese símbolo/timeframe/tipo
+- los demás mensajes con símbolo (señales, gales) van a cualquier
+  suscriptor del símbolo
+- los mensajes sin símbolo (estado del bot) van a todos
+Un cliente que nunca se suscribió recibe todo. Cada mensaje solo se
+serializa si tiene al menos un destinatario.
+
+Codecs: JSON por defecto; los clientes que negocian MessagePack reciben
+los frames compactos de binary_protocol (vela en construcción como
+DELTA, o KEYFRAME si el cliente perdió algún frame de ese stream).
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from itertools import product
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .binary_protocol import BinaryEncoder, MSGPACK_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
+
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+# Tipos cuyo último valor reemplaza al anterior (estado, no eventos)
+COALESCABLE_TYPES = ("candle", "indicators")
+
+# Mensajes ruteados por (símbolo, timeframe, tipo); el resto con símbolo solo por símbolo
+CHART_TYPES = ("candle", "candle_closed", "indicators")
+
+ANY = "*"
+
+Topic = Tuple[str, str, str]
+
+
+def parse_topic(spec: Union[str, Dict[str, Any]]) -> Topic:
+    """
+    Tópico (símbolo, timeframe, tipo) desde "EURUSD:5m:candle" o
+    {"symbol": ..., "timeframe": ..., "type": ...}; lo omitido es '*'
+
+    Raises:
+        ValueError: si no tiene símbolo o tiene más de 3 partes
+    """
+    if isinstance(spec, dict):
+        parts = [spec.get("symbol"), spec.get("timeframe"), spec.get("type")]
+    elif isinstance(spec, str):
+        parts = spec.split(":")
+    else:
+        raise ValueError(f"Tópico inválido: {spec!r}")
+
+    if len(parts) > 3 or not parts[0]:
+        raise ValueError(f"Tópico inválido: {spec!r} (requiere símbolo o '*')")
+
+    parts = [str(part).strip() if part else ANY for part in parts] + [ANY] * (3 - len(parts))
+    return parts[0].upper(), parts[1], parts[2]
+
+
+def format_topic(topic: Topic) -> str:
+    return ":".join(topic)
+
+
+def topic_matches(topic: Topic, msg: Dict[str, Any]) -> bool:
+    """True si un mensaje con símbolo debe llegar a un suscriptor del tópico"""
+    symbol, timeframe, msg_type = topic
+    if symbol not in (ANY, msg.get("symbol")):
+        return False
+    if msg.get("type") not in CHART_TYPES:
+        return True
+    return timeframe in (ANY, msg.get("timeframe")) and msg_type in (ANY, msg.get("type"))
+
+
+def encode_message(msg: Dict[str, Any], server_time_ms: int) -> str:
+    """JSON del mensaje con server_time (mismo formato compacto que send_json)"""
+    return json.dumps({**msg, "server_time": server_time_ms}, separators=(",", ":"))
+
+
+def coalesce_key(msg: Dict[str, Any]) -> Optional[Tuple]:
+    """Clave de reemplazo del mensaje (None si no se puede coalescer)"""
+    if msg.get("type") not in COALESCABLE_TYPES:
+        return None
+    return (msg.get("type"), msg.get("symbol"), msg.get("timeframe"))
+
+
+class Frame:
+    """Mensaje publicado, serializado una vez por codec que lo necesite"""
+    __slots__ = ("key", "text", "binary", "keyframe")
+
+    def __init__(self, key: Optional[Tuple], text: Optional[str] = None,
+                 binary: Optional[bytes] = None, keyframe: Optional[bytes] = None):
+        self.key = key
+        self.text = text
+        self.binary = binary
+        self.keyframe = keyframe
+
+
+class ClientConnection:
+    """Cola acotada de frames pendientes y tarea escritora de un cliente"""
+
+    def __init__(self, websocket, broadcaster: "Broadcaster", binary: bool = False):
+        self.websocket = websocket
+        self.broadcaster = broadcaster
+        self.binary = binary
+        # Streams cuyo último frame recibió el cliente (los DELTA solo valen para ellos)
+        self.synced: Set[Tuple] = set()
+        self.pending: Deque[Frame] = deque()
+        self.wakeup = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        # None = sin suscripciones (recibe todo)
+        self.topics: Optional[Set[Topic]] = None
+
+    def start(self):
+        """Inicia la escritura (los frames encolados antes se envían en orden)"""
+        if self.writer is None and not self.closed:
+            self.writer = asyncio.create_task(self._write_loop())
+
+    def offer(self, frames: List[Frame]):
+        """Encola frames ya serializados aplicando la política si la cola se llena"""
+        policy = self.broadcaster.policy
+        max_queue = self.broadcaster.max_queue
+
+        for frame in frames:
+            if self.closed:
+                return
+
+            if policy == "coalesce" and frame.key is not None and self._replace(frame):
+                continue
+
+            if len(self.pending) >= max_queue:
+                if policy == "disconnect":
+                    logger.warning(f"Cliente lento desconectado ({len(self.pending)} mensajes pendientes)")
+                    self.close(close_socket=True)
+                    return
+                self.synced.discard(self.pending.popleft().key)
+                self.dropped += 1
+
+            self.pending.append(frame)
+
+        self.wakeup.set()
+
+    def send(self, msg: Dict[str, Any]):
+        """Encola un mensaje solo para este cliente (respuestas de protocolo)"""
+        server_time_ms = int(time.time() * 1000)
+        if self.binary:
+            self.offer([Frame(None, binary=self.broadcaster.encoder.message(msg, server_time_ms))])
+        else:
+            self.offer([Frame(None, text=encode_message(msg, server_time_ms))])
+
+    async def send_direct(self, msg: Dict[str, Any]):
+        """Envía sin pasar por la cola (snapshot inicial, antes de start())"""
+        if not self.binary:
+            await self.websocket.send_json(msg)
+        elif msg.get("type") == "init_candles":
+            await self.websocket.send_bytes(
+                self.broadcaster.encoder.snapshot(msg["symbol"], msg["timeframe"], msg["data"])
+            )
+        else:
+            await self.websocket.send_bytes(self.broadcaster.encoder.message(msg))
+
+    def wants(self, msg: Dict[str, Any]) -> bool:
+        """Si el mensaje corresponde a las suscripciones del cliente"""
+        if self.topics is None or msg.get("symbol") is None:
+            return True
+        return any(topic_matches(topic, msg) for topic in self.topics)
+
+    def _replace(self, frame: Frame) -> bool:
+        for i in range(len(self.pending) - 1, -1, -1):
+            if self.pending[i].key == frame.key:
+                self.pending[i] = frame
+                self.synced.discard(frame.key)
+                self.coalesced += 1
+                return True
+        return False
+
+    async def _write_loop(self):
+        try:
+            while not self.closed:
+                if not self.pending:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+                    continue
+                frame = self.pending.popleft()
+                if not self.binary:
+                    await self.websocket.send_text(frame.text)
+                elif frame.keyframe is not None and frame.key not in self.synced:
+                    self.synced.add(frame.key)
+                    await self.websocket.send_bytes(frame.keyframe)
+                else:
+                    await self.websocket.send_bytes(frame.binary)
+                self.sent += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"Error enviando a cliente: {e}")
+        finally:
+            self.close()
+
+    def close(self, close_socket: bool = False):
+        """Descarta lo pendiente, detiene la escritura y quita al cliente del broadcaster"""
+        if self.closed:
+            return
+        self.closed = True
+        self.pending.clear()
+        self.wakeup.set()
+        self.broadcaster.remove(self.websocket)
+
+        if self.writer is not None and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+        if close_socket:
+            asyncio.create_task(self._close_socket())
+
+    async def _close_socket(self):
+        try:
+            await self.websocket.close(code=1013)
+        except Exception:
+            pass
+
+
+class Broadcaster:
+    """Clientes conectados y difusión serializar-una-vez con una cola por cliente"""
+
+    def __init__(self, max_queue: int = 256, policy: str = "drop_oldest"):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Política de consumidor lento inválida: {policy}")
+        self.max_queue = max_queue
+        self.policy = policy
+        self.connections: Dict[Any, ClientConnection] = {}
+        # Tablas de ruteo: clientes sin filtro y clientes por tópico suscrito
+        self.unfiltered: Set[ClientConnection] = set()
+        self.routes: Dict[Topic, Set[ClientConnection]] = {}
+        self.encoder = BinaryEncoder() if MSGPACK_AVAILABLE else None
+
+    def __len__(self) -> int:
+        return len(self.connections)
+
+    def register(self, websocket, binary: bool = False) -> ClientConnection:
+        """
+        Registra un cliente. Los mensajes difundidos se encolan desde ya,
+        pero no se envían hasta connection.start(): así el snapshot inicial
+        que se manda directo por el websocket llega primero.
+
+        binary pide el protocolo MessagePack; sin msgpack instalado el
+        cliente queda en JSON (ver connection.binary).
+        """
+        connection = ClientConnection(websocket, self, binary=binary and self.encoder is not None)
+        self.connections[websocket] = connection
+        self.unfiltered.add(connection)
+        return connection
+
+    def remove(self, websocket):
+        connection = self.connections.pop(websocket, None)
+        if connection is None:
+            return
+        self.unfiltered.discard(connection)
+        self._unroute(connection, connection.topics or ())
+        if not connection.closed:
+            connection.close()
+
+    def subscribe(self, connection: ClientConnection, topics: Iterable[Topic]):
+        """Agrega tópicos al cliente (desde ese momento deja de recibir todo)"""
+        if connection.topics is None:
+            connection.topics = set()
+            self.unfiltered.discard(connection)
+        connection.synced.clear()
+        for topic in topics:
+            connection.topics.add(topic)
+            self.routes.setdefault(topic, set()).add(connection)
+
+    def unsubscribe(self, connection: ClientConnection, topics: Optional[Iterable[Topic]] = None):
+        """Quita tópicos (todos si no se indican); sin tópicos solo recibe mensajes globales"""
+        current = connection.topics or set()
+        removed = set(current) if topics is None else current & set(topics)
+        self._unroute(connection, removed)
+        connection.topics = current - removed
+        # Aunque nunca se haya suscrito, tras un unsubscribe ya no recibe todo
+        self.unfiltered.discard(connection)
+        connection.synced.clear()
+
+    def _unroute(self, connection: ClientConnection, topics: Iterable[Topic]):
+        for topic in topics:
+            subscribers = self.routes.get(topic)
+            if subscribers is None:
+                continue
+            subscribers.discard(connection)
+            if not subscribers:
+                del self.routes[topic]
+
+    def recipients(self, msg: Dict[str, Any]) -> Set[ClientConnection]:
+        """Clientes que deben recibir el mensaje según las tablas de ruteo"""
+        symbol = msg.get("symbol")
+        if symbol is None:
+            return set(self.connections.values())
+
+        recipients = set(self.unfiltered)
+        msg_type = msg.get("type")
+        if msg_type in CHART_TYPES:
+            for key in product((symbol, ANY), (msg.get("timeframe"), ANY), (msg_type, ANY)):
+                recipients.update(self.routes.get(key, ()))
+        else:
+            for (topic_symbol, _, _), subscribers in self.routes.items():
+                if topic_symbol in (symbol, ANY):
+                    recipients.update(subscribers)
+        return recipients
+
+    async def publish(self, messages: List[Dict[str, Any]]):
+        """Serializa los mensajes una vez y los encola para todos los clientes"""
+        if not self.connections or not messages:
+            return
+
+        # Timestamp del servidor (UTC) común al lote, para sincronización
+        server_time_ms = int(time.time() * 1000)
+        frames: Dict[ClientConnection, List[Frame]] = {}
+
+        for msg in messages:
+            recipients = self.recipients(msg)
+            if not recipients:
+                continue
+
+            frame = Frame(coalesce_key(msg))
+            if any(not connection.binary for connection in recipients):
+                frame.text = encode_message(msg, server_time_ms)
+            if any(connection.binary for connection in recipients):
+                frame.binary, frame.keyframe = self.encoder.encode(msg, server_time_ms)
+
+            for connection in recipients:
+                frames.setdefault(connection, []).append(frame)
+
+        for connection, connection_frames in frames.items():
+            connection.offer(connection_frames)
+
+    async def close_all(self):
+        for connection in list(self.connections.values()):
+            connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        connections = list(self.connections.values())
+        return {
+            "clients": len(connections),
+            "unfiltered_clients": len(self.unfiltered),
+            "binary_clients": sum(1 for c in connections if c.binary),
+            "topics": len(self.routes),
+            "policy": self.policy,
+            "max_queue": self.max_queue,
+            "pending": sum(len(c.pending) for c in connections),
+            "max_pending": max((len(c.pending) for c in connections), default=0),
+            "dropped": sum(c.dropped for c in connections),
+            "coalesced": sum(c.coalesced for c in connections)
+        }
@@ -171,3 +171,59 @@ class MultiTimeframeAggregator:
                 closed_candles[timeframe] = closed
         
         return closed_candles
+
+
+class CandleHistory:
+    """
+    Anillo de velas cerradas por símbolo (ordenadas por start_ts)
+    
+    Se hidrata una vez desde la BD y crece con las velas que cierra el
+    agregador; merge() reconcilia con la BD (sus velas reemplazan a las
+    construidas desde ticks con el mismo start_ts). Ninguna operación toca
+    la BD: se usan desde el loop de asyncio sin bloquear.
+    """
+    def __init__(self, max_history: int = 300):
+        self.max_history = max_history
+        self.rings: Dict[str, Deque[Candle]] = {}
+    
+    def _ring(self, symbol: str) -> Deque[Candle]:
+        if symbol not in self.rings:
+            self.rings[symbol] = deque(maxlen=self.max_history)
+        return self.rings[symbol]
+    
+    def append(self, symbol: str, candle: Candle):
+        """Agrega una vela cerrada (si ya existe su start_ts la reemplaza)"""
+        ring = self._ring(symbol)
+        
+        if not ring or candle.start_ts > ring[-1].start_ts:
+            ring.append(candle)
+            return
+        
+        for i in range(len(ring) - 1, -1, -1):
+            if ring[i].start_ts == candle.start_ts:
+                ring[i] = candle
+                return
+            if ring[i].start_ts < candle.start_ts:
+                break
+        
+        # Vela vieja que no está en el anillo: reordenar
+        self.merge(symbol, [candle])
+    
+    def merge(self, symbol: str, candles: List[Candle]):
+        """Une velas (p. ej. de la BD) con el anillo; ganan las nuevas en start_ts repetidos"""
+        by_ts = {c.start_ts: c for c in self._ring(symbol)}
+        for candle in candles:
+            by_ts[candle.start_ts] = candle
+        
+        merged = [by_ts[ts] for ts in sorted(by_ts)]
+        self.rings[symbol] = deque(merged[-self.max_history:], maxlen=self.max_history)
+    
+    def get_candles(self, symbol: str, limit: Optional[int] = None) -> List[Candle]:
+        """Últimas `limit` velas del símbolo (todas si no se indica), más antiguas primero"""
+        candles = list(self.rings.get(symbol, ()))
+        if limit is not None:
+            candles = candles[-limit:]
+        return candles
+    
+    def count(self, symbol: str) -> int:
+        return len(self.rings.get(symbol, ()))
@@ -24,6 +24,19 @@ class Settings:
     # Chart settings
     MAX_CANDLES_HISTORY: int = 200
     
+    # Historial M5 en memoria para señales (se reconcilia con la BD en segundo plano)
+    SIGNAL_HISTORY_SIZE: int = 300
+    SIGNAL_HISTORY_RECONCILE_SECONDS: int = 60
+    
+    # Broadcast a clientes: cola por cliente y política de consumidor lento
+    # (drop_oldest | coalesce | disconnect)
+    BROADCAST_QUEUE_SIZE: int = 256
+    SLOW_CONSUMER_POLICY: str = os.environ.get('SLOW_CONSUMER_POLICY', 'drop_oldest')
+    
+    # Frecuencia máxima de actualizaciones de vela en construcción/indicadores
+    # por símbolo y timeframe (0 = enviar cada tick)
+    CANDLE_UPDATE_MAX_HZ: float = float(os.environ.get('CANDLE_UPDATE_MAX_HZ', '4'))
+    
     @property
     def TWELVEDATA_API_KEY(self) -> str:
         """Lee la API key en tiempo de ejecución desde variables de entorno"""
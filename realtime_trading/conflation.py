@@ -0,0 +1,110 @@
+"""
+Conflación de ticks para el broadcast en tiempo real
+
+Cada tick genera mensajes de estado ('candle' en construcción por
+timeframe e 'indicators'). TickConflator guarda solo el último por
+(tipo, símbolo, timeframe) y los publica a una frecuencia máxima
+(max_hz); los intermedios se descartan y se cuentan como coalescidos.
+
+Los eventos (velas cerradas, señales) salen de inmediato, precedidos por
+el estado pendiente de su símbolo para conservar el orden que ve el
+cliente: la vela en construcción nunca llega después de su cierre.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .broadcaster import COALESCABLE_TYPES
+
+logger = logging.getLogger(__name__)
+
+
+# Mensajes de estado: el último reemplaza a los anteriores
+CONFLATED_TYPES = COALESCABLE_TYPES
+
+Publish = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+class TickConflator:
+    """Último mensaje de estado por (tipo, símbolo, timeframe), publicado a max_hz"""
+
+    def __init__(self, publish: Publish, max_hz: float = 4.0):
+        self.publish = publish
+        self.max_hz = max_hz
+        self.pending: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self.received = 0
+        self.coalesced = 0
+        self.published = 0
+        self.flushes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_hz > 0
+
+    async def submit(self, symbol: str, messages: List[Dict[str, Any]]):
+        """
+        Mensajes generados por un tick: los de estado quedan pendientes hasta
+        el próximo flush; si hay eventos se publican ya, junto con el estado
+        pendiente del símbolo.
+        """
+        if not self.enabled:
+            await self.publish(messages)
+            return
+
+        events = []
+        for msg in messages:
+            if msg.get("type") not in CONFLATED_TYPES:
+                events.append(msg)
+                continue
+
+            key = (msg.get("type"), msg.get("symbol"), msg.get("timeframe"))
+            self.received += 1
+            if key in self.pending:
+                self.coalesced += 1
+            self.pending[key] = msg
+
+        if events:
+            await self._publish(self._take(symbol) + events)
+
+    def _take(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Retira el estado pendiente (de un símbolo o de todos)"""
+        if symbol is None:
+            messages = list(self.pending.values())
+            self.pending.clear()
+            return messages
+
+        keys = [key for key in self.pending if key[1] == symbol]
+        return [self.pending.pop(key) for key in keys]
+
+    async def _publish(self, messages: List[Dict[str, Any]]):
+        self.published += sum(1 for msg in messages if msg.get("type") in CONFLATED_TYPES)
+        await self.publish(messages)
+
+    async def flush(self):
+        """Publica todo el estado pendiente"""
+        if self.pending:
+            self.flushes += 1
+            await self._publish(self._take())
+
+    async def run(self):
+        """Loop de flush a max_hz (tarea en segundo plano)"""
+        if not self.enabled:
+            return
+        interval = 1.0 / self.max_hz
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error publicando actualizaciones conflacionadas: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_hz": self.max_hz,
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "published": self.published,
+            "flushes": self.flushes,
+            "pending": len(self.pending)
+        }
@@ -1,145 +1,50 @@
 """
 Indicadores técnicos incrementales
 """
-from typing import Optional, List
-from collections import deque
+from typing import Optional
 
+import indicators
 
-class EMA:
-    """Exponential Moving Average - Cálculo incremental"""
+
+class EMA(indicators.EMA):
+    """Exponential Moving Average - Cálculo incremental (indicators.EMA)"""
     
-    def __init__(self, period: int):
-        self.period = period
-        self.multiplier = 2 / (period + 1)
-        self.ema: Optional[float] = None
-        self.initialized = False
+    @property
+    def ema(self) -> Optional[float]:
+        return self.value
     
-    def update(self, price: float) -> Optional[float]:
-        """
-        Actualiza EMA con nuevo precio
-        
-        Returns:
-            Valor actual de EMA o None si aún no está inicializado
-        """
-        if self.ema is None:
-            # Primera inicialización con el precio
-            self.ema = price
-            self.initialized = True
-        else:
-            # Fórmula incremental: EMA = Price(t) * k + EMA(y) * (1 – k)
-            self.ema = price * self.multiplier + self.ema * (1 - self.multiplier)
-        
-        return self.ema
+    @property
+    def initialized(self) -> bool:
+        return self.value is not None
     
     def get_value(self) -> Optional[float]:
         """Retorna el valor actual de EMA"""
-        return self.ema
+        return self.value
 
 
-class RSI:
-    """Relative Strength Index - Cálculo incremental"""
-    
-    def __init__(self, period: int = 14):
-        self.period = period
-        self.prices = deque(maxlen=period + 1)
-        self.gains = deque(maxlen=period)
-        self.losses = deque(maxlen=period)
-        self.avg_gain: Optional[float] = None
-        self.avg_loss: Optional[float] = None
-    
-    def update(self, price: float) -> Optional[float]:
-        """
-        Actualiza RSI con nuevo precio
-        
-        Returns:
-            Valor RSI (0-100) o None si no hay suficientes datos
-        """
-        self.prices.append(price)
-        
-        if len(self.prices) < 2:
-            return None
-        
-        # Calcular cambio
-        change = self.prices[-1] - self.prices[-2]
-        gain = max(change, 0)
-        loss = max(-change, 0)
-        
-        self.gains.append(gain)
-        self.losses.append(loss)
-        
-        if len(self.gains) < self.period:
-            return None
-        
-        # Primera vez: promedio simple
-        if self.avg_gain is None:
-            self.avg_gain = sum(self.gains) / self.period
-            self.avg_loss = sum(self.losses) / self.period
-        else:
-            # Promedio móvil suavizado (Wilder's smoothing)
-            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
-            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
-        
-        if self.avg_loss == 0:
-            return 100.0
-        
-        rs = self.avg_gain / self.avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
+class RSI(indicators.RSI):
+    """Relative Strength Index - Cálculo incremental (indicators.RSI, Wilder)"""
     
     def get_value(self) -> Optional[float]:
         """Retorna el último valor calculado de RSI"""
-        if len(self.gains) < self.period or self.avg_gain is None:
-            return None
-        
-        if self.avg_loss == 0:
-            return 100.0
-        
-        rs = self.avg_gain / self.avg_loss
-        return 100 - (100 / (1 + rs))
+        return self.value
 
 
-class MACD:
-    """MACD (Moving Average Convergence Divergence) - Cálculo incremental"""
+class MACD(indicators.MACD):
+    """MACD (Moving Average Convergence Divergence) - Cálculo incremental (indicators.MACD)"""
     
     def __init__(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9):
-        self.fast_ema = EMA(fast_period)
-        self.slow_ema = EMA(slow_period)
-        self.signal_ema = EMA(signal_period)
-        self.macd_line: Optional[float] = None
-        self.signal_line: Optional[float] = None
-        self.histogram: Optional[float] = None
+        super().__init__(fast_period, slow_period, signal_period)
     
     def update(self, price: float) -> Optional[dict]:
         """
         Actualiza MACD con nuevo precio
         
         Returns:
-            Dict {macd: float, signal: float, histogram: float} o None
+            Dict {macd: float, signal: float, histogram: float} redondeado a 5 decimales
         """
-        fast_val = self.fast_ema.update(price)
-        slow_val = self.slow_ema.update(price)
-        
-        if fast_val is None or slow_val is None:
-            return None
-        
-        # MACD line = EMA rápida - EMA lenta
-        self.macd_line = fast_val - slow_val
-        
-        # Línea de señal = EMA del MACD
-        signal_val = self.signal_ema.update(self.macd_line)
-        
-        if signal_val is None:
-            return None
-        
-        self.signal_line = signal_val
-        self.histogram = self.macd_line - self.signal_line
-        
-        return {
-            "macd": round(self.macd_line, 5),
-            "signal": round(self.signal_line, 5),
-            "histogram": round(self.histogram, 5)
-        }
+        super().update(price)
+        return self.get_value()
     
     def get_value(self) -> Optional[dict]:
         """Retorna los valores actuales de MACD"""
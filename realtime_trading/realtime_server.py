@@ -6,7 +6,7 @@ import json
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, Depends, HTTPException, Header
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, List, Set
+from typing import Dict, List
 import time
 import uuid
 import sys
@@ -19,10 +19,12 @@ from database import get_db, TradingPair, SignalBotConfig, SignalBotSelectedPair
 from datetime import datetime, timezone, timedelta
 
 from .config import settings
-from .candles import CandleStore, MultiTimeframeAggregator, Candle
+from .candles import CandleStore, MultiTimeframeAggregator, Candle, CandleHistory
 from .indicators import IndicatorEngine
 from .price_poller import TwelveDataPoller
 from .history_loader import load_historical_candles
+from .broadcaster import Broadcaster, ClientConnection, parse_topic, format_topic
+from .conflation import TickConflator
 from strategies.tablero_binarias_strategy import TableroBinariasStrategy
 
 
@@ -293,6 +295,10 @@ class TradingState:
             self.aggregator.add_timeframe(symbol, 5, max_history=500)  # 5m
             self.aggregator.add_timeframe(symbol, 15, max_history=500)  # 15m
         
+        # Historial M5 de señales: velas reales de la BD + velas cerradas desde ticks
+        self.m5_history = CandleHistory(max_history=settings.SIGNAL_HISTORY_SIZE)
+        self.history_reconcile_task: asyncio.Task = None
+        
         # Motor de indicadores por símbolo
         self.indicators: Dict[str, IndicatorEngine] = {}
         for symbol in self.symbols:
@@ -312,8 +318,15 @@ class TradingState:
         # Señales activas {symbol: {direction, confidence, expires_at, sequence_id}}
         self.active_signals: Dict[str, dict] = {}
         
-        # Clientes WebSocket conectados
-        self.clients: Set[WebSocket] = set()
+        # Clientes WebSocket conectados (cola y tarea escritora por cliente)
+        self.broadcaster = Broadcaster(
+            max_queue=settings.BROADCAST_QUEUE_SIZE,
+            policy=settings.SLOW_CONSUMER_POLICY
+        )
+        
+        # Conflación de ticks: vela en construcción e indicadores a lo sumo a CANDLE_UPDATE_MAX_HZ
+        self.conflator = TickConflator(self.broadcaster.publish, max_hz=settings.CANDLE_UPDATE_MAX_HZ)
+        self.conflator_task: asyncio.Task = None
         
         # Cliente Twelve Data (Poller REST API)
         self.twelvedata_client: TwelveDataPoller = None
@@ -491,44 +504,22 @@ async def generate_signal_if_closed(symbol: str, closed_candles: Dict, tick_ts:
     if symbol in state.active_signals:
         return None
     
-    # Obtener últimas 100 velas M5 REALES de la BD (Twelve Data Time Series)
+    # Últimas 100 velas M5 REALES (Twelve Data) + la vela recién cerrada desde ticks,
+    # desde el historial en memoria: el loop nunca consulta la BD al cerrar vela
     tf_key = f"{symbol}_5m"
-    real_candles_from_db = get_real_candles_from_db(symbol, "M5", limit=100)
-    
-    if len(real_candles_from_db) < 10:
-        return None
+    candles_history = state.m5_history.get_candles(symbol, limit=101)
     
-    # Obtener vela ACTUAL construida desde ticks (en formación)
-    if tf_key not in state.aggregator.stores:
+    if len(candles_history) < 11:
         return None
     
-    store = state.aggregator.stores[tf_key]
-    current_candle_from_ticks = store.candles[-1] if store.candles else None
-    
-    if not current_candle_from_ticks:
-        return None
-    
-    # 3. Combinar: Velas reales (historial) + Vela actual (en formación)
-    candles_history = real_candles_from_db + [current_candle_from_ticks]
-    
     # 4. Ejecutar estrategia con velas correctas
     strategy = state.strategies.get(tf_key)
     if not strategy:
         return None
     
     # Convertir velas a formato Strategy
-    from strategy_engine import Candle as StrategyCandle
-    strategy_candles = [
-        StrategyCandle(
-            time=c.start_ts,
-            open=c.open,
-            high=c.high,
-            low=c.low,
-            close=c.close,
-            volume=c.volume
-        )
-        for c in candles_history
-    ]
+    from strategy_engine import CandleSeries
+    strategy_candles = CandleSeries.from_candles(candles_history, time_field='start_ts')
     
     # Calcular indicadores
     indicators = strategy.calculate_indicators(strategy_candles)
@@ -599,7 +590,7 @@ async def generate_signal_if_closed(symbol: str, closed_candles: Dict, tick_ts:
     }
     
     await broadcast([broadcast_data])
-    logger.info(f"Señal enviada a {len(state.clients)} clientes conectados")
+    logger.info(f"Señal enviada a {len(state.broadcaster)} clientes conectados")
     
     return signal_data
 
@@ -653,6 +644,10 @@ async def on_price_tick(symbol: str, price: float, tick_ts: int):
     # Procesar tick en todos los timeframes
     closed_candles = state.aggregator.process_tick(symbol, price, tick_ts)
     
+    # Registrar la vela M5 cerrada en el historial de señales
+    if closed_candles.get("5m"):
+        state.m5_history.append(symbol, closed_candles["5m"])
+    
     # Actualizar OHLC de vela M5 actual en señal activa
     if symbol in state.active_signals:
         tf_key_m5 = f"{symbol}_5m"
@@ -764,32 +759,18 @@ async def on_price_tick(symbol: str, price: float, tick_ts: int):
     if signal_msg:
         messages.append(signal_msg)
     
-    # Broadcast a todos los clientes
-    await broadcast(messages)
+    # Broadcast: velas cerradas y señales de inmediato, estado conflacionado
+    await state.conflator.submit(symbol, messages)
 
 
 async def broadcast(messages: List[dict]):
-    """Envía mensajes a todos los clientes conectados"""
-    if not state.clients:
-        return
-    
-    # Agregar timestamp del servidor (UTC) a cada mensaje
-    server_time_ms = int(time.time() * 1000)
-    
-    disconnected = set()
-    
-    for client in state.clients:
-        try:
-            for msg in messages:
-                # Agregar server_time a cada mensaje para sincronización
-                msg_with_time = {**msg, "server_time": server_time_ms}
-                await client.send_json(msg_with_time)
-        except Exception as e:
-            logger.warning(f"Error enviando a cliente: {e}")
-            disconnected.add(client)
+    """
+    Envía mensajes a todos los clientes conectados
     
-    # Limpiar clientes desconectados
-    state.clients -= disconnected
+    Cada mensaje se serializa una vez (con server_time) y se encola por
+    cliente; un cliente lento no retrasa al resto (ver broadcaster).
+    """
+    await state.broadcaster.publish(messages)
 
 
 async def load_historical_data():
@@ -863,6 +844,33 @@ async def load_historical_data():
     logger.info("✅ Datos históricos cargados completamente")
 
 
+async def hydrate_signal_history():
+    """Carga el historial M5 de señales desde la BD (en un hilo, sin bloquear el loop)"""
+    for symbol in state.symbols:
+        candles = await asyncio.to_thread(get_real_candles_from_db, symbol, "M5", settings.SIGNAL_HISTORY_SIZE)
+        state.m5_history.merge(symbol, candles)
+        logger.info(f"📚 Historial M5 de señales {symbol}: {state.m5_history.count(symbol)} velas")
+
+
+async def reconcile_signal_history():
+    """
+    Reconciliación periódica del historial M5 con la BD
+    
+    Las velas de la BD (Twelve Data Time Series) reemplazan a las
+    construidas desde ticks con el mismo start_ts y completan huecos.
+    """
+    await hydrate_signal_history()
+    
+    while True:
+        await asyncio.sleep(settings.SIGNAL_HISTORY_RECONCILE_SECONDS)
+        for symbol in state.symbols:
+            try:
+                candles = await asyncio.to_thread(get_real_candles_from_db, symbol, "M5", 100)
+                state.m5_history.merge(symbol, candles)
+            except Exception as e:
+                logger.error(f"Error reconciliando historial M5 de {symbol}: {e}")
+
+
 @app.on_event("startup")
 async def startup_event():
     """Inicia el servidor FastAPI - RÁPIDO para que Replit detecte el puerto"""
@@ -887,6 +895,8 @@ async def startup_event():
     # Cargar datos históricos y iniciar polling EN SEGUNDO PLANO
     # Esto permite que Uvicorn abra el puerto inmediatamente
     asyncio.create_task(load_historical_data())
+    state.history_reconcile_task = asyncio.create_task(reconcile_signal_history())
+    state.conflator_task = asyncio.create_task(state.conflator.run())
     
     # Iniciar tarea de polling (sin esperar a que termine la carga histórica)
     state.twelvedata_task = asyncio.create_task(state.twelvedata_client.run())
@@ -905,21 +915,101 @@ async def shutdown_event():
     if state.twelvedata_task:
         state.twelvedata_task.cancel()
     
+    if state.history_reconcile_task:
+        state.history_reconcile_task.cancel()
+    
+    if state.conflator_task:
+        state.conflator_task.cancel()
+    
+    await state.broadcaster.close_all()
+    
     logger.info("Servidor detenido")
 
 
+def handle_client_message(connection: ClientConnection, data: str):
+    """
+    Protocolo de suscripción de /ws/live
+    
+    {"action": "subscribe", "topics": ["EURUSD:5m", "EURJPY:1m:candle"]}
+    {"action": "unsubscribe", "topics": [...]}  (sin topics = todos)
+    
+    Responde {"type": "subscriptions", "topics": [...]} con los tópicos
+    vigentes o {"type": "error", "message": ...}. Texto que no es JSON
+    (p. ej. pings) se ignora.
+    """
+    try:
+        request = json.loads(data)
+    except ValueError:
+        return
+    
+    if not isinstance(request, dict) or request.get("action") not in ("subscribe", "unsubscribe"):
+        return
+    
+    try:
+        topics = request.get("topics")
+        if topics is not None:
+            if not isinstance(topics, list):
+                raise ValueError("'topics' debe ser una lista")
+            topics = [parse_topic(topic) for topic in topics]
+    except ValueError as e:
+        connection.send({"type": "error", "message": str(e)})
+        return
+    
+    if request["action"] == "subscribe":
+        state.broadcaster.subscribe(connection, topics or [])
+    else:
+        state.broadcaster.unsubscribe(connection, topics)
+    
+    connection.send({
+        "type": "subscriptions",
+        "topics": sorted(format_topic(topic) for topic in connection.topics or [])
+    })
+
+
 @app.websocket("/ws/live")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket para clientes frontend"""
+    """
+    WebSocket para clientes frontend
+    
+    Con ?topics=EURUSD:5m,EURJPY:5m el cliente queda suscrito desde la
+    conexión y el snapshot inicial se limita a esos tópicos; sin el
+    parámetro recibe todo hasta que envíe un subscribe.
+    
+    Con ?protocol=msgpack recibe frames binarios (ver binary_protocol):
+    histórico columnar y deltas de OHLC en las velas en construcción.
+    """
     await websocket.accept()
-    state.clients.add(websocket)
+    # Los broadcasts se encolan desde ahora y se envían tras el snapshot inicial
+    wants_binary = websocket.query_params.get("protocol") == "msgpack"
+    connection = state.broadcaster.register(websocket, binary=wants_binary)
     
-    logger.info(f"Cliente conectado - Total: {len(state.clients)}")
+    logger.info(f"Cliente conectado ({'msgpack' if connection.binary else 'json'}) - Total: {len(state.broadcaster)}")
     
     try:
-        # Enviar histórico inicial para todos los timeframes
+        if connection.binary:
+            await websocket.send_bytes(state.broadcaster.encoder.hello())
+        elif wants_binary:
+            await websocket.send_json({
+                "type": "protocol",
+                "codec": "json",
+                "message": "msgpack no disponible en el servidor"
+            })
+        
+        topics_param = websocket.query_params.get("topics")
+        if topics_param:
+            try:
+                topics = [parse_topic(topic) for topic in topics_param.split(",") if topic.strip()]
+            except ValueError as e:
+                await websocket.close(code=1008, reason=str(e))
+                state.broadcaster.remove(websocket)
+                return
+            state.broadcaster.subscribe(connection, topics)
+        
+        # Enviar histórico inicial de los timeframes suscritos (todos por defecto)
         for tf_key, store in state.aggregator.stores.items():
             timeframe = tf_key.split('_')[1]
+            if not connection.wants({"type": "candle", "symbol": store.symbol, "timeframe": timeframe}):
+                continue
             history = store.get_history()
             
             if history:
@@ -952,7 +1042,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 
                 if valid_history:
                     logger.info(f"Enviando {len(valid_history)} velas {timeframe}")
-                    await websocket.send_json({
+                    await connection.send_direct({
                         "type": "init_candles",
                         "symbol": store.symbol,
                         "timeframe": timeframe,
@@ -962,10 +1052,10 @@ async def websocket_endpoint(websocket: WebSocket):
                     logger.warning(f"No hay velas válidas en {timeframe}")
         
         # Enviar indicadores iniciales (solo para EURUSD por compatibilidad)
-        if "EURUSD" in state.indicators:
+        if "EURUSD" in state.indicators and connection.wants({"type": "indicators", "symbol": "EURUSD", "timeframe": "1m"}):
             indicators_values = state.indicators["EURUSD"].get_values()
             if indicators_values:
-                await websocket.send_json({
+                await connection.send_direct({
                     "type": "init_indicators",
                     "symbol": "EURUSD",
                     "data": indicators_values
@@ -976,7 +1066,7 @@ async def websocket_endpoint(websocket: WebSocket):
             current_time = int(time.time())
             for symbol, signal_data in state.active_signals.items():
                 # Solo enviar señales que no han expirado
-                if signal_data.get('expires_at', 0) > current_time:
+                if signal_data.get('expires_at', 0) > current_time and connection.wants(signal_data):
                     # Calcular progreso y tiempo restante
                     total_duration = 5 * 60
                     time_elapsed = current_time - (signal_data['expires_at'] - total_duration)
@@ -990,7 +1080,7 @@ async def websocket_endpoint(websocket: WebSocket):
                     is_winning = current_price > entry_price if direction == "CALL" else current_price < entry_price
                     
                     # Enviar con campos de UI
-                    await websocket.send_json({
+                    await connection.send_direct({
                         **signal_data,
                         'progress_percent': round(progress_percent, 1),
                         'time_remaining': time_remaining,
@@ -999,17 +1089,18 @@ async def websocket_endpoint(websocket: WebSocket):
                     })
                     logger.info(f"Enviada señal activa {symbol} a nuevo cliente")
         
+        connection.start()
+        
         # Mantener conexión abierta
         while True:
             data = await websocket.receive_text()
-            # Aquí podrías manejar mensajes del cliente si es necesario
-            # Por ahora solo mantiene la conexión
+            handle_client_message(connection, data)
             
     except WebSocketDisconnect:
-        state.clients.discard(websocket)
-        logger.info(f"Cliente desconectado - Total: {len(state.clients)}")
+        state.broadcaster.remove(websocket)
+        logger.info(f"Cliente desconectado - Total: {len(state.broadcaster)}")
     except Exception as e:
-        state.clients.discard(websocket)
+        state.broadcaster.remove(websocket)
         logger.error(f"Error en WebSocket cliente: {e}")
 
 
@@ -1046,7 +1137,9 @@ async def status():
     """Endpoint de estado del servidor"""
     return JSONResponse({
         "status": "online",
-        "clients_connected": len(state.clients),
+        "clients_connected": len(state.broadcaster),
+        "broadcast": state.broadcaster.stats(),
+        "conflation": state.conflator.stats(),
         "symbols": state.symbols,
         "timeframes": settings.SUPPORTED_TIMEFRAMES,
         "active_signals": len(state.active_signals),
@@ -1078,7 +1171,7 @@ async def get_bot_status():
 async def generate_immediate_signal_for_symbol(symbol: str) -> dict:
     """Genera señal inmediata para un símbolo usando la vela M5 actual"""
     import time
-    from strategy_engine import Candle as StrategyCandle
+    from strategy_engine import CandleSeries
     
     # Obtener historial de velas M5 (incluyendo la vela actual)
     tf_key = f"{symbol}_5m"
@@ -1097,17 +1190,7 @@ async def generate_immediate_signal_for_symbol(symbol: str) -> dict:
         return None
     
     # Convertir velas a formato Strategy
-    strategy_candles = [
-        StrategyCandle(
-            time=c.start_ts,
-            open=c.open,
-            high=c.high,
-            low=c.low,
-            close=c.close,
-            volume=c.volume
-        )
-        for c in candles_history
-    ]
+    strategy_candles = CandleSeries.from_candles(candles_history, time_field='start_ts')
     
     # Calcular indicadores
     indicators = strategy.calculate_indicators(strategy_candles)
@@ -11,7 +11,8 @@ from typing import List, Dict, Optional
 from strategies.rsi_strategy import RSIStrategy
 from strategies.macd_strategy import MACDStrategy
 from strategies.bollinger_strategy import BollingerStrategy
-from strategy_engine import Candle
+from strategy_engine import CandleSeries
+from indicators import indicator_context
 from services.twelvedata_service import twelvedata_service
 import time
 
@@ -46,6 +47,9 @@ class MarketScanner:
             BollingerStrategy()
         ]
         
+        # Contadores del caché de indicadores (último escaneo)
+        self.indicator_stats = {'hits': 0, 'misses': 0}
+        
         print("🔍 Market Scanner inicializado")
         print(f"   📊 Pares mayores: {len(self.major_pairs)}")
         print(f"   📊 Pares menores: {len(self.minor_pairs)}")
@@ -73,17 +77,8 @@ class MarketScanner:
                 print(f"⚠️  {symbol}: Datos insuficientes ({len(candles_data) if candles_data else 0} velas)")
                 return None
             
-            # Convertir a objetos Candle
-            candles = [
-                Candle(
-                    time=c['time'],
-                    open=c['open'],
-                    high=c['high'],
-                    low=c['low'],
-                    close=c['close'],
-                    volume=c.get('volume', 0)
-                ) for c in candles_data
-            ]
+            # Convertir a columnas NumPy (CandleSeries)
+            candles = CandleSeries.from_dicts(candles_data)
             
             # Analizar con cada estrategia
             signals = []
@@ -91,32 +86,38 @@ class MarketScanner:
             put_votes = 0
             total_confidence = 0
             
-            for strategy in self.strategies:
-                if len(candles) >= strategy.min_candles:
-                    indicators = strategy.calculate_indicators(candles)
-                    signal = strategy.generate_signal(candles, indicators)
-                    
-                    if signal:
-                        signal.symbol = symbol
-                        signal.timeframe = 'M5'
-                        signals.append({
-                            'strategy': strategy.name,
-                            'direction': signal.direction,
-                            'confidence': signal.confidence,
-                            'indicators': signal.indicators
-                        })
-                        
-                        if signal.direction == 'CALL':
-                            call_votes += 1
-                        else:
-                            put_votes += 1
+            # Un contexto por par: cada indicador se calcula una vez para todas las estrategias
+            with indicator_context() as context:
+                for strategy in self.strategies:
+                    if len(candles) >= strategy.min_candles:
+                        indicators = strategy.calculate_indicators(candles)
+                        signal = strategy.generate_signal(candles, indicators)
                         
-                        total_confidence += signal.confidence
+                        if signal:
+                            signal.symbol = symbol
+                            signal.timeframe = 'M5'
+                            signals.append({
+                                'strategy': strategy.name,
+                                'direction': signal.direction,
+                                'confidence': signal.confidence,
+                                'indicators': signal.indicators
+                            })
+                            
+                            if signal.direction == 'CALL':
+                                call_votes += 1
+                            else:
+                                put_votes += 1
+                            
+                            total_confidence += signal.confidence
+            
+            stats = context.stats()
+            self.indicator_stats['hits'] += stats['hits']
+            self.indicator_stats['misses'] += stats['misses']
             
             # Si no hay señales fuertes, analizar tendencia general
             if not signals:
                 # Calcular tendencia simple (precio actual vs promedio 20 velas)
-                closes = [c.close for c in candles]
+                closes = candles.close.tolist()
                 current_price = closes[-1]
                 avg_20 = sum(closes[-20:]) / 20
                 
@@ -201,6 +202,7 @@ class MarketScanner:
         print(f"📊 Analizando {len(pairs_to_scan)} pares...")
         
         opportunities = []
+        self.indicator_stats = {'hits': 0, 'misses': 0}
         
         for i, symbol in enumerate(pairs_to_scan, 1):
             print(f"\n[{i}/{len(pairs_to_scan)}] Analizando {symbol}...")
@@ -214,6 +216,8 @@ class MarketScanner:
             if i < len(pairs_to_scan):
                 time.sleep(0.3)
         
+        print(f"\n🧮 Caché de indicadores: {self.indicator_stats['hits']} hits / {self.indicator_stats['misses']} misses")
+        
         # Ordenar por score (mayor a menor)
         opportunities.sort(key=lambda x: x['score'], reverse=True)
         
@@ -5,7 +5,8 @@ Señales basadas en rebotes en las bandas
 
 from typing import List, Dict, Optional
 import numpy as np
-from strategy_engine import Strategy, Candle, Signal, calculate_bollinger_bands
+from strategy_engine import Strategy, Candle, Signal
+from indicators import BollingerBands, current_context
 
 
 class BollingerStrategy(Strategy):
@@ -30,11 +31,12 @@ class BollingerStrategy(Strategy):
         
     def calculate_indicators(self, candles: List[Candle]) -> Dict[str, np.ndarray]:
         """Calcula las Bandas de Bollinger"""
-        closes = np.array([c.close for c in candles])
-        lows = np.array([c.low for c in candles])
-        highs = np.array([c.high for c in candles])
+        context = current_context()
+        closes = context.column(candles, 'close')
+        lows = context.column(candles, 'low')
+        highs = context.column(candles, 'high')
         
-        bb = calculate_bollinger_bands(closes, self.params['period'], self.params['std_dev'])
+        bb = context.bollinger_bands(candles, self.params['period'], self.params['std_dev'])
         
         return {
             'upper_band': bb['upper'],
@@ -112,3 +114,30 @@ class BollingerStrategy(Strategy):
             )
             
         return None
+    
+    def on_candle(self, candle: Candle) -> Optional[Signal]:
+        """Versión streaming: bandas incrementales, O(1) por vela cerrada"""
+        state = self._stream_state
+        if state is None:
+            state = self._stream_state = {
+                'bands': BollingerBands(self.params['period'], self.params['std_dev']),
+                'prev_close': None,
+                'count': 0
+            }
+        
+        bands = state['bands'].update(candle.close)
+        prev_close = state['prev_close']
+        state['prev_close'] = candle.close
+        state['count'] += 1
+        
+        if state['count'] < self.min_candles or prev_close is None or bands is None:
+            return None
+        
+        return self.generate_signal([candle], {
+            'upper_band': np.array([bands['upper']]),
+            'middle_band': np.array([bands['middle']]),
+            'lower_band': np.array([bands['lower']]),
+            'closes': np.array([prev_close, candle.close]),
+            'lows': np.array([candle.low]),
+            'highs': np.array([candle.high])
+        })
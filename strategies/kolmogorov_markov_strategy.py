@@ -6,8 +6,58 @@ Analiza transiciones entre estados de velas para predecir movimientos
 
 from typing import List, Dict, Optional, Tuple
 import numpy as np
-from collections import defaultdict
-from strategy_engine import Strategy, Candle, Signal
+from collections import deque
+from strategy_engine import Strategy, Candle, Signal, STREAM_HISTORY
+from indicators import lz76_complexity, SlidingLZ76, current_context
+
+
+# Códigos enteros de los estados de vela (base 3)
+STATE_UP = 0
+STATE_DOWN = 1
+STATE_NEUTRAL = 2
+STATE_SYMBOLS = 'UDN'
+
+
+class MarkovCounter:
+    """
+    Tabla plana de conteos de transiciones: secuencia de L estados → próximo estado
+    
+    La secuencia se codifica en base 3 (U=0, D=1, N=2) y el conteo de
+    (secuencia, próximo) vive en counts[codigo * 3 + próximo]. push/pop
+    mantienen la tabla al día cuando velas entran y salen de la ventana.
+    """
+    
+    def __init__(self, sequence_length: int):
+        self.sequence_length = sequence_length
+        self.size = 3 ** sequence_length
+        self.counts = np.zeros(self.size * 3, dtype=np.int64)
+        self.totals = np.zeros(self.size, dtype=np.int64)
+    
+    def push(self, code: int, next_state: int):
+        """Agrega una transición"""
+        self.counts[code * 3 + next_state] += 1
+        self.totals[code] += 1
+    
+    def pop(self, code: int, next_state: int):
+        """Quita una transición (la que sale de la ventana)"""
+        self.counts[code * 3 + next_state] -= 1
+        self.totals[code] -= 1
+    
+    def row(self, code: int) -> Tuple[int, int, int]:
+        """Conteos (U, D, N) del próximo estado para una secuencia"""
+        base = code * 3
+        return (int(self.counts[base + STATE_UP]),
+                int(self.counts[base + STATE_DOWN]),
+                int(self.counts[base + STATE_NEUTRAL]))
+
+
+def decode_sequence(code: int, sequence_length: int) -> str:
+    """Convierte un código base 3 en la secuencia de estados ('UUD', ...)"""
+    symbols = []
+    for _ in range(sequence_length):
+        code, state = divmod(code, 3)
+        symbols.append(STATE_SYMBOLS[state])
+    return ''.join(reversed(symbols))
 
 
 class KolmogorovMarkovStrategy(Strategy):
@@ -40,22 +90,6 @@ class KolmogorovMarkovStrategy(Strategy):
         super().__init__('Kolmogorov-Markov Chain', default_params)
         self.min_candles = max(100, self.params['sequence_length'] * 10)
         
-    def _get_candle_state(self, candle: Candle) -> str:
-        """Determina el estado de una vela: U (Up), D (Down), N (Neutral)"""
-        body = candle.close - candle.open
-        
-        if self.params['use_body_size']:
-            threshold = self.params['min_body_threshold']
-            if abs(body) < threshold:
-                return 'N'
-        
-        if candle.close > candle.open:
-            return 'U'
-        elif candle.close < candle.open:
-            return 'D'
-        else:
-            return 'N'
-    
     def _build_transition_matrix(self, candles: List[Candle]) -> Dict[str, Dict[str, float]]:
         """
         Construye matriz de probabilidades de transición
@@ -63,28 +97,77 @@ class KolmogorovMarkovStrategy(Strategy):
         Returns:
             Dict[secuencia, Dict[próximo_estado, probabilidad]]
         """
+        states = self._encode_states(candles)
+        return self._transition_probabilities(*self._transitions(states, self._sequence_codes(states)))
+    
+    def _transition_probabilities(self, codes: np.ndarray, next_states: np.ndarray) -> Dict[str, Dict[str, float]]:
+        """Matriz de transición (secuencias con al menos min_samples) a partir de las transiciones"""
         seq_len = self.params['sequence_length']
-        transitions = defaultdict(lambda: defaultdict(int))
-        
-        for i in range(len(candles) - seq_len):
-            sequence = ''.join([self._get_candle_state(candles[i + j]) 
-                               for j in range(seq_len)])
-            
-            next_state = self._get_candle_state(candles[i + seq_len])
-            
-            transitions[sequence][next_state] += 1
+        keys, counts = np.unique(codes * 3 + next_states, return_counts=True)
+        sequences = keys // 3
+        first = np.r_[True, sequences[1:] != sequences[:-1]]
+        group = np.cumsum(first) - 1
+        group_totals = np.bincount(group, weights=counts).astype(np.int64)
+        totals = group_totals[group]
         
         probabilities = {}
-        for sequence, next_states in transitions.items():
-            total = sum(next_states.values())
+        for key, count, total in zip(keys.tolist(), counts.tolist(), totals.tolist()):
             if total >= self.params['min_samples']:
-                probabilities[sequence] = {
-                    state: count / total 
-                    for state, count in next_states.items()
-                }
+                sequence = decode_sequence(key // 3, seq_len)
+                probabilities.setdefault(sequence, {})[STATE_SYMBOLS[key % 3]] = count / total
         
         return probabilities
     
+    def _encode_states(self, candles: List[Candle]) -> np.ndarray:
+        """
+        Estados de todas las velas como códigos enteros: STATE_UP si cierra
+        sobre la apertura, STATE_DOWN si debajo y STATE_NEUTRAL si no (o si
+        use_body_size y el cuerpo es menor que min_body_threshold)
+        """
+        context = current_context()
+        opens = context.column(candles, 'open')
+        closes = context.column(candles, 'close')
+        
+        states = np.full(len(candles), STATE_NEUTRAL, dtype=np.int64)
+        states[closes > opens] = STATE_UP
+        states[closes < opens] = STATE_DOWN
+        if self.params['use_body_size']:
+            states[np.abs(closes - opens) < self.params['min_body_threshold']] = STATE_NEUTRAL
+        
+        return states
+    
+    def _sequence_codes(self, states: np.ndarray) -> np.ndarray:
+        """codes[k] = código base 3 de states[k:k + sequence_length]"""
+        seq_len = self.params['sequence_length']
+        count = len(states) - seq_len + 1
+        if count <= 0:
+            return np.zeros(0, dtype=np.int64)
+        
+        codes = np.zeros(count, dtype=np.int64)
+        for j in range(seq_len):
+            codes = codes * 3 + states[j:j + count]
+        return codes
+    
+    def _transitions(self, states: np.ndarray, codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Todas las transiciones de la ventana: (código de la secuencia, próximo estado)"""
+        seq_len = self.params['sequence_length']
+        transitions = max(0, len(states) - seq_len)
+        return codes[:transitions], states[seq_len:seq_len + transitions]
+    
+    def _row_probabilities(self, row: Tuple[int, int, int]) -> Tuple[float, float, float, float]:
+        """
+        Probabilidades (p_up, p_down, p_neutral) y entropía para los conteos de una secuencia
+        
+        Sin muestras suficientes (min_samples) retorna probabilidades 0 y entropía 999.
+        """
+        total = sum(row)
+        if total == 0 or total < self.params['min_samples']:
+            return 0.0, 0.0, 0.0, 999
+        
+        probs = {STATE_SYMBOLS[state]: count / total for state, count in enumerate(row) if count > 0}
+        return (probs.get('U', 0.0), probs.get('D', 0.0), probs.get('N', 0.0),
+                self._calculate_entropy(probs))
+    
     def _calculate_entropy(self, probs: Dict[str, float]) -> float:
         """
         Calcula entropía de Shannon (medida de incertidumbre)
@@ -98,19 +181,17 @@ class KolmogorovMarkovStrategy(Strategy):
     
     def calculate_indicators(self, candles: List[Candle]) -> Dict[str, np.ndarray]:
         """Calcula matriz de transición y estadísticas"""
-        transition_matrix = self._build_transition_matrix(candles)
-        
         seq_len = self.params['sequence_length']
-        current_sequence = ''.join([self._get_candle_state(candles[-(i+1)]) 
-                                    for i in range(seq_len-1, -1, -1)])
-        
-        probs = transition_matrix.get(current_sequence, {})
+        states = self._encode_states(candles)
+        codes = self._sequence_codes(states)
+        sequence_codes, next_states = self._transitions(states, codes)
+        transition_matrix = self._transition_probabilities(sequence_codes, next_states)
         
-        p_up = probs.get('U', 0.0)
-        p_down = probs.get('D', 0.0)
-        p_neutral = probs.get('N', 0.0)
+        current_code = int(codes[-1])
+        current_sequence = decode_sequence(current_code, seq_len)
         
-        entropy = self._calculate_entropy(probs) if probs else 999
+        row = np.bincount(next_states[sequence_codes == current_code], minlength=3)
+        p_up, p_down, p_neutral, entropy = self._row_probabilities(tuple(int(c) for c in row))
         
         total_patterns = len(transition_matrix)
         
@@ -124,14 +205,8 @@ class KolmogorovMarkovStrategy(Strategy):
             'transition_matrix': transition_matrix
         }
     
-    def generate_signal(self, candles: List[Candle], indicators: Dict[str, np.ndarray]) -> Optional[Signal]:
-        """Genera señal basada en probabilidades de transición de Markov"""
-        p_up = indicators['p_up'][0]
-        p_down = indicators['p_down'][0]
-        p_neutral = indicators['p_neutral'][0]
-        entropy = indicators['entropy'][0]
-        current_sequence = str(indicators['current_sequence'][0])
-        
+    def _decide(self, p_up: float, p_down: float, p_neutral: float, entropy: float) -> Optional[Tuple[str, float]]:
+        """Reglas de entrada: retorna (dirección, confianza) o None"""
         if p_up == 0 and p_down == 0:
             return None
         
@@ -145,57 +220,138 @@ class KolmogorovMarkovStrategy(Strategy):
         if entropy > 1.5:
             return None
         
-        current_candle = candles[-1]
-        
         if p_up > p_down and p_up >= min_conf:
-            confidence = p_up
-            
             if p_up - p_down < 0.15:
                 return None
-            
-            return Signal(
-                symbol='',
-                direction='CALL',
-                timeframe='',
-                timestamp=current_candle.time,
-                confidence=confidence,
-                indicators={
-                    'sequence': current_sequence,
-                    'p_up': float(p_up),
-                    'p_down': float(p_down),
-                    'p_neutral': float(p_neutral),
-                    'entropy': float(entropy),
-                    'method': 'Markov Chain',
-                    'confidence_margin': float(p_up - p_down)
-                },
-                strategy_name=self.name
-            )
+            return 'CALL', p_up
             
         elif p_down > p_up and p_down >= min_conf:
-            confidence = p_down
-            
             if p_down - p_up < 0.15:
                 return None
-            
-            return Signal(
-                symbol='',
-                direction='PUT',
-                timeframe='',
-                timestamp=current_candle.time,
-                confidence=confidence,
-                indicators={
-                    'sequence': current_sequence,
-                    'p_up': float(p_up),
-                    'p_down': float(p_down),
-                    'p_neutral': float(p_neutral),
-                    'entropy': float(entropy),
-                    'method': 'Markov Chain',
-                    'confidence_margin': float(p_down - p_up)
-                },
-                strategy_name=self.name
-            )
+            return 'PUT', p_down
         
         return None
+    
+    def generate_signal(self, candles: List[Candle], indicators: Dict[str, np.ndarray]) -> Optional[Signal]:
+        """Genera señal basada en probabilidades de transición de Markov"""
+        p_up = indicators['p_up'][0]
+        p_down = indicators['p_down'][0]
+        p_neutral = indicators['p_neutral'][0]
+        entropy = indicators['entropy'][0]
+        current_sequence = str(indicators['current_sequence'][0])
+        
+        decision = self._decide(p_up, p_down, p_neutral, entropy)
+        if decision is None:
+            return None
+        
+        direction, confidence = decision
+        margin = p_up - p_down if direction == 'CALL' else p_down - p_up
+        
+        return Signal(
+            symbol='',
+            direction=direction,
+            timeframe='',
+            timestamp=candles[-1].time,
+            confidence=confidence,
+            indicators={
+                'sequence': current_sequence,
+                'p_up': float(p_up),
+                'p_down': float(p_down),
+                'p_neutral': float(p_neutral),
+                'entropy': float(entropy),
+                'method': 'Markov Chain',
+                'confidence_margin': float(margin)
+            },
+            strategy_name=self.name
+        )
+    
+    def analyze_series(self, candles: List[Candle], lookback: int = 200) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Evalúa todas las ventanas del backtest con una sola tabla de conteos
+        
+        En cada vela entra la transición que termina en ella y salen las que
+        empiezan antes de la ventana, así cada paso es O(1) en vez de
+        reconstruir la matriz completa.
+        """
+        n = len(candles)
+        seq_len = self.params['sequence_length']
+        direction = np.zeros(n, dtype=np.int8)
+        confidence = np.zeros(n)
+        
+        states = self._encode_states(candles)
+        codes = self._sequence_codes(states)
+        counter = MarkovCounter(seq_len)
+        window_starts = deque()
+        
+        for i in range(n):
+            start = max(0, i - lookback)
+            while window_starts and window_starts[0] < start:
+                k = window_starts.popleft()
+                counter.pop(codes[k], states[k + seq_len])
+            
+            k = i - seq_len
+            if k >= start:
+                counter.push(codes[k], states[i])
+                window_starts.append(k)
+            
+            if i - start + 1 < self.min_candles:
+                continue
+            
+            row = counter.row(int(codes[i - seq_len + 1]))
+            decision = self._decide(*self._row_probabilities(row))
+            if decision:
+                direction[i] = 1 if decision[0] == 'CALL' else -1
+                confidence[i] = decision[1]
+        
+        return {'direction': direction, 'confidence': confidence}
+    
+    def on_candle(self, candle: Candle) -> Optional[Signal]:
+        """
+        Versión streaming: misma ventana que la implementación por defecto
+        (STREAM_HISTORY velas) pero con la tabla de conteos actualizada en O(L)
+        """
+        seq_len = self.params['sequence_length']
+        state = self._stream_state
+        if state is None:
+            state = self._stream_state = {
+                'states': deque(maxlen=max(self.min_candles, STREAM_HISTORY)),
+                'codes': deque(),
+                'counter': MarkovCounter(seq_len)
+            }
+        
+        states = state['states']
+        codes = state['codes']
+        counter = state['counter']
+        
+        # La vela más antigua sale: se va la transición que empezaba en ella
+        if len(states) == states.maxlen:
+            counter.pop(codes.popleft(), states[seq_len])
+            states.popleft()
+        
+        states.append(int(self._encode_states([candle])[0]))
+        if len(states) > seq_len:
+            # Transición: secuencia que termina en la vela anterior → estado actual
+            code = 0
+            for j in range(len(states) - seq_len - 1, len(states) - 1):
+                code = code * 3 + states[j]
+            counter.push(code, states[-1])
+            codes.append(code)
+        
+        if len(states) < self.min_candles:
+            return None
+        
+        current_code = 0
+        for j in range(len(states) - seq_len, len(states)):
+            current_code = current_code * 3 + states[j]
+        
+        p_up, p_down, p_neutral, entropy = self._row_probabilities(counter.row(current_code))
+        return self.generate_signal([candle], {
+            'p_up': np.array([p_up]),
+            'p_down': np.array([p_down]),
+            'p_neutral': np.array([p_neutral]),
+            'entropy': np.array([entropy]),
+            'current_sequence': np.array([decode_sequence(current_code, seq_len)], dtype=object)
+        })
 
 
 class KolmogorovComplexityStrategy(Strategy):
@@ -230,51 +386,37 @@ class KolmogorovComplexityStrategy(Strategy):
         if not sequence:
             return 0.0
         
-        n = len(sequence)
-        i = 0
-        complexity = 1
-        
-        while i < n - 1:
-            j = i + 1
-            while j < n:
-                substring = sequence[i:j]
-                if substring in sequence[:i]:
-                    j += 1
-                else:
-                    break
-            complexity += 1
-            i = j
-        
+        return self._normalize_complexity(lz76_complexity(sequence), len(sequence))
+    
+    def _normalize_complexity(self, complexity: int, n: int) -> float:
+        """Normaliza el conteo de frases LZ76 por n / log2(n)"""
         max_complexity = n / np.log2(n) if n > 1 else 1
         normalized = complexity / max_complexity if max_complexity > 0 else 0
         
         return min(1.0, normalized)
     
+    def _encode_closes(self, closes: np.ndarray) -> str:
+        """Codifica cierres consecutivos: '1' sube, '0' baja, 'X' igual"""
+        symbols = np.where(closes[1:] > closes[:-1], '1', np.where(closes[1:] < closes[:-1], '0', 'X'))
+        return ''.join(symbols.tolist())
+    
     def _encode_price_sequence(self, candles: List[Candle]) -> str:
         """Codifica secuencia de precios como string binario"""
-        sequence = ''
-        for i in range(1, len(candles)):
-            if candles[i].close > candles[i-1].close:
-                sequence += '1'
-            elif candles[i].close < candles[i-1].close:
-                sequence += '0'
-            else:
-                sequence += 'X'
-        return sequence
+        return self._encode_closes(current_context().column(candles, 'close'))
     
     def calculate_indicators(self, candles: List[Candle]) -> Dict[str, np.ndarray]:
         """Calcula complejidad y momentum"""
         window = self.params['window_size']
-        recent_candles = candles[-window:]
+        all_closes = current_context().column(candles, 'close')
         
-        price_sequence = self._encode_price_sequence(recent_candles)
+        price_sequence = self._encode_closes(all_closes[-window:])
         complexity = self._lz_complexity(price_sequence)
         
         momentum_periods = self.params['momentum_periods']
-        closes = np.array([c.close for c in candles[-momentum_periods-1:]])
+        closes = all_closes[-momentum_periods-1:]
         momentum = (closes[-1] - closes[0]) / closes[0] if closes[0] != 0 else 0
         
-        recent_trend = sum([1 if candles[-(i+1)].close > candles[-(i+2)].close else -1 
+        recent_trend = sum([1 if all_closes[-(i+1)] > all_closes[-(i+2)] else -1 
                            for i in range(min(5, len(candles)-1))])
         
         return {
@@ -284,12 +426,8 @@ class KolmogorovComplexityStrategy(Strategy):
             'price_sequence': np.array([price_sequence], dtype=object)
         }
     
-    def generate_signal(self, candles: List[Candle], indicators: Dict[str, np.ndarray]) -> Optional[Signal]:
-        """Genera señal cuando complejidad es baja (patrones detectables)"""
-        complexity = indicators['complexity'][0]
-        momentum = indicators['momentum'][0]
-        recent_trend = indicators['recent_trend'][0]
-        
+    def _decide(self, complexity: float, momentum: float, recent_trend: int) -> Optional[Tuple[str, float]]:
+        """Reglas de entrada: retorna (dirección, predictabilidad) o None"""
         threshold = self.params['complexity_threshold']
         
         if complexity > threshold:
@@ -300,40 +438,128 @@ class KolmogorovComplexityStrategy(Strategy):
         if predictability < self.params['min_confidence']:
             return None
         
-        current_candle = candles[-1]
-        
         if momentum > 0 and recent_trend > 1:
-            return Signal(
-                symbol='',
-                direction='CALL',
-                timeframe='',
-                timestamp=current_candle.time,
-                confidence=predictability,
-                indicators={
-                    'complexity': float(complexity),
-                    'predictability': float(predictability),
-                    'momentum': float(momentum),
-                    'recent_trend': int(recent_trend),
-                    'method': 'Kolmogorov Complexity'
-                },
-                strategy_name=self.name
-            )
+            return 'CALL', predictability
             
         elif momentum < 0 and recent_trend < -1:
-            return Signal(
-                symbol='',
-                direction='PUT',
-                timeframe='',
-                timestamp=current_candle.time,
-                confidence=predictability,
-                indicators={
-                    'complexity': float(complexity),
-                    'predictability': float(predictability),
-                    'momentum': float(momentum),
-                    'recent_trend': int(recent_trend),
-                    'method': 'Kolmogorov Complexity'
-                },
-                strategy_name=self.name
-            )
+            return 'PUT', predictability
         
         return None
+    
+    def generate_signal(self, candles: List[Candle], indicators: Dict[str, np.ndarray]) -> Optional[Signal]:
+        """Genera señal cuando complejidad es baja (patrones detectables)"""
+        complexity = indicators['complexity'][0]
+        momentum = indicators['momentum'][0]
+        recent_trend = indicators['recent_trend'][0]
+        
+        decision = self._decide(complexity, momentum, recent_trend)
+        if decision is None:
+            return None
+        
+        direction, predictability = decision
+        
+        return Signal(
+            symbol='',
+            direction=direction,
+            timeframe='',
+            timestamp=candles[-1].time,
+            confidence=predictability,
+            indicators={
+                'complexity': float(complexity),
+                'predictability': float(predictability),
+                'momentum': float(momentum),
+                'recent_trend': int(recent_trend),
+                'method': 'Kolmogorov Complexity'
+            },
+            strategy_name=self.name
+        )
+    
+    def on_candle(self, candle: Candle) -> Optional[Signal]:
+        """
+        Versión streaming: ventana deslizante de símbolos con SlidingLZ76
+        
+        Agregar una vela es O(1); la complejidad LZ76 solo se recalcula
+        cuando momentum y tendencia permiten una señal.
+        """
+        state = self._stream_state
+        if state is None:
+            history = max(self.min_candles, STREAM_HISTORY)
+            state = self._stream_state = {
+                'symbols': SlidingLZ76(self.params['window_size'] - 1),
+                'closes': deque(maxlen=min(history, max(self.params['momentum_periods'] + 1, 6))),
+                'count': 0
+            }
+        
+        closes = state['closes']
+        if closes:
+            previous = closes[-1]
+            state['symbols'].push('1' if candle.close > previous else '0' if candle.close < previous else 'X')
+        closes.append(candle.close)
+        state['count'] += 1
+        
+        if state['count'] < self.min_candles:
+            return None
+        
+        recent = list(closes)
+        base = recent[max(0, len(recent) - self.params['momentum_periods'] - 1)]
+        momentum = (recent[-1] - base) / base if base != 0 else 0
+        recent_trend = sum([1 if recent[-(i+1)] > recent[-(i+2)] else -1 for i in range(5)])
+        
+        if not ((momentum > 0 and recent_trend > 1) or (momentum < 0 and recent_trend < -1)):
+            return None
+        
+        symbols = state['symbols']
+        complexity = self._normalize_complexity(symbols.complexity(), len(symbols)) if len(symbols) else 0.0
+        
+        return self.generate_signal([candle], {
+            'complexity': np.array([complexity]),
+            'momentum': np.array([momentum]),
+            'recent_trend': np.array([recent_trend])
+        })
+    
+    def analyze_series(self, candles: List[Candle], lookback: int = 200) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Evalúa todas las ventanas del backtest a la vez
+        
+        Momentum y tendencia reciente se calculan vectorizados; la complejidad
+        LZ76 (lineal por ventana) solo se calcula en las velas donde momentum
+        y tendencia ya permiten una señal.
+        """
+        n = len(candles)
+        direction = np.zeros(n, dtype=np.int8)
+        confidence = np.zeros(n)
+        if n == 0:
+            return {'direction': direction, 'confidence': confidence}
+        
+        closes = current_context().column(candles, 'close')
+        symbols = self._encode_closes(closes)
+        
+        bars = np.arange(n)
+        window_starts = np.maximum(0, bars - lookback)
+        sizes = bars - window_starts + 1
+        
+        # Momentum: (close actual - close de hace momentum_periods) / close de hace momentum_periods
+        base = closes[np.maximum(window_starts, bars - self.params['momentum_periods'])]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            momentum = np.where(base != 0, (closes - base) / base, 0.0)
+        
+        # Tendencia reciente: suma de +1/-1 de las últimas min(5, tamaño - 1) variaciones
+        steps = np.where(closes[1:] > closes[:-1], 1, -1)
+        cumulative = np.concatenate(([0, 0], np.cumsum(steps)))
+        counts = np.minimum(5, sizes - 1)
+        recent_trend = cumulative[bars + 1] - cumulative[bars + 1 - counts]
+        
+        candidates = (sizes >= self.min_candles) & (
+            ((momentum > 0) & (recent_trend > 1)) | ((momentum < 0) & (recent_trend < -1))
+        )
+        
+        window_size = self.params['window_size']
+        for i in np.flatnonzero(candidates):
+            start = max(window_starts[i], i - window_size + 1)
+            complexity = self._lz_complexity(symbols[start:i])
+            decision = self._decide(complexity, momentum[i], recent_trend[i])
+            if decision:
+                direction[i] = 1 if decision[0] == 'CALL' else -1
+                confidence[i] = decision[1]
+        
+        return {'direction': direction, 'confidence': confidence}
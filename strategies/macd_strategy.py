@@ -5,7 +5,8 @@ Señales basadas en cruces de líneas MACD
 
 from typing import List, Dict, Optional
 import numpy as np
-from strategy_engine import Strategy, Candle, Signal, calculate_macd
+from strategy_engine import Strategy, Candle, Signal
+from indicators import MACD, current_context
 
 
 class MACDStrategy(Strategy):
@@ -31,9 +32,10 @@ class MACDStrategy(Strategy):
         
     def calculate_indicators(self, candles: List[Candle]) -> Dict[str, np.ndarray]:
         """Calcula el indicador MACD"""
-        closes = np.array([c.close for c in candles])
-        macd_data = calculate_macd(
-            closes,
+        context = current_context()
+        closes = context.column(candles, 'close')
+        macd_data = context.macd(
+            candles,
             self.params['fast_period'],
             self.params['slow_period'],
             self.params['signal_period']
@@ -99,3 +101,37 @@ class MACDStrategy(Strategy):
             )
             
         return None
+    
+    def on_candle(self, candle: Candle) -> Optional[Signal]:
+        """
+        Versión streaming: EMAs incrementales del MACD, O(1) por vela cerrada
+        
+        Sin re-siembra por ventana, como la EMA de TendencialTradeStrategy
+        (ver Strategy.on_candle).
+        """
+        state = self._stream_state
+        if state is None:
+            state = self._stream_state = {
+                'macd': MACD(
+                    self.params['fast_period'],
+                    self.params['slow_period'],
+                    self.params['signal_period']
+                ),
+                'prev_hist': None,
+                'count': 0
+            }
+        
+        macd = state['macd']
+        macd.update(candle.close)
+        prev_hist = state['prev_hist']
+        state['prev_hist'] = macd.histogram
+        state['count'] += 1
+        
+        if state['count'] < self.min_candles or prev_hist is None:
+            return None
+        
+        return self.generate_signal([candle], {
+            'macd': np.array([macd.macd_line]),
+            'signal': np.array([macd.signal_line]),
+            'histogram': np.array([prev_hist, macd.histogram])
+        })
@@ -6,6 +6,7 @@ Basada en análisis estadístico de patrones de velas
 from typing import List, Dict, Optional
 import numpy as np
 from strategy_engine import Strategy, Candle, Signal
+from indicators import current_context
 
 
 class ProbabilityGaleStrategy(Strategy):
@@ -36,52 +37,19 @@ class ProbabilityGaleStrategy(Strategy):
         
     def calculate_indicators(self, candles: List[Candle]) -> Dict[str, np.ndarray]:
         """Calcula probabilidades de cada patrón"""
-        cantidad_velas = min(self.params['cantidad_velas'], len(candles))
+        n = len(candles)
+        cantidad_velas = min(self.params['cantidad_velas'], n)
+        patterns = current_context().pattern_counts(candles)
+        counts = patterns.counts(n - cantidad_velas, n)
         
-        alcistas = 0
-        bajistas = 0
-        neutras = 0
-        martillos = 0
-        racha_alcista = 0
+        alcistas = int(counts['alcista'])
+        bajistas = int(counts['bajista'])
+        neutras = int(counts['neutra'])
+        martillos = int(counts['martillo'])
         
-        for i in range(cantidad_velas):
-            idx = -(i + 1)
-            
-            # Verificar que el índice está dentro de rango
-            if abs(idx) > len(candles):
-                break
-            
-            c = candles[idx]
-            
-            is_alcista = 1 if c.close > c.open else 0
-            is_bajista = 1 if c.close < c.open else 0
-            is_neutra = 1 if c.close == c.open else 0
-            
-            alcistas += is_alcista
-            bajistas += is_bajista
-            neutras += is_neutra
-            
-            cuerpo = abs(c.close - c.open)
-            rango_total = c.high - c.low
-            mecha_inf = min(c.open, c.close) - c.low
-            mecha_sup = c.high - max(c.open, c.close)
-            
-            if rango_total > 0:
-                es_martillo = (cuerpo < rango_total * 0.3 and 
-                              mecha_inf > cuerpo * 2 and 
-                              mecha_sup < cuerpo)
-                martillos += 1 if es_martillo else 0
-            
-            # Verificar que tenemos suficientes velas para calcular racha
-            if i >= 2 and abs(idx - 2) <= len(candles):
-                c1 = candles[idx]
-                c2 = candles[idx - 1]
-                c3 = candles[idx - 2]
-                
-                racha = (c1.close > c1.open and 
-                        c2.close > c2.open and 
-                        c3.close > c3.open)
-                racha_alcista += 1 if racha else 0
+        # Rachas x3 que terminan entre la vela más antigua de la ventana y la
+        # antepenúltima (pueden empezar hasta 2 velas antes de la ventana)
+        racha_alcista = int(patterns.count('racha_alcista', n - cantidad_velas, max(n - cantidad_velas, n - 2)))
         
         p_alcista = alcistas / cantidad_velas
         p_bajista = bajistas / cantidad_velas
@@ -173,6 +141,51 @@ class ProbabilityGaleStrategy(Strategy):
             )
             
         return None
+    
+    def analyze_series(self, candles: List[Candle], lookback: int = 200) -> Optional[Dict[str, np.ndarray]]:
+        """Evalúa todas las ventanas del backtest a la vez con las sumas prefijas de patrones"""
+        n = len(candles)
+        direction = np.zeros(n, dtype=np.int8)
+        confidence = np.zeros(n)
+        if n == 0:
+            return {'direction': direction, 'confidence': confidence}
+        
+        patterns = current_context().pattern_counts(candles)
+        bars = np.arange(n)
+        ends = bars + 1
+        sizes = np.minimum(bars, lookback) + 1
+        totals = np.minimum(self.params['cantidad_velas'], sizes)
+        starts = ends - totals
+        counts = patterns.counts(starts, ends)
+        rachas = patterns.count('racha_alcista', starts, np.maximum(starts, ends - 2))
+        
+        probs = np.stack([
+            counts['alcista'] / totals,
+            counts['bajista'] / totals,
+            counts['neutra'] / totals,
+            counts['martillo'] / totals,
+            rachas / np.maximum(1, totals - 2)
+        ], axis=1)
+        
+        # Patrón mayor (empates: gana el primero, igual que max()) y segundo mayor
+        patron = np.argmax(probs, axis=1)
+        max_prob = probs[bars, patron]
+        segunda_mayor = np.sort(probs, axis=1)[:, -2]
+        
+        flags = patterns.flags
+        valid = (
+            (sizes >= self.min_candles) &
+            (max_prob >= self.params['min_confidence']) &
+            ((max_prob - segunda_mayor) >= self.params['min_diff_percent'] / 100)
+        )
+        is_call = valid & (patron == 0) & flags['alcista']
+        is_put = valid & (patron == 1) & flags['bajista']
+        
+        direction[is_call] = 1
+        direction[is_put] = -1
+        confidence[is_call | is_put] = max_prob[is_call | is_put]
+        
+        return {'direction': direction, 'confidence': confidence}
 
 
 class GaleMoneyManager:
@@ -5,7 +5,8 @@ Señales basadas en condiciones de sobrecompra/sobreventa
 
 from typing import List, Dict, Optional
 import numpy as np
-from strategy_engine import Strategy, Candle, Signal, calculate_rsi
+from strategy_engine import Strategy, Candle, Signal
+from indicators import RSI, current_context
 
 
 class RSIStrategy(Strategy):
@@ -30,8 +31,9 @@ class RSIStrategy(Strategy):
         
     def calculate_indicators(self, candles: List[Candle]) -> Dict[str, np.ndarray]:
         """Calcula el indicador RSI"""
-        closes = np.array([c.close for c in candles])
-        rsi = calculate_rsi(closes, self.params['rsi_period'])
+        context = current_context()
+        closes = context.column(candles, 'close')
+        rsi = context.rsi(candles, self.params['rsi_period'])
         
         return {
             'rsi': rsi,
@@ -87,3 +89,58 @@ class RSIStrategy(Strategy):
             )
             
         return None
+
+    def on_candle(self, candle: Candle) -> Optional[Signal]:
+        """
+        Versión streaming: RSI incremental (Wilder), O(1) por vela cerrada
+        
+        Sin re-siembra por ventana, como la EMA de TendencialTradeStrategy
+        (ver Strategy.on_candle).
+        """
+        state = self._stream_state
+        if state is None:
+            state = self._stream_state = {
+                'rsi': RSI(self.params['rsi_period']),
+                'prev_rsi': None,
+                'count': 0
+            }
+        
+        current_rsi = state['rsi'].update(candle.close)
+        prev_rsi = state['prev_rsi']
+        state['prev_rsi'] = current_rsi
+        state['count'] += 1
+        
+        if state['count'] < self.min_candles or current_rsi is None or prev_rsi is None:
+            return None
+        
+        return self.generate_signal([candle], {'rsi': np.array([prev_rsi, current_rsi])})
+
+    def analyze_series(self, candles: List[Candle], lookback: int = 200) -> Optional[Dict[str, np.ndarray]]:
+        """Evalúa las condiciones de RSI en todas las ventanas del backtest a la vez"""
+        n = len(candles)
+        windows = current_context().rsi_windows(candles, self.params['rsi_period'], lookback)
+        current_rsi = windows['last']
+        prev_rsi = windows['prev']
+
+        window_sizes = np.minimum(np.arange(n), lookback) + 1
+        valid = (window_sizes >= self.min_candles) & ~np.isnan(current_rsi) & ~np.isnan(prev_rsi)
+
+        oversold = self.params['oversold']
+        overbought = self.params['overbought']
+        min_confidence = self.params['min_confidence']
+
+        with np.errstate(invalid='ignore'):
+            is_call = valid & (current_rsi < oversold) & (prev_rsi >= current_rsi)
+            is_put = valid & ~is_call & (current_rsi > overbought) & (prev_rsi <= current_rsi)
+
+        call_confidence = np.maximum(min_confidence, np.minimum(1.0, (oversold - current_rsi) / oversold))
+        put_confidence = np.maximum(min_confidence, np.minimum(1.0, (current_rsi - overbought) / (100 - overbought)))
+
+        direction = np.zeros(n, dtype=np.int8)
+        direction[is_call] = 1
+        direction[is_put] = -1
+        confidence = np.zeros(n)
+        confidence[is_call] = call_confidence[is_call]
+        confidence[is_put] = put_confidence[is_put]
+
+        return {'direction': direction, 'confidence': confidence}
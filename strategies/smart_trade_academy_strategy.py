@@ -6,6 +6,7 @@ Estrategia contrarian que opera contra la tendencia histórica dominante
 from typing import List, Dict, Optional
 import numpy as np
 from strategy_engine import Strategy, Candle, Signal
+from indicators import current_context
 
 
 class SmartTradeAcademyStrategy(Strategy):
@@ -47,46 +48,19 @@ class SmartTradeAcademyStrategy(Strategy):
         
     def calculate_indicators(self, candles: List[Candle]) -> Dict[str, np.ndarray]:
         """Calcula probabilidades de patrones con lógica inversa"""
-        cantidad_velas = min(self.params['cantidad_velas'], len(candles))
+        n = len(candles)
+        cantidad_velas = min(self.params['cantidad_velas'], n)
+        patterns = current_context().pattern_counts(candles)
+        counts = patterns.counts(n - cantidad_velas, n)
         
-        alcistas = 0
-        bajistas = 0
-        neutras = 0
-        martillos = 0
-        racha_alcista = 0
+        alcistas = int(counts['alcista'])
+        bajistas = int(counts['bajista'])
+        neutras = int(counts['neutra'])
+        martillos = int(counts['martillo'])
         
-        for i in range(cantidad_velas):
-            idx = -(i + 1)
-            c = candles[idx]
-            
-            if c.close > c.open:
-                alcistas += 1
-            elif c.close < c.open:
-                bajistas += 1
-            else:
-                neutras += 1
-            
-            cuerpo = abs(c.close - c.open)
-            rango_total = c.high - c.low
-            mecha_inf = min(c.open, c.close) - c.low
-            mecha_sup = c.high - max(c.open, c.close)
-            
-            if rango_total > 0:
-                es_martillo = (cuerpo < rango_total * 0.3 and 
-                              mecha_inf > cuerpo * 2 and 
-                              mecha_sup < cuerpo)
-                if es_martillo:
-                    martillos += 1
-            
-            if i >= 2 and (i + 3) <= len(candles):
-                c1 = candles[-(i + 1)]
-                c2 = candles[-(i + 2)]
-                c3 = candles[-(i + 3)]
-                
-                if (c1.close > c1.open and 
-                    c2.close > c2.open and 
-                    c3.close > c3.open):
-                    racha_alcista += 1
+        # Rachas x3 que terminan entre la vela más antigua de la ventana y la
+        # antepenúltima (pueden empezar hasta 2 velas antes de la ventana)
+        racha_alcista = int(patterns.count('racha_alcista', n - cantidad_velas, max(n - cantidad_velas, n - 2)))
         
         total_analizadas = alcistas + bajistas + neutras
         
@@ -214,6 +188,60 @@ class SmartTradeAcademyStrategy(Strategy):
             )
         
         return None
+    
+    def analyze_series(self, candles: List[Candle], lookback: int = 200) -> Optional[Dict[str, np.ndarray]]:
+        """Evalúa todas las ventanas del backtest a la vez con las sumas prefijas de patrones"""
+        n = len(candles)
+        direction = np.zeros(n, dtype=np.int8)
+        confidence = np.zeros(n)
+        if n == 0:
+            return {'direction': direction, 'confidence': confidence}
+        
+        patterns = current_context().pattern_counts(candles)
+        bars = np.arange(n)
+        ends = bars + 1
+        sizes = np.minimum(bars, lookback) + 1
+        totals = np.minimum(self.params['cantidad_velas'], sizes)
+        starts = ends - totals
+        counts = patterns.counts(starts, ends)
+        rachas = patterns.count('racha_alcista', starts, np.maximum(starts, ends - 2))
+        
+        p_alcista = counts['alcista'] / totals
+        p_bajista = counts['bajista'] / totals
+        probs = np.stack([
+            p_bajista,
+            p_alcista,
+            counts['neutra'] / totals,
+            counts['martillo'] / totals,
+            np.where(totals >= 3, rachas / np.maximum(totals - 2, 1), 0.0)
+        ], axis=1)
+        
+        # Patrón mayor (empates: gana el primero, igual que max())
+        patron = np.argmax(probs, axis=1)
+        max_prob = probs[bars, patron]
+        
+        alcista = patterns.flags['alcista']
+        bajista = patterns.flags['bajista']
+        valid = (sizes >= self.min_candles) & (alcista | bajista) & (max_prob >= self.params['min_confidence'])
+        
+        # Lógica inversa: Bajista → compra en vela alcista, Alcista / Racha → venta en
+        # vela bajista, Martillo → contra la vela actual, Neutra → contra el mayor
+        neutra = patron == 2
+        neutra_compra = p_bajista > p_alcista
+        compra = valid & (
+            ((patron == 0) & alcista) | ((patron == 3) & bajista) | (neutra & neutra_compra & alcista)
+        )
+        venta = valid & ~compra & (
+            (((patron == 1) | (patron == 4)) & bajista) | ((patron == 3) & alcista) |
+            (neutra & ~neutra_compra & bajista)
+        )
+        conf = np.where(neutra, np.where(neutra_compra, p_bajista, p_alcista), max_prob)
+        
+        direction[compra] = 1
+        direction[venta] = -1
+        confidence[compra | venta] = conf[compra | venta]
+        
+        return {'direction': direction, 'confidence': confidence}
 
 
 class RealisticGaleManager:
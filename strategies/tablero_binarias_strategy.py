@@ -5,6 +5,8 @@ Basada en la estrategia de oleal7752 (PineScript)
 """
 
 from strategy_engine import Strategy, Candle, Signal
+from indicators import current_context
+from collections import deque
 from typing import List, Dict, Optional
 import numpy as np
 
@@ -62,56 +64,41 @@ class TableroBinariasStrategy(Strategy):
         return signal
     
     def _analyze_patterns(self, candles: List[Candle]) -> dict:
-        """Analiza patrones en las últimas N velas"""
-        total_velas = min(self.cantidad_velas, len(candles))
-        
-        alcistas = 0
-        bajistas = 0
-        neutras = 0
-        martillos = 0
-        racha_alcista = 0
-        
-        # Analizar cada vela
-        for i in range(1, total_velas + 1):
-            idx = len(candles) - i
-            if idx < 0:
-                break
-                
-            candle = candles[idx]
-            c = candle.close
-            o = candle.open
-            h = candle.high
-            l = candle.low
-            
-            # Contar tipos de velas
-            if c > o:
-                alcistas += 1
-            elif c < o:
-                bajistas += 1
-            else:
-                neutras += 1
-            
-            # Detectar martillos
-            cuerpo = abs(c - o)
-            mecha_inf = min(o, c) - l
-            mecha_sup = h - max(o, c)
-            rango_total = h - l
-            
-            if rango_total > 0:
-                es_martillo = (cuerpo < (rango_total * 0.3) and 
-                              mecha_inf > (cuerpo * 2) and 
-                              mecha_sup < cuerpo)
-                if es_martillo:
-                    martillos += 1
-            
-            # Detectar rachas alcistas de 3
-            if i <= total_velas - 2 and idx >= 2:
-                if (candles[idx].close > candles[idx].open and
-                    candles[idx-1].close > candles[idx-1].open and
-                    candles[idx-2].close > candles[idx-2].open):
-                    racha_alcista += 1
-        
-        # Calcular probabilidades (5 patrones como TradingView)
+        """Analiza patrones en las últimas N velas (conteos O(1) con sumas prefijas)"""
+        n = len(candles)
+        total_velas = min(self.cantidad_velas, n)
+        patterns = current_context().pattern_counts(candles)
+        counts = patterns.counts(n - total_velas, n)
+        
+        # Rachas alcistas de 3 completamente dentro de la ventana
+        racha_alcista = patterns.count('racha_alcista', min(n, n - total_velas + 2), n)
+        
+        return self._calculate_probabilities(
+            int(counts['alcista']), int(counts['bajista']), int(counts['neutra']),
+            int(counts['martillo']), int(racha_alcista)
+        )
+    
+    @staticmethod
+    def _es_martillo(candle: Candle) -> bool:
+        """Martillo: cuerpo chico, mecha inferior larga y mecha superior corta"""
+        c = candle.close
+        o = candle.open
+        cuerpo = abs(c - o)
+        mecha_inf = min(o, c) - candle.low
+        mecha_sup = candle.high - max(o, c)
+        rango_total = candle.high - candle.low
+        
+        if rango_total <= 0:
+            return False
+        
+        return (cuerpo < (rango_total * 0.3) and 
+                mecha_inf > (cuerpo * 2) and 
+                mecha_sup < cuerpo)
+    
+    @staticmethod
+    def _calculate_probabilities(alcistas: int, bajistas: int, neutras: int,
+                                 martillos: int, racha_alcista: int) -> dict:
+        """Calcula probabilidades (5 patrones como TradingView) a partir de los conteos"""
         total_analizadas = alcistas + bajistas + neutras
         
         p_alcista = alcistas / total_analizadas if total_analizadas > 0 else 0
@@ -128,6 +115,100 @@ class TableroBinariasStrategy(Strategy):
             'p_racha_alcista': p_racha_alcista
         }
     
+    def on_candle(self, candle: Candle) -> Optional[Signal]:
+        """
+        Versión streaming: conteos móviles sobre las últimas `cantidad_velas`
+        velas cerradas, O(1) por vela (sin recorrer las 100 velas cada vez)
+        """
+        state = self._stream_state
+        if state is None:
+            state = self._stream_state = {
+                'recent': deque(maxlen=8),
+                'flags': deque(maxlen=self.cantidad_velas),
+                'rachas': deque(maxlen=max(1, self.cantidad_velas - 2)),
+                'counts': [0, 0, 0, 0],
+                'racha_alcista': 0,
+                'count': 0
+            }
+        
+        recent = state['recent']
+        recent.append(candle)
+        counts = state['counts']
+        
+        # Sacar del conteo la vela que sale de la ventana
+        if len(state['flags']) == state['flags'].maxlen:
+            tipo, martillo = state['flags'][0]
+            counts[tipo] -= 1
+            counts[3] -= martillo
+        
+        tipo = 0 if candle.close > candle.open else (1 if candle.close < candle.open else 2)
+        martillo = int(self._es_martillo(candle))
+        state['flags'].append((tipo, martillo))
+        counts[tipo] += 1
+        counts[3] += martillo
+        
+        # Racha alcista x3 que termina en esta vela (la más antigua debe estar en la ventana)
+        racha = int(len(recent) >= 3 and all(c.close > c.open for c in list(recent)[-3:]))
+        if len(state['rachas']) == state['rachas'].maxlen:
+            state['racha_alcista'] -= state['rachas'][0]
+        state['rachas'].append(racha)
+        state['racha_alcista'] += racha
+        state['count'] += 1
+        
+        if state['count'] < self.min_candles:
+            return None
+        
+        analysis = self._calculate_probabilities(
+            counts[0], counts[1], counts[2], counts[3], state['racha_alcista']
+        )
+        
+        # La vela recibida es la última cerrada: se entra en la siguiente, que
+        # abre a su cierre un intervalo después
+        intervalo = candle.time - recent[-2].time
+        return self._signal_from_closed(list(recent), analysis, candle.close, candle.time + intervalo)
+    
+    def analyze_series(self, candles: List[Candle], lookback: int = 200) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Evalúa todas las ventanas del backtest a la vez: los conteos de cada
+        ventana salen de las sumas prefijas y la regla del patrón mayor se
+        aplica vectorizada (empates: gana el primero, igual que max())
+        """
+        n = len(candles)
+        direction = np.zeros(n, dtype=np.int8)
+        confidence = np.zeros(n)
+        if n == 0:
+            return {'direction': direction, 'confidence': confidence}
+        
+        patterns = current_context().pattern_counts(candles)
+        bars = np.arange(n)
+        ends = bars + 1
+        sizes = np.minimum(bars, lookback) + 1
+        totals = np.minimum(self.cantidad_velas, sizes)
+        starts = ends - totals
+        counts = patterns.counts(starts, ends)
+        rachas = patterns.count('racha_alcista', np.minimum(ends, starts + 2), ends)
+        
+        p_alcista = counts['alcista'] / totals
+        p_bajista = counts['bajista'] / totals
+        p_neutra = counts['neutra'] / totals
+        p_martillo = counts['martillo'] / totals
+        p_racha_alcista = np.where(totals >= 3, rachas / np.maximum(totals - 2, 1), 0.0)
+        
+        probs = np.stack([p_alcista, p_bajista, p_neutra, p_martillo, p_racha_alcista], axis=1)
+        patron = np.argmax(probs, axis=1)
+        max_prob = probs[bars, patron]
+        
+        # Alcista / Martillo / Racha → CALL, Bajista → PUT, Neutra → mayor entre alcista y bajista
+        neutra = patron == 2
+        is_call = np.where(neutra, p_alcista >= p_bajista, patron != 1)
+        conf = np.where(neutra, np.where(is_call, p_alcista, p_bajista), max_prob)
+        
+        valid = (sizes >= max(self.min_candles, 2))
+        direction[valid] = np.where(is_call[valid], 1, -1)
+        confidence[valid] = np.maximum(conf[valid], 0.48)
+        
+        return {'direction': direction, 'confidence': confidence}
+    
     def _count_consecutive_against_pattern(self, candles: List[Candle], pattern_type: str) -> int:
         """Cuenta velas consecutivas que van contra el patrón dominante"""
         count = 0
@@ -215,11 +296,20 @@ class TableroBinariasStrategy(Strategy):
             
         # VELA ACTUAL (la que está en curso ahora)
         vela_actual = candles[-1]
-        precio_entrada = vela_actual.open
-        timestamp_entrada = vela_actual.time
+        return self._signal_from_closed(candles[:-1], analysis, vela_actual.open, vela_actual.time)
+    
+    def _signal_from_closed(self, closed: List[Candle], analysis: dict,
+                            precio_entrada: float, timestamp_entrada: int) -> Signal:
+        """
+        Señal para la vela de entrada a partir de las velas CERRADAS
         
+        closed[-1] es la última vela cerrada (referencia de logs y del
+        indicador de reversión); precio_entrada y timestamp_entrada son los
+        de la vela donde se entra (la en curso en analyze, la siguiente a la
+        recibida en on_candle).
+        """
         # Última vela CERRADA (para referencia en logs)
-        vela_anterior = candles[-2]
+        vela_anterior = closed[-1]
         vela_anterior_verde = vela_anterior.close > vela_anterior.open
         vela_anterior_roja = vela_anterior.close < vela_anterior.open
         
@@ -243,7 +333,7 @@ class TableroBinariasStrategy(Strategy):
         max_prob_valor = probs[max_prob_nombre]
         
         # Detectar patrón de reversión (3+ velas + cambio)
-        reversal_marker = self._detect_reversal_pattern(candles[:-1])
+        reversal_marker = self._detect_reversal_pattern(closed)
         
         # Logs de debug detallados
         vela_ant_tipo = "🟢 VERDE" if vela_anterior_verde else ("🔴 ROJA" if vela_anterior_roja else "⚪ DOJI")
@@ -289,7 +379,7 @@ class TableroBinariasStrategy(Strategy):
         
         # Indicadores
         indicators = {
-            'close': precio_entrada,  # Precio de entrada (open de vela actual)
+            'close': precio_entrada,  # Precio de entrada (open de la vela de entrada; cierre de la anterior en streaming)
             'patron': max_prob_nombre,
             'probabilidad': max_prob_valor,
             'reversal_marker': reversal_marker
@@ -301,6 +391,6 @@ class TableroBinariasStrategy(Strategy):
             strategy_name='',
             direction=direction,
             confidence=confidence,
-            timestamp=timestamp_entrada,  # Timestamp de la vela actual
+            timestamp=timestamp_entrada,  # Timestamp de la vela de entrada
             indicators=indicators
         )
@@ -6,7 +6,8 @@ Con sistema de Gale automático
 
 from typing import List, Dict, Optional
 import numpy as np
-from strategy_engine import Strategy, Candle, Signal, calculate_ema
+from strategy_engine import Strategy, Candle, Signal
+from indicators import EMA, current_context
 
 
 class TendencialTradeStrategy(Strategy):
@@ -41,10 +42,11 @@ class TendencialTradeStrategy(Strategy):
         
     def calculate_indicators(self, candles: List[Candle]) -> Dict[str, np.ndarray]:
         """Calcula EMA 200"""
-        closes = np.array([c.close for c in candles])
-        opens = np.array([c.open for c in candles])
+        context = current_context()
+        closes = context.column(candles, 'close')
+        opens = context.column(candles, 'open')
         
-        ema_200 = calculate_ema(closes, self.params['ema_period'])
+        ema_200 = context.ema(candles, self.params['ema_period'])
         
         return {
             'ema_200': ema_200,
@@ -112,3 +114,30 @@ class TendencialTradeStrategy(Strategy):
             )
             
         return None
+    
+    def on_candle(self, candle: Candle) -> Optional[Signal]:
+        """
+        Versión streaming: EMA 200 incremental, O(1) por vela cerrada
+        
+        La EMA se siembra una vez y no se re-siembra: equivale a analyze
+        sobre toda la historia recibida, no a la ventana de 200 velas del
+        backtest (ver Strategy.on_candle).
+        """
+        state = self._stream_state
+        if state is None:
+            state = self._stream_state = {
+                'ema': EMA(self.params['ema_period']),
+                'count': 0
+            }
+        
+        current_ema = state['ema'].update(candle.close)
+        state['count'] += 1
+        
+        if state['count'] < self.min_candles:
+            return None
+        
+        return self.generate_signal([candle], {
+            'ema_200': np.array([current_ema]),
+            'closes': np.array([candle.close]),
+            'opens': np.array([candle.open])
+        })
@@ -4,11 +4,19 @@ Arquitectura para estrategias automatizadas, backtesting y auto-trading
 """
 
 from abc import ABC, abstractmethod
+from collections import deque
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Literal
+from typing import Any, Iterable, Iterator, List, Dict, Optional, Literal, Sequence, Union
 from datetime import datetime
+import csv
+import hashlib
 import numpy as np
-import pandas as pd
+
+import indicators
+
+
+# Velas que guarda on_candle por defecto (mismo largo que piden los bots)
+STREAM_HISTORY = 200
 
 
 @dataclass
@@ -26,6 +34,167 @@ class Candle:
             self.time = int(self.time.timestamp())
 
 
+def _timestamp(value) -> int:
+    """Timestamp entero a partir de int/float/str numérico o datetime"""
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(float(value))
+
+
+class CandleSeries:
+    """
+    Velas en formato columnar (struct-of-arrays)
+    
+    time (int64) y open/high/low/close/volume (float64) son arrays NumPy
+    contiguos. series[a:b] devuelve otra CandleSeries que comparte memoria
+    con la original (sin copias), así las ventanas del backtest no crean
+    objetos por vela. Para compatibilidad con el código que espera
+    List[Candle], series[i] y la iteración devuelven objetos Candle.
+    """
+    
+    FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+    __slots__ = FIELDS
+    
+    def __init__(self, time, open, high, low, close, volume=None):
+        self.time = np.asarray(time, dtype=np.int64)
+        self.open = np.asarray(open, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.low = np.asarray(low, dtype=float)
+        self.close = np.asarray(close, dtype=float)
+        self.volume = np.zeros(len(self.time)) if volume is None else np.asarray(volume, dtype=float)
+        
+        if any(len(getattr(self, name)) != len(self.time) for name in self.FIELDS):
+            raise ValueError("Todas las columnas de CandleSeries deben tener el mismo largo")
+    
+    @classmethod
+    def from_candles(cls, candles: Iterable[Any], time_field: str = 'time') -> 'CandleSeries':
+        """
+        Construye la serie desde objetos con atributos open/high/low/close/volume
+        (strategy_engine.Candle, realtime_trading.candles.Candle con time_field='start_ts', ...)
+        """
+        if isinstance(candles, CandleSeries):
+            return candles
+        candles = list(candles)
+        return cls(
+            time=[getattr(c, time_field) for c in candles],
+            open=[c.open for c in candles],
+            high=[c.high for c in candles],
+            low=[c.low for c in candles],
+            close=[c.close for c in candles],
+            volume=[getattr(c, 'volume', 0.0) or 0.0 for c in candles]
+        )
+    
+    @classmethod
+    def from_dicts(cls, rows: Sequence[Dict[str, Any]]) -> 'CandleSeries':
+        """Construye la serie desde dicts {'time', 'open', 'high', 'low', 'close', 'volume'} (APIs, CandleService)"""
+        return cls(
+            time=[_timestamp(r['time']) for r in rows],
+            open=[r['open'] for r in rows],
+            high=[r['high'] for r in rows],
+            low=[r['low'] for r in rows],
+            close=[r['close'] for r in rows],
+            volume=[r.get('volume') or 0.0 for r in rows]
+        )
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> 'CandleSeries':
+        """
+        Construye la serie desde filas (timestamp, open, high, low, close, volume)
+        tal como las retorna SELECT timestamp, open, high, low, close, volume
+        """
+        rows = list(rows)
+        if not rows:
+            return cls([], [], [], [], [], [])
+        time, open_, high, low, close, volume = zip(*rows)
+        return cls(
+            time=[_timestamp(t) for t in time],
+            open=open_,
+            high=high,
+            low=low,
+            close=close,
+            volume=[v or 0.0 for v in volume]
+        )
+    
+    @classmethod
+    def from_csv(cls, path: str, delimiter: str = ',') -> 'CandleSeries':
+        """
+        Construye la serie desde un CSV con encabezado
+        (time o timestamp, open, high, low, close y opcionalmente volume)
+        """
+        with open(path, newline='') as f:
+            reader = csv.DictReader(f, delimiter=delimiter)
+            columns = {name.strip().lower(): [] for name in reader.fieldnames or []}
+            keys = {name: name.strip().lower() for name in reader.fieldnames or []}
+            for row in reader:
+                for name, value in row.items():
+                    columns[keys[name]].append(value)
+        
+        time = columns.get('time', columns.get('timestamp'))
+        if time is None:
+            raise ValueError(f"CSV sin columna time/timestamp: {path}")
+        return cls(
+            time=[_timestamp(t) for t in time],
+            open=np.array(columns['open'], dtype=float),
+            high=np.array(columns['high'], dtype=float),
+            low=np.array(columns['low'], dtype=float),
+            close=np.array(columns['close'], dtype=float),
+            volume=np.array([v or 0.0 for v in columns['volume']], dtype=float) if 'volume' in columns else None
+        )
+    
+    def __len__(self) -> int:
+        return len(self.time)
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[Candle, 'CandleSeries']:
+        if isinstance(index, slice):
+            # Vista sin copias ni validación: las columnas ya son arrays del mismo largo
+            window = object.__new__(CandleSeries)
+            window.time = self.time[index]
+            window.open = self.open[index]
+            window.high = self.high[index]
+            window.low = self.low[index]
+            window.close = self.close[index]
+            window.volume = self.volume[index]
+            return window
+        return Candle(
+            time=self.time.item(index),
+            open=self.open.item(index),
+            high=self.high.item(index),
+            low=self.low.item(index),
+            close=self.close.item(index),
+            volume=self.volume.item(index)
+        )
+    
+    def __iter__(self) -> Iterator[Candle]:
+        columns = (getattr(self, name).tolist() for name in self.FIELDS)
+        for time, open_, high, low, close, volume in zip(*columns):
+            yield Candle(time, open_, high, low, close, volume)
+    
+    def to_candles(self) -> List[Candle]:
+        """Convierte a List[Candle] (para código que requiere una lista)"""
+        return list(self)
+    
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Convierte a lista de dicts (formato de las APIs)"""
+        return [
+            {'time': t, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+            for t, o, h, l, c, v in zip(*(getattr(self, name).tolist() for name in self.FIELDS))
+        ]
+    
+    def fingerprint(self) -> str:
+        """Hash del contenido de todas las columnas: cambia si cambia cualquier vela"""
+        digest = hashlib.blake2b(digest_size=16)
+        for name in self.FIELDS:
+            column = np.ascontiguousarray(getattr(self, name))
+            digest.update(column.dtype.str.encode())
+            digest.update(column.tobytes())
+        return digest.hexdigest()
+
+
+def as_candle_series(candles: Union[List[Candle], CandleSeries]) -> CandleSeries:
+    """Retorna las velas como CandleSeries (sin copiar si ya lo son)"""
+    return candles if isinstance(candles, CandleSeries) else CandleSeries.from_candles(candles)
+
+
 @dataclass
 class Signal:
     """Señal de trading generada por una estrategia"""
@@ -89,6 +258,7 @@ class Strategy(ABC):
         self.name = name
         self.params = params or {}
         self.min_candles = 50
+        self._stream_state: Optional[dict] = None
         
     @abstractmethod
     def calculate_indicators(self, candles: List[Candle]) -> Dict[str, np.ndarray]:
@@ -115,6 +285,48 @@ class Strategy(ABC):
             
         return signal
     
+    def analyze_series(self, candles: List[Candle], lookback: int = 200) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Evalúa la estrategia en todas las velas en una sola pasada
+
+        El valor en la posición i debe coincidir con `analyze` sobre la ventana
+        candles[max(0, i - lookback):i + 1], que es la que usa el backtesting.
+
+        Returns:
+            Dict con arrays del mismo largo que `candles`:
+            - 'direction': 1 (CALL), -1 (PUT), 0 (sin señal)
+            - 'confidence': confianza de la señal (0.0 si no hay señal)
+            o None si la estrategia no soporta evaluación por serie
+        """
+        return None
+
+    def on_candle(self, candle: Candle) -> Optional[Signal]:
+        """
+        Interfaz streaming: procesa una vela CERRADA y retorna la señal para ella
+
+        El estado se conserva entre llamadas. La implementación por defecto
+        guarda las últimas STREAM_HISTORY velas y llama a analyze (O(ventana));
+        las estrategias con indicadores incrementales la sobreescriben para
+        hacer trabajo constante por vela.
+
+        Las sobreescrituras equivalen a analyze sobre TODAS las velas
+        recibidas, no sobre una ventana (ver test_streaming_strategies.py).
+        Los indicadores recursivos (EMA, MACD, RSI de Wilder) se siembran
+        una vez y arrastran toda la historia, mientras que analyze en los
+        backtests los re-siembra en cada ventana de BACKTEST_LOOKBACK velas.
+        Por eso en vivo la EMA 200 de TendencialTradeStrategy no coincide con
+        la del backtest, y RSI/MACD pueden diferir cerca de los umbrales.
+        """
+        if self._stream_state is None:
+            self._stream_state = {'candles': deque(maxlen=max(self.min_candles, STREAM_HISTORY))}
+
+        self._stream_state['candles'].append(candle)
+        return self.analyze('', '', list(self._stream_state['candles']))
+
+    def reset_stream(self):
+        """Descarta el estado acumulado por on_candle"""
+        self._stream_state = None
+
     def get_config(self) -> dict:
         """Retorna la configuración de la estrategia"""
         return {
@@ -130,6 +342,7 @@ class StrategyEngine:
     def __init__(self):
         self.strategies: Dict[str, Strategy] = {}
         self.active_strategies: List[str] = []
+        self.last_indicator_stats: Dict[str, int] = {}
         
     def register_strategy(self, strategy: Strategy):
         """Registra una nueva estrategia en el motor"""
@@ -149,16 +362,24 @@ class StrategyEngine:
             print(f"🔴 Estrategia desactivada: {strategy_name}")
             
     def analyze_market(self, symbol: str, timeframe: str, candles: List[Candle]) -> List[Signal]:
-        """Analiza el mercado con todas las estrategias activas"""
+        """
+        Analiza el mercado con todas las estrategias activas
+        
+        Los indicadores se calculan una sola vez por lista de velas y se
+        comparten entre estrategias (ver indicators.indicator_context);
+        los contadores de la pasada quedan en last_indicator_stats.
+        """
         signals = []
         
-        for strategy_name in self.active_strategies:
-            strategy = self.strategies.get(strategy_name)
-            if strategy:
-                signal = strategy.analyze(symbol, timeframe, candles)
-                if signal:
-                    signals.append(signal)
-                    
+        with indicators.indicator_context() as context:
+            for strategy_name in self.active_strategies:
+                strategy = self.strategies.get(strategy_name)
+                if strategy:
+                    signal = strategy.analyze(symbol, timeframe, candles)
+                    if signal:
+                        signals.append(signal)
+        
+        self.last_indicator_stats = context.stats()
         return signals
     
     def get_all_strategies(self) -> List[dict]:
@@ -175,69 +396,38 @@ class StrategyEngine:
 
 def calculate_sma(prices: np.ndarray, period: int) -> np.ndarray:
     """Calcula Simple Moving Average"""
-    return pd.Series(prices).rolling(window=period).mean().values
+    return indicators.sma(prices, period)
 
 
 def calculate_ema(prices: np.ndarray, period: int) -> np.ndarray:
     """Calcula Exponential Moving Average"""
-    return pd.Series(prices).ewm(span=period, adjust=False).mean().values
+    return indicators.ema(prices, period)
 
 
 def calculate_rsi(prices: np.ndarray, period: int = 14) -> np.ndarray:
-    """Calcula Relative Strength Index"""
-    deltas = np.diff(prices)
-    seed = deltas[:period+1]
-    up = seed[seed >= 0].sum() / period
-    down = -seed[seed < 0].sum() / period
-    rs = up / down if down != 0 else 0
-    rsi = np.zeros_like(prices)
-    rsi[:period] = 100. - 100. / (1. + rs)
-    
-    for i in range(period, len(prices)):
-        delta = deltas[i-1]
-        if delta > 0:
-            upval = delta
-            downval = 0.
-        else:
-            upval = 0.
-            downval = -delta
-            
-        up = (up * (period - 1) + upval) / period
-        down = (down * (period - 1) + downval) / period
-        rs = up / down if down != 0 else 0
-        rsi[i] = 100. - 100. / (1. + rs)
-        
-    return rsi
+    """Calcula Relative Strength Index (Wilder, NaN durante las primeras `period` velas)"""
+    return indicators.rsi(prices, period)
+
+
+def calculate_rsi_windows(prices: np.ndarray, period: int = 14, lookback: int = 200) -> Dict[str, np.ndarray]:
+    """
+    Calcula los dos últimos valores de calculate_rsi para cada ventana
+    prices[max(0, i - lookback):i + 1], todas las ventanas a la vez.
+
+    Returns:
+        Dict con 'last' (rsi[-1]) y 'prev' (rsi[-2]) por cada índice i
+    """
+    return indicators.rsi_windows(prices, period, lookback)
 
 
 def calculate_macd(prices: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
     """Calcula MACD (Moving Average Convergence Divergence)"""
-    ema_fast = calculate_ema(prices, fast)
-    ema_slow = calculate_ema(prices, slow)
-    macd_line = ema_fast - ema_slow
-    signal_line = calculate_ema(macd_line, signal)
-    histogram = macd_line - signal_line
-    
-    return {
-        'macd': macd_line,
-        'signal': signal_line,
-        'histogram': histogram
-    }
+    return indicators.macd(prices, fast, slow, signal)
 
 
 def calculate_bollinger_bands(prices: np.ndarray, period: int = 20, std_dev: float = 2.0) -> Dict[str, np.ndarray]:
     """Calcula Bandas de Bollinger"""
-    sma = calculate_sma(prices, period)
-    std = pd.Series(prices).rolling(window=period).std().values
-    
-    upper_band = sma + (std * std_dev)
-    lower_band = sma - (std * std_dev)
-    
-    return {
-        'upper': upper_band,
-        'middle': sma,
-        'lower': lower_band
-    }
+    return indicators.bollinger_bands(prices, period, std_dev)
 
 
 if __name__ == '__main__':
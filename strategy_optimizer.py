@@ -0,0 +1,547 @@
+"""
+Optimizador de Parámetros - STC Trading System
+Búsqueda grid, aleatoria y successive halving sobre el motor de backtesting,
+y backtesting walk-forward (re-optimización por fold + evaluación fuera de muestra)
+
+Cada combinación de parámetros se evalúa con BacktestingEngine.run_backtest
+(modo vectorizado por defecto) sobre el historial completo, restringiendo
+los trades a un rango de velas. Las evaluaciones de un mismo proceso
+comparten un FullSeriesContext: las columnas, indicadores y la serie de
+señales de cada combinación se calculan una sola vez sobre todo el
+historial y se reutilizan en cada ronda y en cada fold. Solo se guarda
+lo calculado sobre el historial completo; las ventanas por vela del modo
+loop (estrategias sin analyze_series) se calculan sin caché. Con workers > 1
+el trabajo se reparte en un pool de procesos y las velas viajan por
+memoria compartida.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import product
+from typing import Any, Dict, List, Optional, Type, Union
+import inspect
+import math
+import os
+import numpy as np
+
+from strategy_engine import Strategy, Candle, CandleSeries, as_candle_series
+from backtesting_engine import (
+    BacktestingEngine, BacktestResult, TradeRecords, ProgressCallback, BACKTEST_MODES, RESULT_CODES,
+    _share_candles, _attach_candles, _worker_candles, _max_run
+)
+from indicators import IndicatorContext, indicator_context
+
+
+SEARCH_METHODS = ('grid', 'random', 'halving')
+
+# Métricas de BacktestResult.to_dict() donde "menor es mejor"
+MINIMIZE_METRICS = ('max_drawdown', 'max_drawdown_percent', 'losing_trades', 'max_consecutive_losses', 'total_loss')
+
+
+class FullSeriesContext(IndicatorContext):
+    """
+    IndicatorContext que solo memoiza lo calculado sobre una serie
+
+    Las ventanas que el backtest en modo loop arma en cada vela son objetos
+    nuevos: cachearlas solo acumularía memoria (combinaciones x velas) sin
+    aciertos. La memoria queda acotada por combinaciones x indicadores.
+    """
+
+    def __init__(self, candles: CandleSeries):
+        super().__init__()
+        self.candles = candles
+
+    def cached(self, candles, name: str, params: tuple, compute):
+        if candles is not self.candles:
+            return compute()
+        return super().cached(candles, name, params, compute)
+
+
+def parameter_grid(space: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Todas las combinaciones del espacio de parámetros (producto cartesiano)
+
+    Cada valor del espacio es una lista de candidatos; un valor escalar se
+    toma como fijo. El orden respeta el orden de las claves.
+    """
+    names = list(space.keys())
+    values = [v if isinstance(v, (list, tuple, range, np.ndarray)) else [v] for v in space.values()]
+    return [dict(zip(names, combo)) for combo in product(*values)]
+
+
+@dataclass
+class WalkForwardFold:
+    """Un fold de walk-forward: parámetros elegidos en train y resultado en test"""
+    index: int
+    train_start: int
+    train_end: int
+    test_start: int
+    test_end: int
+    params: Dict[str, Any]
+    train_metrics: Dict[str, Any]
+    test_result: BacktestResult
+
+    def to_dict(self) -> dict:
+        return {
+            'index': self.index,
+            'train_start': self.train_start,
+            'train_end': self.train_end,
+            'test_start': self.test_start,
+            'test_end': self.test_end,
+            'params': self.params,
+            'train_metrics': self.train_metrics,
+            'test_metrics': self.test_result.to_dict()
+        }
+
+
+@dataclass
+class WalkForwardResult:
+    """Resultado walk-forward: folds y métricas fuera de muestra encadenadas"""
+    folds: List[WalkForwardFold] = field(default_factory=list)
+    out_of_sample: Optional[BacktestResult] = None
+
+    def to_dict(self) -> dict:
+        return {
+            'folds': [fold.to_dict() for fold in self.folds],
+            'out_of_sample': self.out_of_sample.to_dict() if self.out_of_sample else None,
+            'equity_curve': self.out_of_sample.equity_curve.tolist() if self.out_of_sample else []
+        }
+
+
+class StrategyOptimizer:
+    """Busca los mejores parámetros de una estrategia sobre un set de velas"""
+
+    def __init__(
+        self,
+        strategy_class: Type[Strategy],
+        metric: str = 'net_profit',
+        initial_balance: float = 1000.0,
+        trade_amount: float = 1.0,
+        payout_percent: float = 85.0,
+        trade_duration: int = 5,
+        mode: str = 'vectorized',
+        workers: int = 1,
+        progress: Optional[ProgressCallback] = None
+    ):
+        """
+        Args:
+            strategy_class: clase de la estrategia; se instancia como strategy_class(params)
+            metric: clave de BacktestResult.to_dict() usada para rankear
+            mode: modo del backtest ('vectorized' usa analyze_series si la estrategia lo soporta)
+            workers: procesos a usar (1 = serial, 0 = uno por CPU)
+            progress: callback(hechas, total, 0) por combinación evaluada (por
+                bloque con workers > 1) y por fold en walk-forward; si lanza
+                una excepción la búsqueda se interrumpe
+
+        Raises:
+            ValueError: si la estrategia no recibe params (p. ej. TableroBinariasStrategy)
+        """
+        if 'params' not in inspect.signature(strategy_class.__init__).parameters:
+            raise ValueError(f"{strategy_class.__name__} no tiene parámetros configurables")
+        if mode not in BACKTEST_MODES:
+            raise ValueError(f"Modo de backtest inválido: {mode}. Válidos: {BACKTEST_MODES}")
+        if metric not in BacktestResult('', '', '', 0, 0, 1.0, 1.0).to_dict():
+            raise ValueError(f"Métrica inválida: {metric}")
+
+        self.strategy_class = strategy_class
+        self.metric = metric
+        self.engine = BacktestingEngine(
+            initial_balance=initial_balance,
+            trade_amount=trade_amount,
+            payout_percent=payout_percent
+        )
+        self.trade_duration = trade_duration
+        self.mode = mode
+        self.workers = (os.cpu_count() or 1) if workers == 0 else workers
+        self.progress = progress
+        # Caché de indicadores/series del historial en el proceso actual
+        # (rondas y folds la comparten; se reemplaza si cambian las velas)
+        self.context: Optional[FullSeriesContext] = None
+
+    def optimize(
+        self,
+        space: Dict[str, Any],
+        candles: Union[List[Candle], CandleSeries],
+        method: str = 'grid',
+        symbol: str = '',
+        timeframe: str = '',
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """Ejecuta la búsqueda indicada ('grid', 'random' o 'halving')"""
+        if method == 'grid':
+            return self.grid_search(space, candles, symbol=symbol, timeframe=timeframe, **kwargs)
+        if method == 'random':
+            return self.random_search(space, candles, symbol=symbol, timeframe=timeframe, **kwargs)
+        if method == 'halving':
+            return self.successive_halving(space, candles, symbol=symbol, timeframe=timeframe, **kwargs)
+        raise ValueError(f"Método de búsqueda inválido: {method}. Válidos: {SEARCH_METHODS}")
+
+    def grid_search(
+        self,
+        space: Dict[str, Any],
+        candles: Union[List[Candle], CandleSeries],
+        symbol: str = '',
+        timeframe: str = '',
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Evalúa todas las combinaciones del espacio en el rango [start, end) y retorna la tabla rankeada"""
+        configs = parameter_grid(space)
+        candles = as_candle_series(candles)
+        end = len(candles) if end is None else end
+        print(f"🔎 Grid search: {len(configs)} combinaciones sobre {end - start} velas")
+        return self._rank(self._evaluate(configs, candles, symbol, timeframe, start, end))
+
+    def random_search(
+        self,
+        space: Dict[str, Any],
+        candles: Union[List[Candle], CandleSeries],
+        n_iter: int = 100,
+        seed: int = 0,
+        symbol: str = '',
+        timeframe: str = '',
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Evalúa n_iter combinaciones del espacio elegidas al azar (sin repetir)"""
+        configs = self._sample(parameter_grid(space), n_iter, seed)
+        candles = as_candle_series(candles)
+        end = len(candles) if end is None else end
+        print(f"🎲 Random search: {len(configs)} combinaciones sobre {end - start} velas")
+        return self._rank(self._evaluate(configs, candles, symbol, timeframe, start, end))
+
+    def successive_halving(
+        self,
+        space: Dict[str, Any],
+        candles: Union[List[Candle], CandleSeries],
+        n_configs: Optional[int] = None,
+        eta: int = 3,
+        min_budget: int = 1000,
+        seed: int = 0,
+        symbol: str = '',
+        timeframe: str = '',
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Successive halving: evalúa muchas combinaciones con pocas velas y
+        solo el mejor 1/eta de cada ronda pasa a la siguiente, con eta veces
+        más velas, hasta usar todo el rango [start, end).
+
+        Args:
+            n_configs: combinaciones iniciales elegidas al azar (None = todo el grid)
+            eta: factor de reducción por ronda
+            min_budget: velas mínimas de la primera ronda (las más recientes del rango)
+
+        Returns:
+            Tabla con todas las combinaciones evaluadas: primero las que
+            llegaron a la última ronda, después las eliminadas en rondas
+            anteriores; cada fila indica con cuántas velas se evaluó.
+        """
+        if eta < 2:
+            raise ValueError("eta debe ser >= 2")
+
+        configs = parameter_grid(space)
+        if n_configs is not None:
+            configs = self._sample(configs, n_configs, seed)
+        candles = as_candle_series(candles)
+        end = len(candles) if end is None else end
+        total = end - start
+
+        rungs = 1 + int(math.log(max(1, len(configs)), eta) + 1e-9)
+        while rungs > 1 and total // eta ** (rungs - 1) < min_budget:
+            rungs -= 1
+
+        print(f"✂️  Successive halving: {len(configs)} combinaciones, {rungs} rondas, eta={eta}")
+
+        eliminated: List[List[Dict[str, Any]]] = []
+        for rung in range(rungs):
+            budget = total if rung == rungs - 1 else total // eta ** (rungs - 1 - rung)
+            rows = self._rank(self._evaluate(configs, candles, symbol, timeframe, end - budget, end))
+            print(f"   Ronda {rung + 1}: {len(rows)} combinaciones con {budget} velas")
+
+            if rung == rungs - 1:
+                eliminated.append(rows)
+                break
+
+            keep = max(1, math.ceil(len(rows) / eta))
+            eliminated.append(rows[keep:])
+            configs = [row['params'] for row in rows[:keep]]
+
+        table = [row for rows in reversed(eliminated) for row in rows]
+        for rank, row in enumerate(table, start=1):
+            row['rank'] = rank
+        return table
+
+    def walk_forward(
+        self,
+        space: Dict[str, Any],
+        candles: Union[List[Candle], CandleSeries],
+        train_size: int,
+        test_size: int,
+        step: Optional[int] = None,
+        method: str = 'grid',
+        symbol: str = '',
+        timeframe: str = '',
+        **search_kwargs
+    ) -> WalkForwardResult:
+        """
+        Backtesting walk-forward con folds train/test móviles
+
+        En cada fold los parámetros se re-optimizan sobre
+        [inicio, inicio + train_size) y el mejor se evalúa sobre las
+        test_size velas siguientes; el inicio avanza `step` velas (por
+        defecto test_size, folds de test sin solapamiento). Los folds se
+        reparten entre procesos si workers > 1. Las curvas de equity fuera
+        de muestra se encadenan en WalkForwardResult.out_of_sample.
+        """
+        if train_size <= 0 or test_size <= 0:
+            raise ValueError("train_size y test_size deben ser > 0")
+        if method not in SEARCH_METHODS:
+            raise ValueError(f"Método de búsqueda inválido: {method}. Válidos: {SEARCH_METHODS}")
+
+        candles = as_candle_series(candles)
+        step = step or test_size
+        folds = []
+        fold_start = 0
+        while fold_start + train_size + test_size <= len(candles):
+            train_end = fold_start + train_size
+            folds.append((len(folds), fold_start, train_end, train_end, train_end + test_size))
+            fold_start += step
+
+        if not folds:
+            raise ValueError(f"Velas insuficientes para un fold: {len(candles)} < {train_size + test_size}")
+
+        print(f"🚶 Walk-forward: {len(folds)} folds (train={train_size}, test={test_size}, step={step})")
+
+        task = (self._settings(), space, method, search_kwargs, symbol, timeframe)
+        workers = min(self.workers, len(folds))
+
+        if workers <= 1:
+            results = []
+            for fold in folds:
+                results.append(_run_fold(task, fold, candles, self._context(candles)))
+                if self.progress is not None:
+                    self.progress(len(results), len(folds), 0)
+        else:
+            shm = _share_candles(candles)
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_attach_candles,
+                    initargs=(shm.name, len(candles))
+                ) as pool:
+                    futures = [pool.submit(_run_fold_worker, task, fold) for fold in folds]
+                    results = _gather(futures, [1] * len(folds), self.progress)
+            finally:
+                shm.close()
+                shm.unlink()
+
+        return WalkForwardResult(
+            folds=results,
+            out_of_sample=self._stitch([fold.test_result for fold in results], symbol, timeframe)
+        )
+
+    def _context(self, candles: CandleSeries) -> FullSeriesContext:
+        if self.context is None or self.context.candles is not candles:
+            self.context = FullSeriesContext(candles)
+        return self.context
+
+    def _settings(self) -> Dict[str, Any]:
+        """Argumentos para recrear el optimizador (serial) en otro proceso"""
+        return {
+            'strategy_class': self.strategy_class,
+            'metric': self.metric,
+            'initial_balance': self.engine.initial_balance,
+            'trade_amount': self.engine.trade_amount,
+            'payout_percent': self.engine.payout_percent,
+            'trade_duration': self.trade_duration,
+            'mode': self.mode,
+            'workers': 1
+        }
+
+    def _stitch(self, results: List[BacktestResult], symbol: str, timeframe: str) -> BacktestResult:
+        """Encadena los resultados de test: la equity de cada fold arranca donde terminó la anterior"""
+        stitched = BacktestResult(
+            strategy_name=results[0].strategy_name,
+            symbol=symbol,
+            timeframe=timeframe,
+            start_time=results[0].start_time,
+            end_time=results[-1].end_time,
+            initial_balance=self.engine.initial_balance,
+            final_balance=self.engine.initial_balance
+        )
+
+        balance = self.engine.initial_balance
+        curves = [np.array([balance])]
+        for result in results:
+            curves.append(np.asarray(result.equity_curve[1:]) + (balance - result.initial_balance))
+            balance = float(curves[-1][-1]) if len(curves[-1]) else balance
+
+            stitched.total_trades += result.total_trades
+            stitched.winning_trades += result.winning_trades
+            stitched.losing_trades += result.losing_trades
+            stitched.draw_trades += result.draw_trades
+            stitched.total_profit += result.total_profit
+            stitched.total_loss += result.total_loss
+            stitched.gross_profit += result.gross_profit
+            stitched.gross_loss += result.gross_loss
+            stitched.largest_win = max(stitched.largest_win, result.largest_win)
+            if abs(result.largest_loss) > abs(stitched.largest_loss):
+                stitched.largest_loss = result.largest_loss
+
+        stitched.final_balance = balance
+        stitched.equity_curve = np.concatenate(curves)
+        stitched.trades = TradeRecords.concatenate([result.trades for result in results])
+        outcomes = stitched.trades.data['result']
+        stitched.max_consecutive_wins = _max_run(outcomes == RESULT_CODES['WIN'])
+        stitched.max_consecutive_losses = _max_run(outcomes == RESULT_CODES['LOSS'])
+        stitched.calculate_metrics()
+        return stitched
+
+    def _sample(self, configs: List[Dict[str, Any]], n: int, seed: int) -> List[Dict[str, Any]]:
+        """Muestra reproducible de n combinaciones sin repetir"""
+        if n >= len(configs):
+            return configs
+        order = np.random.default_rng(seed).permutation(len(configs))[:n]
+        return [configs[i] for i in order.tolist()]
+
+    def _rank(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Ordena por la métrica (estable: empates en orden de evaluación) y numera"""
+        sign = 1 if self.metric in MINIMIZE_METRICS else -1
+        rows = sorted(rows, key=lambda row: sign * row[self.metric])
+        for rank, row in enumerate(rows, start=1):
+            row['rank'] = rank
+        return rows
+
+    def _evaluate(
+        self,
+        configs: List[Dict[str, Any]],
+        candles: CandleSeries,
+        symbol: str,
+        timeframe: str,
+        start: int,
+        end: int
+    ) -> List[Dict[str, Any]]:
+        """Evalúa las combinaciones con trades en [start, end) (filas en el orden de configs)"""
+        task = (self.strategy_class, self.engine, symbol, timeframe, self.trade_duration, self.mode)
+        workers = min(self.workers, len(configs))
+
+        if workers <= 1:
+            return _evaluate_configs(task, configs, candles, self._context(candles), start, end, self.progress)
+
+        # Bloques contiguos: pocas tareas por proceso y resultados en orden
+        size = math.ceil(len(configs) / (workers * 4))
+        chunks = [configs[i:i + size] for i in range(0, len(configs), size)]
+
+        shm = _share_candles(candles)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_attach_candles,
+                initargs=(shm.name, len(candles))
+            ) as pool:
+                futures = [pool.submit(_evaluate_worker, task, chunk, start, end) for chunk in chunks]
+                results = _gather(futures, [len(chunk) for chunk in chunks], self.progress)
+                return [row for rows in results for row in rows]
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+def _evaluate_configs(
+    task: tuple,
+    configs: List[Dict[str, Any]],
+    candles: CandleSeries,
+    context: FullSeriesContext,
+    start: int,
+    end: int,
+    progress: Optional[ProgressCallback] = None
+) -> List[Dict[str, Any]]:
+    """Backtest de cada combinación compartiendo el contexto de indicadores"""
+    strategy_class, engine, symbol, timeframe, trade_duration, mode = task
+    rows = []
+    with indicator_context(context):
+        for params in configs:
+            strategy = strategy_class(dict(params))
+            result = engine.run_backtest(strategy, symbol, timeframe, candles, trade_duration, mode, start, end)
+            row = {'rank': 0, 'params': dict(params), 'candles': end - start}
+            row.update(result.to_dict())
+            rows.append(row)
+            if progress is not None:
+                progress(len(rows), len(configs), 0)
+    return rows
+
+
+def _gather(futures: list, sizes: List[int], progress: Optional[ProgressCallback]) -> list:
+    """
+    Resultados de las tareas del pool en orden, reportando el avance (en
+    unidades de `sizes`) a medida que terminan. Si progress lanza (p. ej.
+    el trabajo fue cancelado) se cancelan las tareas que no empezaron.
+    """
+    results = []
+    done = 0
+    try:
+        for future, size in zip(futures, sizes):
+            results.append(future.result())
+            done += size
+            if progress is not None:
+                progress(done, sum(sizes), 0)
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    return results
+
+
+def _worker_context() -> FullSeriesContext:
+    """Contexto persistente del proceso del pool (la serie compartida es siempre el mismo objeto)"""
+    context = _worker_candles.get('context')
+    if context is None or context.candles is not _worker_candles['candles']:
+        context = _worker_candles['context'] = FullSeriesContext(_worker_candles['candles'])
+    return context
+
+
+def _evaluate_worker(task: tuple, configs: List[Dict[str, Any]], start: int, end: int) -> List[Dict[str, Any]]:
+    """Tarea del pool: evalúa un bloque de combinaciones sobre las velas compartidas"""
+    return _evaluate_configs(task, configs, _worker_candles['candles'], _worker_context(), start, end)
+
+
+def _run_fold(task: tuple, fold: tuple, candles: CandleSeries, context: FullSeriesContext) -> WalkForwardFold:
+    """Optimiza en el tramo train del fold y evalúa el mejor set de parámetros en el tramo test"""
+    settings, space, method, search_kwargs, symbol, timeframe = task
+    index, train_start, train_end, test_start, test_end = fold
+
+    optimizer = StrategyOptimizer(**settings)
+    optimizer.context = context
+    best = optimizer.optimize(
+        space, candles, method, symbol, timeframe,
+        start=train_start, end=train_end, **search_kwargs
+    )[0]
+
+    with indicator_context(context):
+        test_result = optimizer.engine.run_backtest(
+            optimizer.strategy_class(dict(best['params'])), symbol, timeframe, candles,
+            optimizer.trade_duration, optimizer.mode, test_start, test_end
+        )
+
+    return WalkForwardFold(
+        index=index,
+        train_start=train_start,
+        train_end=train_end,
+        test_start=test_start,
+        test_end=test_end,
+        params=dict(best['params']),
+        train_metrics=best,
+        test_result=test_result
+    )
+
+
+def _run_fold_worker(task: tuple, fold: tuple) -> WalkForwardFold:
+    """Tarea del pool: un fold completo sobre las velas compartidas"""
+    return _run_fold(task, fold, _worker_candles['candles'], _worker_context())
+
+
+if __name__ == '__main__':
+    print("🔧 Strategy Optimizer - STC Trading System")
+    print("Búsqueda grid, aleatoria, successive halving y walk-forward")
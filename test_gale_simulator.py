@@ -0,0 +1,140 @@
+"""
+Pruebas del simulador de gales: contabilidad de la simulación vectorizada
+contra un recorrido vela por vela y contra su propia curva de equity
+"""
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_candles
+from dual_gale_manager import DualGaleManager
+from gale_simulator import GaleSimulator, DIRECTIONS, MAX_MONTE_CARLO_PATHS, MAX_MONTE_CARLO_STEPS
+
+
+PAYOUT = 0.87
+
+
+def _replay_manager(signals: np.ndarray, colors: np.ndarray, expiry: int, max_gale: int,
+                    base_amount: float = 5.0, allow_override: bool = True) -> list:
+    """
+    Secuencias terminadas al pasar las señales por DualGaleManager vela por
+    vela con los tiempos de DualGaleBot: la señal de una vela se atiende
+    antes que los resultados que vencen en ella, tras una secuencia ganada
+    se re-analiza esa vela y un Gale 0 reemplazado se liquida solo.
+
+    Retorna (dirección, inicio, gale, ganó, reemplazada, profit) por secuencia.
+    """
+    manager = DualGaleManager(base_amount, max_gale, PAYOUT)
+    n = len(signals)
+    pending = []
+    finished = []
+
+    def current(name):
+        return manager.call_sequence if name == 'CALL' else manager.put_sequence
+
+    def place(name, sequence, ledger, amount, bar):
+        ledger['profit'] -= amount
+        pending.append((bar + expiry - 1, name, sequence, ledger, amount))
+
+    def start(name, bar):
+        trade = manager.start_sequence(name, 0.0, allow_override=allow_override)
+        if trade:
+            place(name, current(name), {'start': bar + 1, 'profit': 0.0}, trade['amount'], bar + 1)
+
+    for t in range(n):
+        for name, sign in DIRECTIONS.items():
+            if signals[t] == sign:
+                start(name, t)
+
+            for trade in [trade for trade in pending if trade[0] == t and trade[1] == name]:
+                pending.remove(trade)
+                _, _, sequence, ledger, amount = trade
+                won = bool(colors[t] == sign)
+                if won:
+                    ledger['profit'] += amount * (1 + PAYOUT)
+
+                if sequence is not current(name):
+                    finished.append((sign, ledger['start'], 0, won, True, ledger['profit']))
+                    continue
+
+                gale = sequence.current_gale
+                outcome = manager.process_result(name, won, 0.0)
+                if outcome['action'] == 'continue_gale':
+                    place(name, sequence, ledger, outcome['next_amount'], t + 1)
+                else:
+                    finished.append((sign, ledger['start'], gale, won, False, ledger['profit']))
+                    if outcome['action'] == 'sequence_won' and signals[t] == sign:
+                        start(name, t)
+
+    return finished
+
+
+@pytest.fixture(scope='module')
+def market():
+    candles = synthetic_candles('random_walk', 4000, 0)
+    signals = np.random.default_rng(1).choice([-1, 0, 1], size=len(candles))
+    return signals, candles
+
+
+@pytest.mark.parametrize('expiry', [1, 2, 3])
+@pytest.mark.parametrize('max_gale', [0, 2, 7])
+def test_final_balance_matches_equity_curve(market, expiry, max_gale):
+    signals, candles = market
+    result = GaleSimulator(signals, candles, expiry_bars=expiry, payout=PAYOUT).simulate(max_gale=max_gale)
+
+    assert result.final_balance == pytest.approx(float(result.equity_curve[-1]))
+    assert result.final_balance - result.initial_balance == pytest.approx(result.total_profit)
+
+
+@pytest.mark.parametrize('expiry', [1, 2, 3])
+@pytest.mark.parametrize('max_gale', [0, 2, 7])
+@pytest.mark.parametrize('allow_override', [True, False])
+def test_sequences_match_dual_gale_manager_replay(market, expiry, max_gale, allow_override):
+    signals, candles = market
+    signals, candles = signals[:600], candles[:600]
+    result = GaleSimulator(
+        signals, candles, expiry_bars=expiry, payout=PAYOUT, allow_override=allow_override
+    ).simulate(max_gale=max_gale)
+    colors = np.sign(candles.close - candles.open)
+
+    replay = _replay_manager(signals, colors, expiry, max_gale, allow_override=allow_override)
+    rows = result.sequences
+    simulated = sorted(zip(rows['direction'].tolist(), rows['start'].tolist(), rows['gale'].tolist(),
+                           rows['won'].tolist(), rows['replaced'].tolist()))
+
+    assert simulated == sorted(row[:5] for row in replay)
+    assert result.total_profit == pytest.approx(sum(row[5] for row in replay))
+    assert result.replaced_sequences == sum(row[4] for row in replay)
+    if not allow_override:
+        assert result.replaced_sequences == 0
+
+
+def test_gale_zero_win_books_payout(market):
+    signals, candles = market
+    result = GaleSimulator(signals, candles, payout=PAYOUT).simulate(base_amount=5.0, max_gale=0)
+
+    # Con max_gale=0 cada secuencia (reemplazada o no) es un trade: +5 * 0.87 si gana, -5 si pierde
+    won = int(result.sequences['won'].sum())
+    expected = won * 5.0 * PAYOUT - (result.total_sequences - won) * 5.0
+    assert result.total_profit == pytest.approx(expected)
+
+
+def test_monte_carlo_uses_same_accounting(market):
+    signals, candles = market
+    simulator = GaleSimulator(signals, candles, payout=PAYOUT, initial_balance=1_000_000.0)
+
+    # Un solo camino parametrico con prob. 1: todas las secuencias ganan en gale 0
+    summary = simulator.monte_carlo(base_amount=5.0, max_gale=2, n_paths=1, horizon=10,
+                                    method='parametric', win_rate=1.0, seed=0)
+    assert summary['final_balance_mean'] == pytest.approx(1_000_000.0 + 10 * 5.0 * PAYOUT)
+
+
+@pytest.mark.parametrize('n_paths, horizon', [
+    (MAX_MONTE_CARLO_PATHS + 1, 10),
+    (MAX_MONTE_CARLO_PATHS, MAX_MONTE_CARLO_STEPS // MAX_MONTE_CARLO_PATHS + 1),
+    (0, 10)
+])
+def test_monte_carlo_rejects_oversized_runs(market, n_paths, horizon):
+    signals, candles = market
+    with pytest.raises(ValueError):
+        GaleSimulator(signals, candles).monte_carlo(n_paths=n_paths, horizon=horizon)
@@ -0,0 +1,137 @@
+"""
+Pruebas de propiedad de la librería de indicadores
+
+Genera series aleatorias (caminatas, series planas, saltos, periodos
+pequeños y grandes) y verifica que cada kernel batch y su actualizador
+incremental coincidan bit a bit, que rsi_windows sea idéntico a llamar
+rsi() ventana por ventana, y que lz76_complexity (y su modo de ventana
+deslizante) cuente las mismas frases que el parseo LZ76 cuadrático
+original de KolmogorovComplexityStrategy.
+
+Cada semilla de SEEDS es un caso reproducible (una serie o una secuencia).
+"""
+
+from typing import Callable, List
+import numpy as np
+import pytest
+
+from indicators import sma, ema, SMA, EMA, rsi, rsi_windows, macd, RSI, MACD, bollinger_bands, BollingerBands
+from indicators.complexity import lz76_complexity, _lz76_automaton, SlidingLZ76
+
+
+SEEDS = range(200)
+
+
+def _random_series(rng: np.random.Generator) -> np.ndarray:
+    """Serie de precios aleatoria con casos borde mezclados"""
+    n = int(rng.integers(1, 400))
+    kind = rng.integers(0, 4)
+    if kind == 0:
+        steps = rng.normal(0, 1e-3, n)
+    elif kind == 1:
+        steps = np.zeros(n)
+    elif kind == 2:
+        steps = rng.choice([-1e-4, 0.0, 1e-4], n)
+    else:
+        steps = rng.normal(0, 1e-3, n) * (rng.random(n) < 0.2) * 50
+    return rng.uniform(0.5, 150.0) + np.cumsum(steps)
+
+
+def _same(batch: np.ndarray, streamed: List) -> bool:
+    """Compara bit a bit (NaN/None cuentan como iguales entre sí)"""
+    expected = np.array([np.nan if v is None else v for v in streamed], dtype=float)
+    return np.array_equal(batch, expected, equal_nan=True)
+
+
+def _stream(updater, prices: np.ndarray, pick: Callable = lambda v: v) -> List:
+    return [pick(v) if v is not None else None for v in (updater.update(p) for p in prices.tolist())]
+
+
+def _reference_lz76(sequence: str) -> int:
+    """Parseo LZ76 original (cuadrático) usado como referencia"""
+    if not sequence:
+        return 0
+
+    n = len(sequence)
+    i = 0
+    complexity = 1
+
+    while i < n - 1:
+        j = i + 1
+        while j < n:
+            substring = sequence[i:j]
+            if substring in sequence[:i]:
+                j += 1
+            else:
+                break
+        complexity += 1
+        i = j
+
+    return complexity
+
+
+@pytest.fixture(params=SEEDS)
+def series(request):
+    """(precios, period, lookback) aleatorios y reproducibles por semilla"""
+    rng = np.random.default_rng(request.param)
+    prices = _random_series(rng)
+    period = int(rng.integers(2, 40))
+    lookback = int(rng.integers(period, 250))
+    return prices, period, lookback
+
+
+def test_moving_averages_parity(series):
+    prices, period, _ = series
+    assert _same(sma(prices, period), _stream(SMA(period), prices))
+    assert _same(ema(prices, period), _stream(EMA(period), prices))
+
+
+def test_rsi_parity(series):
+    prices, period, _ = series
+    assert _same(rsi(prices, period), _stream(RSI(period), prices))
+
+
+def test_macd_parity(series):
+    prices, period, _ = series
+    fast, slow, signal = period, period * 2 + 1, max(1, period // 2)
+    batch = macd(prices, fast, slow, signal)
+    values = _stream(MACD(fast, slow, signal), prices)
+    for key in ('macd', 'signal', 'histogram'):
+        assert _same(batch[key], [v[key] for v in values]), key
+
+
+def test_bollinger_parity(series):
+    prices, period, _ = series
+    bands = bollinger_bands(prices, period, 2.0)
+    values = _stream(BollingerBands(period, 2.0), prices)
+    for key in ('upper', 'middle', 'lower'):
+        assert _same(bands[key], [v[key] if v else None for v in values]), key
+
+
+def test_rsi_windows_matches_windowed_rsi(series):
+    prices, period, lookback = series
+    windows = rsi_windows(prices, period, lookback)
+    for i in range(len(prices)):
+        window_rsi = rsi(prices[max(0, i - lookback):i + 1], period)
+        expected = window_rsi[-2:] if len(window_rsi) >= period + 2 else np.array([np.nan, np.nan])
+        actual = np.array([windows['prev'][i], windows['last'][i]])
+        assert np.array_equal(actual, expected, equal_nan=True), f'@{i}'
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_lz76_matches_reference(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(0, 300))
+    alphabet = '10X'[:int(rng.integers(1, 4))]
+    sequence = ''.join(rng.choice(list(alphabet), n).tolist())
+    expected = _reference_lz76(sequence)
+
+    assert lz76_complexity(sequence) == expected
+    if n:
+        assert _lz76_automaton(sequence) == expected
+
+    window = int(rng.integers(1, 80))
+    sliding = SlidingLZ76(window)
+    for i, symbol in enumerate(sequence):
+        sliding.push(symbol)
+        assert sliding.complexity() == _reference_lz76(sequence[max(0, i - window + 1):i + 1]), f'@{i}'
@@ -0,0 +1,52 @@
+"""
+Pruebas de la interfaz streaming (Strategy.on_candle) de las estrategias
+con estado incremental
+
+Contrato: la señal de on_candle para la vela i es la de analyze sobre
+TODAS las velas recibidas hasta i. No es la de analyze sobre la ventana
+de 200 velas del backtest: los indicadores recursivos (EMA, MACD, RSI)
+en streaming no se re-siembran en cada ventana.
+"""
+
+import pytest
+
+from benchmarks.synthetic import synthetic_candles
+from strategies import (
+    RSIStrategy, MACDStrategy, BollingerStrategy, TendencialTradeStrategy, TableroBinariasStrategy
+)
+
+
+STREAMING_STRATEGIES = [RSIStrategy, MACDStrategy, BollingerStrategy, TendencialTradeStrategy, TableroBinariasStrategy]
+
+
+def _key(signal):
+    return None if signal is None else (signal.direction, round(signal.confidence, 9))
+
+
+@pytest.fixture(scope='module', params=['random_walk', 'regime_switching'])
+def candles(request):
+    return synthetic_candles(request.param, 600, 3).to_candles()
+
+
+@pytest.mark.parametrize('strategy_class', STREAMING_STRATEGIES)
+def test_on_candle_matches_analyze_over_full_history(candles, strategy_class):
+    streaming, batch = strategy_class(), strategy_class()
+
+    for i, candle in enumerate(candles):
+        assert _key(streaming.on_candle(candle)) == _key(batch.analyze('', '', candles[:i + 1])), f'@{i}'
+
+
+def test_tablero_streaming_signal_refers_to_the_next_candle(candles):
+    streaming, batch = TableroBinariasStrategy(), TableroBinariasStrategy()
+
+    for i, candle in enumerate(candles[:-1]):
+        signal = streaming.on_candle(candle)
+        if signal is None:
+            continue
+
+        # analyze con la vela siguiente como vela en curso: misma vela de
+        # entrada y mismo indicador de reversión (sobre las velas cerradas)
+        live = batch.analyze('', '', candles[:i + 2])
+        assert signal.timestamp == live.timestamp == candles[i + 1].time
+        assert signal.indicators['reversal_marker'] == live.indicators['reversal_marker']
+        assert signal.indicators['close'] == candle.close